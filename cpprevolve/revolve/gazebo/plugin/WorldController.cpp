@@ -119,9 +119,24 @@ void WorldController::Load(
 
 void WorldController::Reset()
 {
+    this->ResetDeathSentences();
     this->lastRobotStatesUpdateTime_ = 0; //this->world_->SimTime().Double();
 }
 
+/////////////////////////////////////////////////
+void WorldController::ResetDeathSentences()
+{
+    // The simulation time goes back: the initialized death sentences become
+    // negative again, with the lifetime that was left at the last robot states
+    // update, and they are initialized again at the next one
+    boost::mutex::scoped_lock lock(this->death_sentences_mutex_);
+    for (auto &death_sentence : this->death_sentences_) {
+        if (death_sentence.second > 0) {
+            death_sentence.second = this->lastRobotStatesUpdateTime_ - death_sentence.second;
+        }
+    }
+}
+
 /////////////////////////////////////////////////
 void WorldController::OnBeginUpdate(const ::gazebo::common::UpdateInfo &_info) {
     if (not this->robotStatesPubFreq_) {
@@ -130,6 +145,12 @@ void WorldController::OnBeginUpdate(const ::gazebo::common::UpdateInfo &_info) {
 
     auto secs = 1.0 / this->robotStatesPubFreq_;
     auto time = _info.simTime.Double();
+    if (time < this->lastRobotStatesUpdateTime_) {
+        // The simulation time was reset without resetting the world
+        // (which would have called `Reset()`)
+        this->ResetDeathSentences();
+        this->lastRobotStatesUpdateTime_ = 0;
+    }
     if ((time - this->lastRobotStatesUpdateTime_) >= secs) {
         // Send robot info update message, this only sends the
         // main pose of the robot (which is all we need for now)
@@ -69,6 +69,10 @@ protected:
 
     virtual void OnEndUpdate();
 
+    // Counts the remaining lifetimes again from the next robot states update,
+    // when the simulation time goes back
+    void ResetDeathSentences();
+
     // Maps model names to insert request IDs
     // model_name -> request_id, SDF, insert_operation_pending
     std::map<std::string, std::tuple<int, std::string, bool> > insertMap_;
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the handling of the contacts messages by the world manager.
+
+Measures `WorldManager._update_contacts` on the contacts of many robots with
+the ground, of which only some are registered in the world manager, against
+the previous parsing of the whole `Contacts` message with protobuf.
+
+Run from the root of the repository:
+    python3 experiments/benchmarks/contacts.py
+"""
+import argparse
+import asyncio
+import logging
+import random
+import timeit
+from types import SimpleNamespace
+
+from pygazebo.msg.contacts_pb2 import Contacts
+
+from pyrevolve.angle.manage.robotmanager import RobotManager
+from pyrevolve.angle.manage.world import WorldManager
+from pyrevolve.SDF.math import Vector3
+from pyrevolve.util import Time
+
+
+def contacts_messages(n_messages, n_robots, modules, seed):
+    rng = random.Random(seed)
+    messages = []
+    for i in range(n_messages):
+        contacts = Contacts()
+        contacts.time.sec, contacts.time.nsec = divmod(i * 1000000, 1000000000)
+        for robot_id in range(n_robots):
+            for module in range(modules):
+                contact = contacts.contact.add()
+                contact.collision1 = f'robot_{robot_id}::module_{module}::collision'
+                contact.collision2 = 'ground_plane::link::collision'
+                contact.world = 'default'
+                contact.time.CopyFrom(contacts.time)
+                for _ in range(rng.randint(1, 4)):
+                    position = contact.position.add()
+                    position.x, position.y, position.z = rng.uniform(-1, 1), rng.uniform(-1, 1), 0.0
+                    normal = contact.normal.add()
+                    normal.x, normal.y, normal.z = 0.0, 0.0, 1.0
+                    contact.depth.append(rng.uniform(0, 1e-3))
+        messages.append(contacts.SerializeToString())
+    return messages
+
+
+def world_manager(n_tracked, contacts_sampling):
+    world = WorldManager(builder=None, generator=None, state_update_frequency=5,
+                         contacts_sampling=contacts_sampling, _private=WorldManager._PRIVATE)
+    body = SimpleNamespace(measurements_to_dict=lambda: {'absolute_size': 4})
+    for robot_id in range(n_tracked):
+        robot = SimpleNamespace(id=f'robot_{robot_id}', phenotype=SimpleNamespace(_morphological_measurements=body))
+        world.register_robot(RobotManager(robot, Vector3(), Time()))
+    return world
+
+
+def protobuf_parsing(messages, robot_managers):
+    for msg in messages:
+        contacts = Contacts()
+        contacts.ParseFromString(msg)
+        for module_contacts in contacts.contact:
+            robot_manager = robot_managers.get(module_contacts.collision1.split('::')[0], None)
+            if robot_manager:
+                robot_manager.update_contacts(None, module_contacts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', default=200, type=int, help='number of contacts messages, one per millisecond')
+    parser.add_argument('--robots', default=30, type=int, help='number of robots touching the ground')
+    parser.add_argument('--modules', default=3, type=int, help='number of modules of every robot touching the ground')
+    parser.add_argument('--seed', default=0, type=int, help='random seed')
+    args = parser.parse_args()
+
+    # the world manager logs the registration of every robot
+    logging.disable(logging.INFO)
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    messages = contacts_messages(args.messages, args.robots, args.modules, args.seed)
+    print(f'{args.messages} messages with {args.robots * args.modules} contacts, '
+          f'{sum(len(msg) for msg in messages) / len(messages):.0f} bytes on average')
+
+    for n_tracked in sorted({args.robots // 10, args.robots}):
+        world = world_manager(n_tracked, 'step')
+        elapsed = min(timeit.repeat(lambda: protobuf_parsing(messages, world.robot_managers), repeat=3, number=1))
+        print(f'{f"protobuf parsing, {n_tracked} tracked":>36}: {elapsed / args.messages * 1e6:8.1f} us per message')
+        for contacts_sampling in ('step', 'states'):
+            world = world_manager(n_tracked, contacts_sampling)
+
+            def update_contacts():
+                world._last_contacts_time = None
+                for msg in messages:
+                    world._update_contacts(msg)
+
+            elapsed = min(timeit.repeat(update_contacts, repeat=3, number=1))
+            print(f'{f"_update_contacts {contacts_sampling}, {n_tracked} tracked":>36}: '
+                  f'{elapsed / args.messages * 1e6:8.1f} us per message')
+
+
+if __name__ == '__main__':
+    main()
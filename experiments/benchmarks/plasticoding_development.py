@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the development of Plasticoding genotypes on large random grammars.
+
+Measures the time of early development (rewriting) and late development (decoding),
+and compares the per symbol category lookup done by the decoder with the previous
+lookup, which tested the membership of `[symbol, []]` in the lists of every category.
+Then measures the development of offspring bred by crossover and mutation, with
+and without the development cache.
+
+Run from the root of the repository:
+    python3 experiments/benchmarks/plasticoding_development.py
+"""
+import argparse
+import logging
+import random
+import time
+
+from pyrevolve.genotype.plasticoding.crossover.crossover import CrossoverConfig
+from pyrevolve.genotype.plasticoding.crossover.standard_crossover import generate_child_genotype
+from pyrevolve.genotype.plasticoding.development_cache import DevelopmentCache
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.mutation.mutation import MutationConfig
+from pyrevolve.genotype.plasticoding.mutation.standard_mutation import standard_mutation
+from pyrevolve.genotype.plasticoding.plasticoding import Alphabet, PlasticodingConfig
+
+
+def legacy_category(symbol):
+    """
+    Category lookup as it was done in late development before the category map
+    """
+    if [symbol, []] in Alphabet.modules():
+        return 'modules'
+    if [symbol, []] in Alphabet.morphology_mounting_commands():
+        return 'morphology_mounting_commands'
+    if [symbol, []] in Alphabet.morphology_moving_commands():
+        return 'morphology_moving_commands'
+    if [symbol, []] in Alphabet.controller_changing_commands():
+        return 'controller_changing_commands'
+    if [symbol, []] in Alphabet.controller_moving_commands():
+        return 'controller_moving_commands'
+
+
+def run(n_genotypes, e_max_groups, i_iterations, seed):
+    random.seed(seed)
+    conf = PlasticodingConfig(e_max_groups=e_max_groups, i_iterations=i_iterations)
+    genotypes = [random_initialization(conf, f'robot_{i}') for i in range(n_genotypes)]
+
+    early = late = legacy_lookup = lookup = 0.0
+    n_symbols = 0
+    for genotype in genotypes:
+        start = time.perf_counter()
+        genotype.early_development()
+        early += time.perf_counter() - start
+
+        symbols = [symbol[0] for symbol in genotype.intermediate_phenotype]
+        n_symbols += len(symbols)
+
+        start = time.perf_counter()
+        for symbol in symbols:
+            legacy_category(symbol)
+        legacy_lookup += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for symbol in symbols:
+            Alphabet.category(symbol)
+        lookup += time.perf_counter() - start
+
+        start = time.perf_counter()
+        genotype.late_development()
+        late += time.perf_counter() - start
+
+    print(f'{n_genotypes} genotypes, e_max_groups={e_max_groups}, i_iterations={i_iterations}, '
+          f'{n_symbols / n_genotypes:.0f} symbols per intermediate phenotype on average')
+    print(f'early development:      {early / n_genotypes * 1e3:8.3f} ms per genotype')
+    print(f'late development:       {late / n_genotypes * 1e3:8.3f} ms per genotype')
+    print(f'legacy category lookup: {legacy_lookup / n_symbols * 1e6:8.3f} us per symbol')
+    print(f'category map lookup:    {lookup / n_symbols * 1e6:8.3f} us per symbol')
+
+
+def run_offspring(n_genotypes, e_max_groups, i_iterations, seed, cache_size, mutation_prob, crossover_prob,
+                  generations):
+    n_offspring = n_genotypes // 2
+    for development_cache_size in (0, cache_size):
+        random.seed(seed)
+        conf = PlasticodingConfig(e_max_groups=e_max_groups, i_iterations=i_iterations,
+                                  development_cache_size=development_cache_size)
+        mutation_conf = MutationConfig(mutation_prob=mutation_prob, genotype_conf=conf)
+        crossover_conf = CrossoverConfig(crossover_prob=crossover_prob)
+        population = [random_initialization(conf, f'robot_{i}') for i in range(n_genotypes)]
+        for genotype in population:
+            genotype.develop()
+
+        # the offspring replace random individuals, there is no fitness to select them
+        elapsed = 0.0
+        next_id = n_genotypes
+        for _ in range(generations):
+            offspring = []
+            for _ in range(n_offspring):
+                child = generate_child_genotype(random.sample(population, 2), conf, crossover_conf)
+                child = standard_mutation(child, mutation_conf)
+                child.id = f'robot_{next_id}'
+                next_id += 1
+                start = time.perf_counter()
+                child.develop()
+                elapsed += time.perf_counter() - start
+                offspring.append(child)
+            population = random.sample(population, n_genotypes - n_offspring) + offspring
+
+        n_developed = generations * n_offspring
+        if development_cache_size > 0:
+            cache = DevelopmentCache.shared(development_cache_size)
+            print(f'offspring development, cache of {development_cache_size}: '
+                  f'{elapsed / n_developed * 1e3:8.3f} ms per genotype, '
+                  f'{cache.hits} hits / {cache.hits + cache.misses} developments')
+            cache.clear()
+        else:
+            print(f'offspring development, no cache:    {elapsed / n_developed * 1e3:8.3f} ms per genotype')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--genotypes', default=100, type=int, help='number of random genotypes')
+    parser.add_argument('--e-max-groups', default=10, type=int, help='maximum number of groups per rule')
+    parser.add_argument('--i-iterations', default=3, type=int, help='number of rewriting iterations')
+    parser.add_argument('--seed', default=0, type=int, help='random seed')
+    parser.add_argument('--cache-size', default=1000, type=int, help='size of the development cache')
+    parser.add_argument('--mutation-prob', default=0.8, type=float, help='mutation probability of the offspring')
+    parser.add_argument('--crossover-prob', default=0.8, type=float, help='crossover probability of the offspring')
+    parser.add_argument('--generations', default=10, type=int, help='number of generations of offspring')
+    args = parser.parse_args()
+
+    # development logs every robot
+    logging.disable(logging.INFO)
+    run(args.genotypes, args.e_max_groups, args.i_iterations, args.seed)
+    run_offspring(args.genotypes, args.e_max_groups, args.i_iterations, args.seed, args.cache_size,
+                  args.mutation_prob, args.crossover_prob, args.generations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the copies of Plasticoding genotypes.
+
+Measures `Plasticoding.clone()`, which copies the grammar only, against the
+previous deep copy of the developed genotype, and the mutation of the genotypes.
+
+Run from the root of the repository:
+    python3 experiments/benchmarks/plasticoding_genome.py
+"""
+import argparse
+import copy
+import logging
+import random
+import timeit
+import tracemalloc
+
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.mutation.mutation import MutationConfig
+from pyrevolve.genotype.plasticoding.mutation.standard_mutation import standard_mutation
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+
+
+def allocated(build):
+    """
+    :return: (result of build(), bytes allocated by it)
+    """
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def measure(name, function, n):
+    elapsed = min(timeit.repeat(function, repeat=3, number=1))
+    print(f'{name:>32}: {elapsed / n * 1e6:9.1f} us per genotype')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--genotypes', default=200, type=int, help='number of random genotypes')
+    parser.add_argument('--e-max-groups', default=3, type=int, help='maximum number of groups per rule')
+    parser.add_argument('--seed', default=0, type=int, help='random seed')
+    args = parser.parse_args()
+
+    # development and mutation log every genotype
+    logging.disable(logging.INFO)
+    random.seed(args.seed)
+    conf = PlasticodingConfig(e_max_groups=args.e_max_groups)
+    genotypes = [random_initialization(conf, f'robot_{i}') for i in range(args.genotypes)]
+    for genotype in genotypes:
+        genotype.develop()
+    n_symbols = sum(len(rule) for genotype in genotypes for rule in genotype.grammar.values())
+    print(f'{args.genotypes} developed genotypes, {n_symbols / args.genotypes:.0f} symbols per grammar on average')
+
+    mutation_conf = MutationConfig(mutation_prob=1.0, genotype_conf=conf)
+    measure('deep copy', lambda: [copy.deepcopy(genotype) for genotype in genotypes], args.genotypes)
+    measure('clone', lambda: [genotype.clone() for genotype in genotypes], args.genotypes)
+    measure('mutation', lambda: [standard_mutation(genotype, mutation_conf) for genotype in genotypes],
+            args.genotypes)
+
+    _, size = allocated(lambda: [genotype.clone() for genotype in genotypes])
+    print(f'{"grammar memory":>32}: {size / args.genotypes:9.0f} bytes per genotype')
+
+
+if __name__ == '__main__':
+    main()
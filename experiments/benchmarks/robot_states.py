@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the handling of the robot states messages by the world manager.
+
+Measures `WorldManager._update_states` on messages with the states of many
+robots, of which only some are registered in the world manager, and compares
+the decoding of the messages with the previous parsing of the whole
+`RobotStates` message with protobuf.
+
+Run from the root of the repository:
+    python3 experiments/benchmarks/robot_states.py
+"""
+import argparse
+import asyncio
+import logging
+import random
+import timeit
+from types import SimpleNamespace
+
+from pyrevolve.angle.manage.robot_states import RobotStatesDecoder
+from pyrevolve.angle.manage.robotmanager import RobotManager
+from pyrevolve.angle.manage.world import WorldManager
+from pyrevolve.SDF.math import Quaternion, Vector3
+from pyrevolve.spec.msgs import RobotStates
+from pyrevolve.util import Time
+
+
+def states_messages(n_messages, n_robots, seed):
+    rng = random.Random(seed)
+    messages = []
+    for i in range(n_messages):
+        states = RobotStates()
+        states.time.sec, states.time.nsec = divmod(i * 200000000, 1000000000)
+        for robot_id in range(n_robots):
+            state = states.robot_state.add()
+            state.id = robot_id
+            state.name = f'robot_{robot_id}'
+            position = state.pose.position
+            position.x, position.y, position.z = rng.uniform(-1, 1), rng.uniform(-1, 1), 0.1
+            orientation = state.pose.orientation
+            q = Quaternion.from_rpy(rng.uniform(-0.1, 0.1), rng.uniform(-0.1, 0.1), rng.uniform(-3, 3))
+            orientation.w, orientation.x, orientation.y, orientation.z = q
+            state.dead = False
+        messages.append(states.SerializeToString())
+    return messages
+
+
+def world_manager(n_tracked):
+    world = WorldManager(builder=None, generator=None, _private=WorldManager._PRIVATE)
+    body = SimpleNamespace(measurements_to_dict=lambda: {'absolute_size': 4})
+    for robot_id in range(n_tracked):
+        robot = SimpleNamespace(id=f'robot_{robot_id}', phenotype=SimpleNamespace(_morphological_measurements=body))
+        world.register_robot(RobotManager(robot, Vector3(), Time()))
+    return world
+
+
+def protobuf_parsing(messages):
+    for msg in messages:
+        states = RobotStates()
+        states.ParseFromString(msg)
+        for state in states.robot_state:
+            position, orientation = state.pose.position, state.pose.orientation
+            (state.name, position.x, position.y, position.z,
+             orientation.w, orientation.x, orientation.y, orientation.z, state.dead)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', default=200, type=int, help='number of robot states messages')
+    parser.add_argument('--robots', default=30, type=int, help='number of robots in every message')
+    parser.add_argument('--seed', default=0, type=int, help='random seed')
+    args = parser.parse_args()
+
+    # the world manager logs the registration of every robot
+    logging.disable(logging.INFO)
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    messages = states_messages(args.messages, args.robots, args.seed)
+    print(f'{args.messages} messages with {args.robots} robot states, '
+          f'{sum(len(msg) for msg in messages) / len(messages):.0f} bytes on average')
+
+    elapsed = min(timeit.repeat(lambda: protobuf_parsing(messages), repeat=3, number=1))
+    print(f'{"protobuf parsing":>28}: {elapsed / args.messages * 1e6:8.1f} us per message')
+    decoder = RobotStatesDecoder()
+    for n_tracked in sorted({args.robots // 10, args.robots}):
+        index = {f'robot_{robot_id}'.encode(): robot_id for robot_id in range(n_tracked)}
+        elapsed = min(timeit.repeat(lambda: [decoder.decode(msg, index) for msg in messages], repeat=3, number=1))
+        print(f'{f"decoding, {n_tracked} tracked":>28}: {elapsed / args.messages * 1e6:8.1f} us per message')
+
+        world = world_manager(n_tracked)
+        for msg in messages:
+            world._update_states(msg)
+        print(f'{f"_update_states, {n_tracked} tracked":>28}: '
+              f'{world.state_ingest_cost() * 1e6:8.1f} us per message')
+
+
+if __name__ == '__main__':
+    main()
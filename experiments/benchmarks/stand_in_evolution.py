@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the evaluation pipeline (Population, SimulatorQueue, World,
+RequestHandler, AnalyzerQueue) against stand-in simulators, which speak the
+Gazebo protocol but replace the physics with synthetic trajectories.
+
+Measures the number of evaluations per second of the orchestration alone, so
+that changes on the Python side can be profiled without Gazebo.
+
+Run from the root of the repository:
+    python3 experiments/benchmarks/stand_in_evolution.py --simulators 4
+With --distributed-workers the simulators are run by worker processes
+connected to a coordinator, as they would be on the nodes of a cluster.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from pyrevolve import parser
+from pyrevolve.evolution import fitness
+from pyrevolve.evolution.selection import multiple_selection, tournament_selection
+from pyrevolve.evolution.population import Population, PopulationConfig
+from pyrevolve.evolution.pop_management.steady_state import steady_state_population_management
+from pyrevolve.experiment_management import ExperimentManagement
+from pyrevolve.genotype.plasticoding.crossover.crossover import CrossoverConfig
+from pyrevolve.genotype.plasticoding.crossover.standard_crossover import standard_crossover
+from pyrevolve.genotype.plasticoding.development_cache import DevelopmentCache
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.mutation.mutation import MutationConfig
+from pyrevolve.genotype.plasticoding.mutation.standard_mutation import standard_mutation
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+from pyrevolve.util.supervisor.analyzer_queue import AnalyzerQueue
+from pyrevolve.util.supervisor.distributed import DistributedSimulatorQueue
+from pyrevolve.util.supervisor.simulator_queue import SimulatorQueue
+
+
+def stand_in_cmd(args):
+    return [sys.executable, '-m', 'pyrevolve.gazebo.stand_in_server',
+            '--real-time-factor', str(args.real_time_factor),
+            '--position-noise', str(args.position_noise)]
+
+
+async def run(args):
+    data_folder = tempfile.mkdtemp(prefix='stand_in_evolution_')
+    settings = parser.parse_args([
+        '--manager', os.path.join(data_folder, 'stand_in_evolution.py'),
+        '--experiment-name', 'stand_in_evolution',
+        '--evaluation-time', str(args.evaluation_time),
+        '--n-cores', str(args.simulators),
+        '--port-start', str(args.port_start),
+        '--robots-per-simulator', str(args.robots_per_simulator),
+        '--spare-simulators', str(args.spare_simulators),
+        '--evaluation-scheduling', args.evaluation_scheduling,
+        '--racing-quantile', str(args.racing_quantile),
+        '--development-workers', str(args.development_workers),
+        '--development-cache-size', str(args.development_cache_size),
+    ])
+    experiment_management = ExperimentManagement(settings)
+    experiment_management.create_exp_folders()
+
+    genotype_conf = PlasticodingConfig(max_structural_modules=100,
+                                       development_cache_size=settings.development_cache_size)
+    population_conf = PopulationConfig(
+        population_size=args.population_size,
+        genotype_constructor=random_initialization,
+        genotype_conf=genotype_conf,
+        fitness_function=fitness.displacement_velocity,
+        mutation_operator=standard_mutation,
+        mutation_conf=MutationConfig(mutation_prob=0.8, genotype_conf=genotype_conf),
+        crossover_operator=standard_crossover,
+        crossover_conf=CrossoverConfig(crossover_prob=0.8),
+        selection=lambda individuals: tournament_selection(individuals, 2),
+        parent_selection=lambda individuals: multiple_selection(individuals, 2, tournament_selection),
+        population_management=steady_state_population_management,
+        population_management_selector=tournament_selection,
+        evaluation_time=settings.evaluation_time,
+        offspring_size=args.offspring_size,
+        experiment_name=settings.experiment_name,
+        experiment_management=experiment_management,
+        development_workers=settings.development_workers,
+    )
+
+    start = time.perf_counter()
+    if args.distributed_workers > 0:
+        simulator_queue = DistributedSimulatorQueue(settings, address=('127.0.0.1', args.port_start))
+        await simulator_queue.start()
+        workers = start_workers(args)
+        while simulator_queue.capacity < args.distributed_workers * args.simulators * args.robots_per_simulator:
+            await asyncio.sleep(0.1)
+        analyzer_port = args.port_start + 1 + args.distributed_workers * (args.simulators + args.spare_simulators)
+        print(f'{args.distributed_workers} workers with {args.simulators} stand-in simulators each '
+              f'connected in {time.perf_counter() - start:.2f} s')
+    else:
+        workers = []
+        simulator_queue = SimulatorQueue(args.simulators, settings, settings.port_start,
+                                         simulator_cmd=stand_in_cmd(args))
+        await simulator_queue.start()
+        analyzer_port = simulator_queue.port_end
+        print(f'{args.simulators} stand-in simulators started in {time.perf_counter() - start:.2f} s')
+    analyzer_queue = None
+    if args.analyzer:
+        analyzer_queue = AnalyzerQueue(1, settings, analyzer_port, simulator_cmd=stand_in_cmd(args))
+        await analyzer_queue.start()
+
+    population = Population(population_conf, simulator_queue, analyzer_queue, 1)
+
+    start = time.perf_counter()
+    await population.init_pop()
+    elapsed = time.perf_counter() - start
+    total_evaluations, total_elapsed = args.population_size, elapsed
+    print(f'initial population: {args.population_size} evaluations in {elapsed:.2f} s, '
+          f'{args.population_size / elapsed:.2f} evaluations/s')
+
+    for gen_num in range(1, args.generations + 1):
+        start = time.perf_counter()
+        population = await population.next_gen(gen_num)
+        elapsed = time.perf_counter() - start
+        total_evaluations += args.offspring_size
+        total_elapsed += elapsed
+        print(f'generation {gen_num}: {args.offspring_size} evaluations in {elapsed:.2f} s, '
+              f'{args.offspring_size / elapsed:.2f} evaluations/s')
+    population.shutdown()
+
+    print(f'total: {total_evaluations} evaluations in {total_elapsed:.2f} s, '
+          f'{total_evaluations / total_elapsed:.2f} evaluations/s, '
+          f'{total_evaluations * args.evaluation_time / total_elapsed:.1f} simulated s/s')
+    if not workers:
+        messages = sum(connection.state_ingest_messages for connection in simulator_queue._connections)
+        ingest_time = sum(connection.state_ingest_time for connection in simulator_queue._connections)
+        if messages > 0:
+            print(f'robot states: {messages} messages handled in {ingest_time / messages * 1e6:.1f} us on average')
+    if args.development_cache_size > 0 and args.development_workers == 0:
+        cache = DevelopmentCache.shared(args.development_cache_size)
+        print(f'development cache: {cache.hits} hits, {cache.misses} misses')
+    print(f'data exported in {data_folder}')
+    for worker in workers:
+        worker.terminate()
+        worker.wait()
+
+
+def start_workers(args):
+    """
+    Launches the worker processes, each one with its own simulators on the ports after the coordinator
+    """
+    workers = []
+    port = args.port_start + 1
+    for _ in range(args.distributed_workers):
+        workers.append(subprocess.Popen([
+            sys.executable, '-m', 'pyrevolve.util.supervisor.distributed',
+            '--coordinator', f'127.0.0.1:{args.port_start}',
+            '--simulator-cmd', ' '.join(shlex.quote(arg) for arg in stand_in_cmd(args)),
+            '--n-cores', str(args.simulators),
+            '--port-start', str(port),
+            '--robots-per-simulator', str(args.robots_per_simulator),
+            '--spare-simulators', str(args.spare_simulators),
+            '--racing-quantile', str(args.racing_quantile),
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        port += args.simulators + args.spare_simulators
+    return workers
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--simulators', default=4, type=int, help='number of stand-in simulators (of each worker)')
+    arg_parser.add_argument('--distributed-workers', default=0, type=int,
+                            help='worker processes running the simulators, 0 to run them in this process')
+    arg_parser.add_argument('--spare-simulators', default=0, type=int,
+                            help='simulators kept ready to replace the ones that stop responding')
+    arg_parser.add_argument('--evaluation-scheduling', default='fifo', choices=['fifo', 'longest-first'],
+                            help='order in which the simulators pick up the robots')
+    arg_parser.add_argument('--racing-quantile', default=0.0, type=float,
+                            help='stop early the evaluations below this quantile of the population, 0 to disable')
+    arg_parser.add_argument('--robots-per-simulator', default=1, type=int,
+                            help='robots evaluated at the same time in each simulator')
+    arg_parser.add_argument('--development-workers', default=0, type=int,
+                            help='processes developing the new individuals')
+    arg_parser.add_argument('--development-cache-size', default=0, type=int,
+                            help='grammars whose development is memoized, 0 to develop every individual')
+    arg_parser.add_argument('--analyzer', action='store_true', help='also run the body analyzer queue')
+    arg_parser.add_argument('--population-size', default=20, type=int, help='size of the population')
+    arg_parser.add_argument('--offspring-size', default=10, type=int, help='offspring of every generation')
+    arg_parser.add_argument('--generations', default=3, type=int, help='number of generations')
+    arg_parser.add_argument('--evaluation-time', default=10, type=int, help='simulated seconds of every evaluation')
+    arg_parser.add_argument('--real-time-factor', default=0.0, type=float,
+                            help='simulated seconds per real second of the stand-in, 0 for as fast as possible')
+    arg_parser.add_argument('--position-noise', default=0.0, type=float,
+                            help='noise (m) on the synthetic trajectories')
+    arg_parser.add_argument('--port-start', default=11445, type=int, help='port of the first stand-in simulator')
+    args = arg_parser.parse_args()
+
+    # every evaluation is logged
+    logging.disable(logging.INFO)
+    asyncio.get_event_loop().run_until_complete(run(args))
+
+
+if __name__ == '__main__':
+    main()
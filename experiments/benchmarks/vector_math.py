@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the vector and quaternion types of `pyrevolve.SDF.math`.
+
+Measures the basic operations on `Vector3` / `Quaternion`, the two hot loops
+that use them (the generation of the SDF of random robots with
+`revolve_bot_to_sdf` and the tracking of the poses of a robot with
+`RobotManager.update_state`) and compares the transformation of many
+vectors one by one with the batch `QuaternionArray` / `Vector3Array`.
+
+Run from the root of the repository:
+    python3 experiments/benchmarks/vector_math.py
+"""
+import argparse
+import logging
+import random
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+from pyrevolve.angle.manage.robotmanager import RobotManager
+from pyrevolve.evolution.individual import Individual
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+from pyrevolve.SDF.math import Quaternion, QuaternionArray, Vector3, Vector3Array
+from pyrevolve.util import Time
+
+
+def per_call(statement, number, **namespace):
+    """
+    :return: best time of a call in microseconds
+    """
+    timer = timeit.Timer(statement, globals=namespace)
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def operations():
+    v, w = Vector3(1, 2, 3), Vector3(-2, 0.5, 4)
+    q = Quaternion.from_rpy(0.1, 0.2, 0.3)
+    namespace = dict(v=v, w=w, q=q, Vector3=Vector3)
+    for name, statement in [
+        ('component read', 'v.x'),
+        ('component write', 'v.x = 1.0'),
+        ('Vector3(x, y, z)', 'Vector3(1, 2, 3)'),
+        ('vector + vector', 'v + w'),
+        ('vector.cross(vector)', 'v.cross(w)'),
+        ('quaternion * vector', 'q * v'),
+        ('quaternion * quaternion', 'q * q'),
+        ('quaternion.get_rpy()', 'q.get_rpy()'),
+    ]:
+        print(f'{name:>24}: {per_call(statement, 20000, **namespace):8.3f} us')
+
+
+def sdf_generation(n_robots, modules, seed):
+    random.seed(seed)
+    conf = PlasticodingConfig(max_structural_modules=modules)
+    robots = [Individual(random_initialization(conf, i)) for i in range(n_robots)]
+    for robot in robots:
+        robot.develop()
+    n_modules = sum(len(list(robot.phenotype._iter_all_elements())) for robot in robots)
+
+    def generate():
+        for robot in robots:
+            robot.phenotype.to_sdf()
+    elapsed = min(timeit.repeat(generate, repeat=3, number=1))
+    print(f'{"revolve_bot_to_sdf":>24}: {elapsed / n_robots * 1e3:8.3f} ms per robot '
+          f'({n_modules / n_robots:.1f} modules on average)')
+
+
+def pose_tracking(n_updates):
+    body = SimpleNamespace(measurements_to_dict=lambda: {'absolute_size': 4})
+    robot = SimpleNamespace(id='robot_1', phenotype=SimpleNamespace(_morphological_measurements=body))
+    world = SimpleNamespace(age=Time)
+    robot_manager = RobotManager(robot, Vector3(0, 0, 0.1), Time())
+    orientation = Quaternion.from_rpy(0.1, 0.2, 0.3)
+    states = [SimpleNamespace(
+        dead=False,
+        pose=SimpleNamespace(
+            position=SimpleNamespace(x=i * 1e-3, y=0.0, z=0.1),
+            orientation=SimpleNamespace(w=orientation.w, x=orientation.x, y=orientation.y, z=orientation.z),
+        ),
+    ) for i in range(n_updates)]
+    times = [Time(dbl=i * 0.2) for i in range(n_updates)]
+
+    def track():
+        for time, state in zip(times, states):
+            robot_manager.update_state(world, time, state, None)
+    elapsed = min(timeit.repeat(track, repeat=3, number=1))
+    print(f'{"update_state":>24}: {elapsed / n_updates * 1e6:8.3f} us per update')
+
+
+def batch_transforms(n_vectors, seed):
+    rng = np.random.RandomState(seed)
+    quaternions = QuaternionArray(rng.normal(size=(n_vectors, 4)))
+    vectors = Vector3Array(rng.normal(size=(n_vectors, 3)))
+    singles = list(zip(quaternions, vectors))
+    namespace = dict(quaternions=quaternions, vectors=vectors, singles=singles)
+    for name, loop, batch in [
+        ('rotation', '[q * v for q, v in singles]', 'quaternions * vectors'),
+        ('roll / pitch / yaw', '[q.get_rpy() for q, _ in singles]', 'quaternions.get_rpy()'),
+    ]:
+        loop_time = per_call(loop, 10, **namespace)
+        batch_time = per_call(batch, 10, **namespace)
+        print(f'{name:>24}: {loop_time / n_vectors * 1e3:8.1f} ns per vector one by one, '
+              f'{batch_time / n_vectors * 1e3:8.1f} ns in batch')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--robots', default=20, type=int, help='number of random robots converted to SDF')
+    parser.add_argument('--modules', default=30, type=int, help='maximum number of modules of the robots')
+    parser.add_argument('--updates', default=10000, type=int, help='number of pose updates')
+    parser.add_argument('--vectors', default=10000, type=int, help='number of vectors transformed in batch')
+    parser.add_argument('--seed', default=0, type=int, help='random seed')
+    args = parser.parse_args()
+
+    # the SDF builder logs every robot
+    logging.disable(logging.INFO)
+    operations()
+    sdf_generation(args.robots, args.modules, args.seed)
+    pose_tracking(args.updates)
+    batch_transforms(args.vectors, args.seed)
+
+
+if __name__ == '__main__':
+    main()
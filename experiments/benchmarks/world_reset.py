@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the overhead of the evaluations with the two ways of preparing
+the world for the next evaluation (--world-reset): the "full" reset of the
+world and the "recycle" of the world, that only resets the simulation time.
+
+The same robots are evaluated one after the other in a single simulator with
+each strategy, and the wall-clock time of every evaluation is split into the
+insertion of the robot, its simulation and the clean up of the world. The
+reset requests are processed by the simulator in the following world update,
+so their cost shows up in the insertion of the next robot: the overhead is
+the insertion plus the clean up.
+
+By default a stand-in simulator is used, which only measures the Python side.
+Pass the Gazebo command to measure the real cost of the resets:
+    python3 experiments/benchmarks/world_reset.py --simulator-cmd gzserver
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+from pyrevolve import parser
+from pyrevolve.evolution import fitness
+from pyrevolve.evolution.individual import Individual
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+from pyrevolve.SDF.math import Vector3
+from pyrevolve.util.supervisor.simulator_queue import SimulatorQueue
+
+STRATEGIES = ('full', 'recycle')
+
+
+class _EvaluationConf:
+    def __init__(self, evaluation_time):
+        self.evaluation_time = evaluation_time
+        self.fitness_function = fitness.displacement_velocity
+
+
+def stand_in_cmd(args):
+    return [sys.executable, '-m', 'pyrevolve.gazebo.stand_in_server',
+            '--real-time-factor', str(args.real_time_factor)]
+
+
+async def measure(args, strategy, robots, port):
+    settings = parser.parse_args([
+        '--evaluation-time', str(args.evaluation_time),
+        '--world', args.world,
+        '--world-reset', strategy,
+    ])
+    simulator_cmd = stand_in_cmd(args) if args.simulator_cmd is None else args.simulator_cmd
+    simulator_queue = SimulatorQueue(1, settings, port, simulator_cmd=simulator_cmd)
+    await simulator_queue.start()
+    # the worker of the simulator is idle, the evaluations are driven from here
+    connection = simulator_queue._connections[0]
+    conf = _EvaluationConf(args.evaluation_time)
+    position = Vector3(0, 0, settings.z_start)
+
+    insertions, simulations, clean_ups = [], [], []
+    for robot in robots:
+        start = time.perf_counter()
+        robot_manager = await simulator_queue._insert_robot(connection, robot, conf, position)
+        inserted = time.perf_counter()
+        await simulator_queue._wait_robot_result(connection, robot_manager, robot, conf)
+        simulated = time.perf_counter()
+        await simulator_queue._clear_world(connection)
+        cleaned = time.perf_counter()
+        insertions.append(inserted - start)
+        simulations.append(simulated - inserted)
+        clean_ups.append(cleaned - simulated)
+
+    # the first insertion does not follow a clean up
+    insertion = statistics.mean(insertions[1:])
+    clean_up = statistics.mean(clean_ups)
+    print(f'{strategy:>8}: insertion {insertion * 1000:8.1f} ms, simulation {statistics.mean(simulations) * 1000:8.1f} ms, '
+          f'clean up {clean_up * 1000:6.1f} ms, overhead {(insertion + clean_up) * 1000:8.1f} ms per evaluation')
+
+
+async def run(args):
+    genotype_conf = PlasticodingConfig(max_structural_modules=args.modules)
+    robots = [Individual(random_initialization(genotype_conf, i)) for i in range(1, args.evaluations + 1)]
+    for robot in robots:
+        robot.develop()
+        robot.phenotype.measure_phenotype()
+
+    for i, strategy in enumerate(STRATEGIES):
+        await measure(args, strategy, robots, args.port_start + i)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--evaluations', default=20, type=int, help='evaluations with each strategy')
+    arg_parser.add_argument('--evaluation-time', default=2, type=float, help='simulated seconds of every evaluation')
+    arg_parser.add_argument('--modules', default=20, type=int, help='maximum number of modules of the robots')
+    arg_parser.add_argument('--simulator-cmd', default=None, type=str,
+                            help='simulator to measure, the stand-in simulator by default')
+    arg_parser.add_argument('--world', default=os.path.join('worlds', 'plane.world'), type=str,
+                            help='world loaded by the simulator')
+    arg_parser.add_argument('--real-time-factor', default=0.0, type=float,
+                            help='simulated seconds per real second of the stand-in, 0 for as fast as possible')
+    arg_parser.add_argument('--port-start', default=11445, type=int, help='port of the first simulator')
+    args = arg_parser.parse_args()
+
+    # every evaluation is logged
+    logging.disable(logging.INFO)
+    asyncio.get_event_loop().run_until_complete(run(args))
+
+
+if __name__ == '__main__':
+    main()
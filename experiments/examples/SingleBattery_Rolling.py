@@ -59,14 +59,12 @@ async def run():
 
     while status is 'alive':
         status = 'dead' if robot_manager.dead else 'alive'
-        if robot_manager._orientations:
-            orientation_roll = 0
-            orientation_pitch = 0
-            steps = len(robot_manager._orientations)
-            for i in robot_manager._orientations:
-                #radians to degree -> X*180/pi
-                orientation_roll = orientation_roll + (abs(i[0])*(180/math.pi))
-                orientation_pitch = orientation_pitch + (abs(i[1])*(180/math.pi))
+        poses = robot_manager._poses.array()
+        if len(poses) > 0:
+            steps = len(poses)
+            #radians to degree -> X*180/pi
+            orientation_roll = np.abs(poses['roll']).sum()*(180/math.pi)
+            orientation_pitch = np.abs(poses['pitch']).sum()*(180/math.pi)
             print(f"The final roll is {orientation_roll/(steps *180)} and "
                   f"The final pitch is {orientation_pitch/(steps*180)}")
         print(f"Robot is {status}")
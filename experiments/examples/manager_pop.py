@@ -3,6 +3,7 @@ import asyncio
 
 from pyrevolve import parser
 from pyrevolve.evolution import fitness
+from pyrevolve.evolution.evaluation_cache import EvaluationCache
 from pyrevolve.evolution.selection import multiple_selection, tournament_selection
 from pyrevolve.evolution.population import Population, PopulationConfig
 from pyrevolve.evolution.pop_management.steady_state import steady_state_population_management
@@ -14,6 +15,7 @@ from pyrevolve.genotype.plasticoding.mutation.mutation import MutationConfig
 from pyrevolve.genotype.plasticoding.mutation.standard_mutation import standard_mutation
 from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
 from pyrevolve.util.supervisor.analyzer_queue import AnalyzerQueue
+from pyrevolve.util.supervisor.distributed import DistributedSimulatorQueue
 from pyrevolve.util.supervisor.simulator_queue import SimulatorQueue
 from pyrevolve.custom_logging.logger import logger
 
@@ -44,6 +46,11 @@ async def run():
 
     # Parse command line / file input arguments
     settings = parser.parse_args()
+    if settings.asynchronous_evolution and settings.recovery_enabled:
+        # the recovery expects the children of every generation to have consecutive ids
+        parser.error('--asynchronous-evolution is not compatible with the recovery, '
+                     'run it with --recovery-enabled False')
+    genotype_conf.development_cache_size = settings.development_cache_size
     experiment_management = ExperimentManagement(settings)
     do_recovery = settings.recovery_enabled and not experiment_management.experiment_is_new()
 
@@ -76,15 +83,25 @@ async def run():
         offspring_size=offspring_size,
         experiment_name=settings.experiment_name,
         experiment_management=experiment_management,
+        development_workers=settings.development_workers,
     )
 
     n_cores = settings.n_cores
 
     settings = parser.parse_args()
-    simulator_queue = SimulatorQueue(n_cores, settings, settings.port_start)
+    evaluation_cache = EvaluationCache(settings.evaluation_cache,
+                                       settings.evaluation_cache_samples,
+                                       experiment_management.evaluation_cache_path)
+    if settings.coordinator is not None:
+        # the simulators are on the workers, only the analyzer is local
+        simulator_queue = DistributedSimulatorQueue(settings, evaluation_cache=evaluation_cache)
+        analyzer_port = settings.port_start
+    else:
+        simulator_queue = SimulatorQueue(n_cores, settings, settings.port_start, evaluation_cache=evaluation_cache)
+        analyzer_port = simulator_queue.port_end
     await simulator_queue.start()
 
-    analyzer_queue = AnalyzerQueue(1, settings, settings.port_start+n_cores)
+    analyzer_queue = AnalyzerQueue(1, settings, analyzer_port)
     await analyzer_queue.start()
 
     population = Population(population_conf, simulator_queue, analyzer_queue, next_robot_id)
@@ -111,9 +128,14 @@ async def run():
         await population.init_pop()
         experiment_management.export_snapshots(population.individuals, gen_num)
 
+    if settings.asynchronous_evolution:
+        gen_num = await population.evolve_asynchronously(num_generations, gen_num)
+
     while gen_num < num_generations-1:
         gen_num += 1
         population = await population.next_gen(gen_num)
         experiment_management.export_snapshots(population.individuals, gen_num)
 
+    population.shutdown()
+
     # output result after completing all generations...
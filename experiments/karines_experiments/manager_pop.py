@@ -3,6 +3,7 @@ import asyncio
 
 from pyrevolve import parser
 from pyrevolve.evolution import fitness
+from pyrevolve.evolution.evaluation_cache import EvaluationCache
 from pyrevolve.evolution.selection import multiple_selection, tournament_selection
 from pyrevolve.evolution.population import Population, PopulationConfig
 from pyrevolve.evolution.pop_management.steady_state import steady_state_population_management
@@ -44,6 +45,7 @@ async def run():
 
     # Parse command line / file input arguments
     settings = parser.parse_args()
+    genotype_conf.development_cache_size = settings.development_cache_size
     experiment_management = ExperimentManagement(settings)
     do_recovery = settings.recovery_enabled and not experiment_management.experiment_is_new()
 
@@ -81,10 +83,14 @@ async def run():
         offspring_size=offspring_size,
         experiment_name=settings.experiment_name,
         experiment_management=experiment_management,
+        development_workers=settings.development_workers,
     )
 
     settings = parser.parse_args()
-    simulator_queue = SimulatorQueue(settings.n_cores, settings, settings.port_start)
+    evaluation_cache = EvaluationCache(settings.evaluation_cache,
+                                       settings.evaluation_cache_samples,
+                                       experiment_management.evaluation_cache_path)
+    simulator_queue = SimulatorQueue(settings.n_cores, settings, settings.port_start, evaluation_cache=evaluation_cache)
     await simulator_queue.start()
 
     population = Population(population_conf, simulator_queue, next_robot_id)
@@ -116,4 +122,6 @@ async def run():
         population = await population.next_gen(gen_num)
         experiment_management.export_snapshots(population.individuals, gen_num)
 
+    population.shutdown()
+
     # output result after completing all generations...
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import asyncio
+import math
 import os
 import sys
 import random
@@ -325,20 +326,24 @@ class Population(object):
         if individual.id == f'robot_{ROBOT_STOP}':
             raise Finish()
 
-    def _is_pos_occupied(self, pos, distance):
+    def _is_pos_occupied(self, pos, distance, reserved=()):
         for robot in self._robots:
             if robot.distance_to(pos) < distance:
                 return True
+        # positions of the robots being inserted
+        for other in reserved:
+            if math.hypot(other.x - pos.x, other.y - pos.y) < distance:
+                return True
         return False
 
     class NoPositionFound(Exception):
         def __str__(self):
             return "NoPositionFound"
 
-    def _free_random_spawn_pos(self, distance=MATE_DISTANCE + 0.1, n_tries=100):
+    def _free_random_spawn_pos(self, distance=MATE_DISTANCE + 0.1, n_tries=100, reserved=()):
         pos = random_spawn_pos()
         i = 1
-        while self._is_pos_occupied(pos, distance):
+        while self._is_pos_occupied(pos, distance, reserved):
             i += 1
             if i > n_tries:
                 raise self.NoPositionFound()
@@ -355,11 +360,11 @@ class Population(object):
             pos = center + (random_uniform_unit_vec() * random.uniform(0,radius))
         return pos
 
-    async def _generate_insert_random_robot(self, _id: int):
+    async def _generate_insert_random_robot(self, _id: int, pos: Vector3):
         # Load a robot from yaml
         genotype = random_initialization(PLASTICODING_CONF, _id)
         individual = OnlineIndividual(genotype)
-        return await self._insert_individual(individual, self._free_random_spawn_pos())
+        return await self._insert_individual(individual, pos)
 
     async def seed_initial_population(self, pause_while_inserting: bool):
         """
@@ -396,14 +401,28 @@ class Population(object):
         Generates new random individual that are inserted in our population if the population size is too little
         """
         while len(self._robots) < population_minimum:
-            self._robot_id_counter += 1
-            self._log.debug(f"Attempting LOW REACHED")
-            try:
-                individual = await self._generate_insert_random_robot(self._robot_id_counter)
-                self._log.info(f"LOW REACHED: inserting new random robot: {individual}")
-                self._robots.append(individual)
-            except (Population.NoPositionFound, asyncio.TimeoutError) as e:
-                self._log.error(f"LOW REACHED failed: {e}")
+            # the missing robots are inserted together, in one round-trip to the simulator
+            insertions = []
+            positions = []
+            while len(self._robots) + len(insertions) < population_minimum:
+                self._robot_id_counter += 1
+                self._log.debug(f"Attempting LOW REACHED")
+                try:
+                    pos = self._free_random_spawn_pos(reserved=positions)
+                except Population.NoPositionFound as e:
+                    self._log.error(f"LOW REACHED failed: {e}")
+                    continue
+                positions.append(pos)
+                insertions.append(self._generate_insert_random_robot(self._robot_id_counter, pos))
+
+            for individual in await asyncio.gather(*insertions, return_exceptions=True):
+                if isinstance(individual, asyncio.TimeoutError):
+                    self._log.error(f"LOW REACHED failed: {individual}")
+                elif isinstance(individual, BaseException):
+                    raise individual
+                else:
+                    self._log.info(f"LOW REACHED: inserting new random robot: {individual}")
+                    self._robots.append(individual)
 
     def adjust_mating_multiplier(self, time):
         if self._recent_children_start_time < 0:
@@ -1,5 +1,7 @@
 """
 Vector, Quaternion and RotationMatrix classes written as
-wrappers over `transformations.py` (see that file for license/origin).
+wrappers over `transformations.py` (see that file for license/origin),
+and arrays of vectors / quaternions for bulk transforms.
 """
-from .classes import Vector3, Quaternion, RotationMatrix
+from .classes import Vector3, Quaternion, RotationMatrix, rpy_from_quaternion
+from .arrays import Vector3Array, QuaternionArray
@@ -0,0 +1,313 @@
+"""
+Arrays of vectors and quaternions, to transform many of them at once
+with numpy instead of looping over `Vector3` / `Quaternion` objects.
+"""
+from __future__ import division
+
+import numpy as np
+
+from .classes import Vector3, Quaternion, _EPS
+
+
+class Vector3Array(object):
+    """
+    N 3D vectors, stored as the rows of a (N, 3) numpy array
+    """
+    __slots__ = ('data',)
+
+    # numpy operators defer to the ones of the array of vectors
+    __array_ufunc__ = None
+
+    def __init__(self, data=()):
+        """
+        :param data: (N, 3) array, or sequence of vectors
+        """
+        self.data = np.array(data, dtype=np.float64).reshape(-1, 3)
+
+    @staticmethod
+    def from_vectors(vectors):
+        """
+        :param vectors: iterable of Vector3
+        :rtype: Vector3Array
+        """
+        return Vector3Array([(v.x, v.y, v.z) for v in vectors])
+
+    def __repr__(self):
+        return 'Vector3Array({})'.format(self.data.tolist())
+
+    def __len__(self):
+        return len(self.data)
+
+    def __array__(self, dtype=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __getitem__(self, item):
+        """
+        :param item: index, or slice / mask / indices
+        :return: the Vector3 at the index, or the selected vectors
+        :rtype: Vector3|Vector3Array
+        """
+        if isinstance(item, (int, np.integer)):
+            return Vector3(*self.data[item])
+        return Vector3Array(self.data[item])
+
+    def __iter__(self):
+        return (Vector3(x, y, z) for x, y, z in self.data.tolist())
+
+    @property
+    def x(self):
+        return self.data[:, 0]
+
+    @property
+    def y(self):
+        return self.data[:, 1]
+
+    @property
+    def z(self):
+        return self.data[:, 2]
+
+    @staticmethod
+    def _operand(other):
+        """
+        :param other: Vector3Array, Vector3 or array broadcastable to (N, 3)
+        :rtype: numpy.ndarray
+        """
+        if isinstance(other, Vector3Array):
+            return other.data
+        if isinstance(other, Vector3):
+            return np.array((other.x, other.y, other.z))
+        return np.asarray(other, dtype=np.float64)
+
+    def __add__(self, other):
+        return Vector3Array(self.data + self._operand(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Vector3Array(self.data - self._operand(other))
+
+    def __rsub__(self, other):
+        return Vector3Array(self._operand(other) - self.data)
+
+    def __neg__(self):
+        return Vector3Array(-self.data)
+
+    def __mul__(self, factor):
+        """
+        :param factor: number, or one number per vector
+        :rtype: Vector3Array
+        """
+        factor = np.asarray(factor, dtype=np.float64)
+        if factor.ndim == 1:
+            factor = factor[:, np.newaxis]
+        return Vector3Array(self.data * factor)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, factor):
+        factor = np.asarray(factor, dtype=np.float64)
+        return self.__mul__(1.0 / factor)
+
+    def norm(self):
+        """
+        :return: norm of every vector
+        :rtype: numpy.ndarray
+        """
+        return np.sqrt(np.einsum('ij,ij->i', self.data, self.data))
+
+    magnitude = norm
+
+    def normalized(self):
+        """
+        :rtype: Vector3Array
+        """
+        return Vector3Array(self.data / self.norm()[:, np.newaxis])
+
+    def dot(self, other):
+        """
+        :param other: Vector3Array or Vector3
+        :return: dot product of every vector
+        :rtype: numpy.ndarray
+        """
+        return np.einsum('ij,ij->i', self.data, np.broadcast_to(self._operand(other), self.data.shape))
+
+    def cross(self, other):
+        """
+        :param other: Vector3Array or Vector3
+        :rtype: Vector3Array
+        """
+        return Vector3Array(np.cross(self.data, self._operand(other)))
+
+    def sum(self, weights=None):
+        """
+        :param weights: optional weight of every vector
+        :return: (weighted) sum of the vectors
+        :rtype: Vector3
+        """
+        if weights is None:
+            return Vector3(*self.data.sum(axis=0))
+        return Vector3(*np.dot(np.asarray(weights, dtype=np.float64), self.data))
+
+
+class QuaternionArray(object):
+    """
+    N quaternions, stored as the (w, x, y, z) rows of a (N, 4) numpy array
+    """
+    __slots__ = ('data',)
+
+    # numpy operators defer to the ones of the array of quaternions
+    __array_ufunc__ = None
+
+    def __init__(self, data=()):
+        """
+        :param data: (N, 4) array, or sequence of quaternions
+        """
+        self.data = np.array(data, dtype=np.float64).reshape(-1, 4)
+
+    @staticmethod
+    def from_quaternions(quaternions):
+        """
+        :param quaternions: iterable of Quaternion
+        :rtype: QuaternionArray
+        """
+        return QuaternionArray([(q.w, q.x, q.y, q.z) for q in quaternions])
+
+    @staticmethod
+    def from_rpy(roll, pitch, yaw):
+        """
+        Creates the quaternions from arrays of Gazebo roll, pitch, yaw values,
+        as `Quaternion.from_rpy`.
+        :rtype: QuaternionArray
+        """
+        half = np.asarray((roll, pitch, yaw), dtype=np.float64) / 2.0
+        (ci, cj, ck), (si, sj, sk) = np.cos(half), np.sin(half)
+        cc, cs = ci * ck, ci * sk
+        sc, ss = si * ck, si * sk
+        return QuaternionArray(np.stack((cj * cc + sj * ss,
+                                         cj * sc - sj * cs,
+                                         cj * ss + sj * cc,
+                                         cj * cs - sj * sc), axis=-1))
+
+    @staticmethod
+    def from_angle_axis(angles, axes):
+        """
+        :param angles: array of angles
+        :param axes: Vector3Array, or axis shared by all the rotations
+        :rtype: QuaternionArray
+        """
+        angles = np.asarray(angles, dtype=np.float64).reshape(-1)
+        axes = np.broadcast_to(Vector3Array._operand(axes), (len(angles), 3))
+        lengths = np.sqrt(np.einsum('ij,ij->i', axes, axes))
+        scales = np.where(lengths > _EPS, np.sin(angles / 2.0) / np.where(lengths > _EPS, lengths, 1.0), 1.0)
+        return QuaternionArray(np.column_stack((np.cos(angles / 2.0), axes * scales[:, np.newaxis])))
+
+    def __repr__(self):
+        return 'QuaternionArray({})'.format(self.data.tolist())
+
+    def __len__(self):
+        return len(self.data)
+
+    def __array__(self, dtype=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __getitem__(self, item):
+        """
+        :param item: index, or slice / mask / indices
+        :return: the Quaternion at the index, or the selected quaternions
+        :rtype: Quaternion|QuaternionArray
+        """
+        if isinstance(item, (int, np.integer)):
+            return Quaternion(*self.data[item])
+        return QuaternionArray(self.data[item])
+
+    def __iter__(self):
+        return (Quaternion(w, x, y, z) for w, x, y, z in self.data.tolist())
+
+    @property
+    def w(self):
+        return self.data[:, 0]
+
+    @property
+    def x(self):
+        return self.data[:, 1]
+
+    @property
+    def y(self):
+        return self.data[:, 2]
+
+    @property
+    def z(self):
+        return self.data[:, 3]
+
+    def __mul__(self, other):
+        """
+        Hamilton product with quaternions, or rotation of vectors.
+        :param other: QuaternionArray / Quaternion, or Vector3Array / Vector3
+        :rtype: QuaternionArray|Vector3Array
+        """
+        if isinstance(other, (QuaternionArray, Quaternion)):
+            w0, x0, y0, z0 = np.asarray(other, dtype=np.float64).T
+            w1, x1, y1, z1 = self.data.T
+            return QuaternionArray(np.stack((-x1 * x0 - y1 * y0 - z1 * z0 + w1 * w0,
+                                             x1 * w0 + y1 * z0 - z1 * y0 + w1 * x0,
+                                             -x1 * z0 + y1 * w0 + z1 * x0 + w1 * y0,
+                                             x1 * y0 - y1 * x0 + z1 * w0 + w1 * z0), axis=-1))
+        elif isinstance(other, (Vector3Array, Vector3)):
+            return self.rotate(other)
+        return NotImplemented
+
+    def __rmul__(self, other):
+        if isinstance(other, Quaternion):
+            return QuaternionArray(np.asarray(other)) * self
+        return NotImplemented
+
+    def conjugated(self):
+        """
+        :rtype: QuaternionArray
+        """
+        return QuaternionArray(self.data * (1.0, -1.0, -1.0, -1.0))
+
+    def get_matrices(self):
+        """
+        Rotation matrices of the quaternions, which do not need to be
+        normalized (as `Quaternion.get_matrix()`).
+        :return: (N, 3, 3) array
+        :rtype: numpy.ndarray
+        """
+        w, x, y, z = self.data.T
+        n = w * w + x * x + y * y + z * z
+        s = np.where(n < _EPS, 0.0, 2.0 / np.where(n < _EPS, 1.0, n))
+        matrices = np.empty((len(self.data), 3, 3))
+        matrices[:, 0, 0] = 1.0 - s * (y * y + z * z)
+        matrices[:, 0, 1] = s * (x * y - z * w)
+        matrices[:, 0, 2] = s * (x * z + y * w)
+        matrices[:, 1, 0] = s * (x * y + z * w)
+        matrices[:, 1, 1] = 1.0 - s * (x * x + z * z)
+        matrices[:, 1, 2] = s * (y * z - x * w)
+        matrices[:, 2, 0] = s * (x * z - y * w)
+        matrices[:, 2, 1] = s * (y * z + x * w)
+        matrices[:, 2, 2] = 1.0 - s * (x * x + y * y)
+        return matrices
+
+    def rotate(self, vectors):
+        """
+        Rotates every vector by the corresponding quaternion.
+        :param vectors: Vector3Array, or vector rotated by all the quaternions
+        :rtype: Vector3Array
+        """
+        vectors = np.broadcast_to(Vector3Array._operand(vectors), (len(self.data), 3))
+        return Vector3Array(np.einsum('nij,nj->ni', self.get_matrices(), vectors))
+
+    def get_rpy(self):
+        """
+        Roll / pitch / yaw of the quaternions, as `Quaternion.get_rpy()`.
+        :return: (N, 3) array
+        :rtype: numpy.ndarray
+        """
+        m = self.get_matrices()
+        cy = np.hypot(m[:, 0, 0], m[:, 1, 0])
+        regular = cy > _EPS
+        roll = np.where(regular, np.arctan2(m[:, 2, 1], m[:, 2, 2]), np.arctan2(-m[:, 1, 2], m[:, 1, 1]))
+        pitch = np.arctan2(-m[:, 2, 0], cy)
+        yaw = np.where(regular, np.arctan2(m[:, 1, 0], m[:, 0, 0]), 0.0)
+        return np.column_stack((roll, pitch, yaw))
@@ -1,15 +1,11 @@
 from __future__ import division
 
+import math
+
 import numpy as np
 
-from .transformations import quaternion_multiply
 from .transformations import quaternion_matrix
 from .transformations import quaternion_from_matrix
-from .transformations import euler_from_quaternion
-from .transformations import quaternion_about_axis
-from .transformations import quaternion_conjugate
-from .transformations import quaternion_inverse
-from .transformations import quaternion_from_euler
 
 # Epsilon value used for zero comparisons
 EPSILON = 1e-5
@@ -17,113 +13,135 @@ OPPOSITE = -1
 PARALLEL = 1
 NOT_PARALLEL = 0
 
+# Epsilon of the quaternion computations, as in `transformations.py`
+_EPS = np.finfo(float).eps * 40.0
+
+
+def rpy_from_quaternion(w, x, y, z):
+    """
+    Roll / pitch / yaw of a quaternion, as `euler_from_quaternion(q, 'sxyz')`
+    of `transformations.py` but without building its rotation matrix.
+    :return: (roll, pitch, yaw)
+    """
+    n = w * w + x * x + y * y + z * z
+    if n < _EPS:
+        return 0.0, 0.0, 0.0
+    s = 2.0 / n
+    m00 = 1.0 - s * (y * y + z * z)
+    m10 = s * (x * y + w * z)
+    m20 = s * (x * z - w * y)
+    m21 = s * (y * z + w * x)
+    m22 = 1.0 - s * (x * x + y * y)
+    cy = math.sqrt(m00 * m00 + m10 * m10)
+    if cy > _EPS:
+        return math.atan2(m21, m22), math.atan2(-m20, cy), math.atan2(m10, m00)
+    m11 = 1.0 - s * (x * x + z * z)
+    m12 = s * (y * z - w * x)
+    return math.atan2(-m12, m11), math.atan2(-m20, cy), 0.0
+
 
 class VectorBase(object):
     """
-    Base class with shared functionality for Quaternion / Vector3
+    Base class with shared functionality for Quaternion / Vector3.
+
+    The components are plain float attributes listed in the `__slots__` of
+    the subclasses, so that reading or writing `.x` is an attribute access
+    and creating a vector does not allocate a numpy array. Use `data` or
+    `numpy.array(vector)` to get the components as an array.
     """
+    __slots__ = ()
+
     LENGTH = 0
     """ Required length of the vector """
 
     ATTRS = ''
-    """ Indexed attributes to be retrieved by __getattr__ """
+    """ Names of the indexed attributes """
 
-    def __init__(self, *args):
-        """
+    # numpy operators defer to the ones of the vector,
+    # e.g. `numpy.float64 * Vector3` is a Vector3
+    __array_ufunc__ = None
 
-        :param args:
-        :return:
+    def _set_components(self, values):
         """
-        if len(args) == 1 and hasattr(args[0], '__iter__'):
-            self.data = np.array(args[0], dtype=np.float_, copy=True)
-        else:
-            self.data = np.array(args, dtype=np.float_, copy=True)
-
-        if len(self.data) != self.LENGTH:
+        :param values: iterable with the `LENGTH` components
+        """
+        values = tuple(values)
+        if len(values) != self.LENGTH:
             raise AssertionError("Invalid data size {}, expecting {}".format(
-                    len(self.data),
+                    len(values),
                     self.LENGTH))
+        for attr, value in zip(self.ATTRS, values):
+            object.__setattr__(self, attr, float(value))
 
     def __copy__(self):
         """
         Creates a copy of the vector class
         :return:
         """
-        return self.__class__(self.data)
+        return self.__class__(*self)
 
     copy = __copy__
 
-    def __getitem__(self, item):
-        """
-        :param item:
-        :return:
-        """
-        return self.data[item]
+    def __reduce__(self):
+        return self.__class__, tuple(self)
 
-    def __setitem__(self, key, value):
+    @property
+    def data(self):
         """
-        :param key:
-        :type key: int
-        :param value:
-        :type value: float
-        :return:
+        :return: copy of the components
+        :rtype: numpy.ndarray
         """
-        self.data[key] = value
+        return np.array(tuple(self), dtype=np.float64)
 
-    def __getattr__(self, item):
-        """
+    @data.setter
+    def data(self, values):
+        self._set_components(values)
 
+    def __array__(self, dtype=None):
+        return np.array(tuple(self), dtype=np.float64 if dtype is None else dtype)
+
+    def __getitem__(self, item):
+        """
         :param item:
         :return:
         """
-        try:
-            idx = self.ATTRS.index(item)
-        except:
-            raise AttributeError("Unknown attribute `{}`".format(item))
-
-        return self.data[idx]
+        return tuple(self)[item]
 
-    def __setattr__(self, key, value):
+    def __setitem__(self, key, value):
         """
-
         :param key:
+        :type key: int
         :param value:
+        :type value: float
         :return:
         """
-        try:
-            idx = self.ATTRS.index(key)
-            self.data[idx] = value
-            return value
-        except ValueError:
-            # Ignore error, just pass on to parent
-            pass
-        return super(VectorBase, self).__setattr__(key, value)
+        setattr(self, self.ATTRS[key], float(value))
 
     def __iter__(self):
         """
         """
-        return iter(self.data)
+        return (getattr(self, attr) for attr in self.ATTRS)
 
     def __len__(self):
         """
         :return: The length of this vector type
         :rtype: int
         """
-        return len(self.data)
+        return self.LENGTH
 
     def __abs__(self):
         """
         :return: Norm of this vector
         :rtype: float
         """
-        return np.linalg.norm(self.data)
+        return math.sqrt(sum(value * value for value in self))
 
     def __neg__(self):
         """
         Return negative vector.
         :return:
         """
-        return Vector3(-self.data)
+        return self.__class__(*(-value for value in self))
 
     norm = __abs__
     magnitude = __abs__
@@ -132,22 +150,25 @@ class VectorBase(object):
         """
         Normalizes this object
         """
-        self.data /= self.norm()
+        norm = self.norm()
+        self._set_components(value / norm for value in self)
 
     def normalized(self):
         """
         :return: Normalized version of this vector
         """
-        return Vector3(self.data / self.norm())
+        norm = self.norm()
+        return self.__class__(*(value / norm for value in self))
 
 
 class Vector3(VectorBase):
     """
-    Defines an abstract vector data type as a wrapper
-    over a numpy array.
+    Defines a 3D vector with the components as float attributes.
     """
+    __slots__ = ('x', 'y', 'z')
+
     LENGTH = 3
-    ATTRS = 'xyz'
+    ATTRS = ('x', 'y', 'z')
 
     def __init__(self, x=0, y=0, z=0):
         """
@@ -160,15 +181,65 @@ class Vector3(VectorBase):
         :return:
         """
         if hasattr(x, '__iter__'):
-            super(Vector3, self).__init__(x)
+            self._set_components(x)
         else:
-            super(Vector3, self).__init__(x, y, z)
+            self.x = float(x)
+            self.y = float(y)
+            self.z = float(z)
 
     def __repr__(self):
         """
         :return:
         """
-        return 'Vector3(%e, %e, %e)' % tuple(self)
+        return 'Vector3(%e, %e, %e)' % (self.x, self.y, self.z)
+
+    def __iter__(self):
+        """
+        """
+        return iter((self.x, self.y, self.z))
+
+    def __getitem__(self, item):
+        """
+        :param item:
+        :return:
+        """
+        return (self.x, self.y, self.z)[item]
+
+    def __abs__(self):
+        """
+        :return: Norm of this vector
+        :rtype: float
+        """
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    norm = __abs__
+    magnitude = __abs__
+
+    def __neg__(self):
+        """
+        Return negative vector.
+        :return:
+        """
+        return Vector3(-self.x, -self.y, -self.z)
+
+    def normalized(self):
+        """
+        :return: Normalized version of this vector
+        """
+        norm = self.norm()
+        return Vector3(self.x / norm, self.y / norm, self.z / norm)
+
+    @staticmethod
+    def _components(other):
+        """
+        :param other: Vector3 or sequence of 3 values
+        :return: (x, y, z)
+        """
+        if isinstance(other, Vector3):
+            return other.x, other.y, other.z
+        if len(other) != 3:
+            raise AssertionError("Cannot add different length vectors.")
+        return other[0], other[1], other[2]
 
     def __add__(self, other):
         """
@@ -176,40 +247,46 @@ class Vector3(VectorBase):
         :param other:
         :return:
         """
-        if len(self) != len(other):
-            raise AssertionError("Cannot add different length vectors.")
-        return Vector3([x + y for x, y in zip(self, other)])
+        x, y, z = self._components(other)
+        return Vector3(self.x + x, self.y + y, self.z + z)
 
     def __sub__(self, other):
         """
         :param other:
         :return:
         """
-        return Vector3([x - y for x, y in zip(self, other)])
+        x, y, z = self._components(other)
+        return Vector3(self.x - x, self.y - y, self.z - z)
+
+    def __rsub__(self, other):
+        """
+        :param other:
+        :return:
+        """
+        x, y, z = self._components(other)
+        return Vector3(x - self.x, y - self.y, z - self.z)
 
     __radd__ = __add__
-    __rsub__ = __sub__
 
     def __iadd__(self, other):
         """
         :param other:
         """
-        if len(self) != len(other):
-            raise AssertionError("Cannot add different length vectors.")
-        self[0] += other[0]
-        self[1] += other[1]
-        self[2] += other[2]
+        x, y, z = self._components(other)
+        self.x += x
+        self.y += y
+        self.z += z
         return self
 
     def __isub__(self, other):
         """
         :param other:
         """
-        if len(self) != len(other):
-            raise AssertionError("Cannot add different length vectors.")
-        self[0] -= other[0]
-        self[1] -= other[1]
-        self[2] -= other[2]
+        x, y, z = self._components(other)
+        self.x -= x
+        self.y -= y
+        self.z -= z
+        return self
 
     def __mul__(self, number):
         """
@@ -217,7 +294,7 @@ class Vector3(VectorBase):
         :type number: float
         :return:
         """
-        return Vector3(self[0] * number, self[1] * number, self[2] * number)
+        return Vector3(self.x * number, self.y * number, self.z * number)
 
     def __imul__(self, number):
         """
@@ -225,12 +302,12 @@ class Vector3(VectorBase):
         :type number: float
         :return:
         """
-        self[0] *= number
-        self[1] *= number
-        self[2] *= number
+        self.x *= number
+        self.y *= number
+        self.z *= number
         return self
 
-    def __div__(self, number):
+    def __truediv__(self, number):
         """
         :param number:
         :type number: float
@@ -238,7 +315,7 @@ class Vector3(VectorBase):
         """
         return self.__mul__(1.0 / number)
 
-    def __idiv__(self, number):
+    def __itruediv__(self, number):
         """
         :param number:
         :type number: float
@@ -247,7 +324,6 @@ class Vector3(VectorBase):
         return self.__imul__(1.0 / number)
 
     __rmul__ = __mul__
-    __truediv__ = __div__
 
     def cross(self, v1):
         """
@@ -258,7 +334,9 @@ class Vector3(VectorBase):
         :return:
         :rtype: Vector3
         """
-        return Vector3(np.cross(self.data, v1.data))
+        return Vector3(self.y * v1.z - self.z * v1.y,
+                       self.z * v1.x - self.x * v1.z,
+                       self.x * v1.y - self.y * v1.x)
 
     def dot(self, v1):
         """
@@ -266,7 +344,7 @@ class Vector3(VectorBase):
         :type v1: Vector3
         :return:
         """
-        return np.dot(self.data, v1.data)
+        return self.x * v1.x + self.y * v1.y + self.z * v1.z
 
     def parallelism(self, other):
         """
@@ -314,8 +392,10 @@ class Quaternion(VectorBase):
     """
     Quaternion convenience class
     """
+    __slots__ = ('w', 'x', 'y', 'z')
+
     LENGTH = 4
-    ATTRS = 'wxyz'
+    ATTRS = ('w', 'x', 'y', 'z')
 
     def __init__(self, w=1, x=0, y=0, z=0):
         """
@@ -326,15 +406,62 @@ class Quaternion(VectorBase):
         :return:
         """
         if hasattr(w, '__iter__'):
-            super(Quaternion, self).__init__(w)
+            self._set_components(w)
         else:
-            super(Quaternion, self).__init__(w, x, y, z)
+            self.w = float(w)
+            self.x = float(x)
+            self.y = float(y)
+            self.z = float(z)
 
     def __repr__(self):
         """
         :return:
         """
-        return 'Quaternion(real=%e, imag=<%e, %e, %e>)' % tuple(self)
+        return 'Quaternion(real=%e, imag=<%e, %e, %e>)' % (self.w, self.x, self.y, self.z)
+
+    def __iter__(self):
+        """
+        """
+        return iter((self.w, self.x, self.y, self.z))
+
+    def __getitem__(self, item):
+        """
+        :param item:
+        :return:
+        """
+        return (self.w, self.x, self.y, self.z)[item]
+
+    def _product(self, other):
+        """
+        :return: components of the Hamilton product `self * other`
+        """
+        w1, x1, y1, z1 = self.w, self.x, self.y, self.z
+        w0, x0, y0, z0 = other.w, other.x, other.y, other.z
+        return (-x1 * x0 - y1 * y0 - z1 * z0 + w1 * w0,
+                x1 * w0 + y1 * z0 - z1 * y0 + w1 * x0,
+                -x1 * z0 + y1 * w0 + z1 * x0 + w1 * y0,
+                x1 * y0 - y1 * x0 + z1 * w0 + w1 * z0)
+
+    def rotate(self, vector):
+        """
+        Rotates a vector by this quaternion, which does not need to be
+        normalized (as `get_matrix() * vector`).
+        :param vector:
+        :type vector: Vector3
+        :return:
+        :rtype: Vector3
+        """
+        w, x, y, z = self.w, self.x, self.y, self.z
+        n = w * w + x * x + y * y + z * z
+        if n < _EPS:
+            return Vector3(vector.x, vector.y, vector.z)
+        s = 2.0 / n
+        vx, vy, vz = vector.x, vector.y, vector.z
+        return Vector3(
+            (1.0 - s * (y * y + z * z)) * vx + s * (x * y - z * w) * vy + s * (x * z + y * w) * vz,
+            s * (x * y + z * w) * vx + (1.0 - s * (x * x + z * z)) * vy + s * (y * z - x * w) * vz,
+            s * (x * z - y * w) * vx + s * (y * z + x * w) * vy + (1.0 - s * (x * x + y * y)) * vz,
+        )
 
     def __mul__(self, other):
         """
@@ -343,11 +470,10 @@ class Quaternion(VectorBase):
         :return:
         """
         if isinstance(other, Quaternion):
-            return Quaternion(quaternion_multiply(self, other))
+            return Quaternion(*self._product(other))
         elif isinstance(other, Vector3):
-            # Get homogeneous rotation matrix and turn vector into
-            # homogeneous vector.
-            return self.get_matrix() * other
+            return self.rotate(other)
+        return NotImplemented
 
     def __imul__(self, other):
         """
@@ -357,7 +483,8 @@ class Quaternion(VectorBase):
         """
         if not isinstance(other, Quaternion):
             raise AssertionError("Vector is not an instance of Quaternion")
-        self.data[:] = quaternion_multiply(self, other)
+        self.w, self.x, self.y, self.z = self._product(other)
+        return self
 
     def get_matrix(self):
         """
@@ -365,27 +492,28 @@ class Quaternion(VectorBase):
         :return:
         :rtype: RotationMatrix
         """
-        return RotationMatrix(quaternion_matrix(self))
+        return RotationMatrix(quaternion_matrix(tuple(self)))
 
     def get_rpy(self):
         """
         Returns roll / pitch / yaw corresponding to this Quaternion
         """
-        return euler_from_quaternion(self.data[:], 'sxyz')
+        return rpy_from_quaternion(self.w, self.x, self.y, self.z)
 
     def conjugated(self):
         """
         :return:
         :rtype: Quaternion
         """
-        return Quaternion(quaternion_conjugate(self))
+        return Quaternion(self.w, -self.x, -self.y, -self.z)
 
     def inversed(self):
         """
         :return:
         :rtype: Quaternion
         """
-        return Quaternion(quaternion_inverse(self))
+        n = self.w * self.w + self.x * self.x + self.y * self.y + self.z * self.z
+        return Quaternion(self.w / n, -self.x / n, -self.y / n, -self.z / n)
 
     @staticmethod
     def from_angle_axis(angle, axis):
@@ -397,7 +525,12 @@ class Quaternion(VectorBase):
         :return:
         :rtype: Quaternion
         """
-        return Quaternion(quaternion_about_axis(angle, axis))
+        x, y, z = axis[0], axis[1], axis[2]
+        length = math.sqrt(x * x + y * y + z * z)
+        if length > _EPS:
+            scale = math.sin(angle / 2.0) / length
+            x, y, z = x * scale, y * scale, z * scale
+        return Quaternion(math.cos(angle / 2.0), x, y, z)
 
     @staticmethod
     def from_rpy(roll, pitch, yaw):
@@ -411,7 +544,15 @@ class Quaternion(VectorBase):
         :type yaw: float
         :return:
         """
-        return Quaternion(quaternion_from_euler(roll, pitch, yaw, 'sxyz'))
+        ci, si = math.cos(roll / 2.0), math.sin(roll / 2.0)
+        cj, sj = math.cos(pitch / 2.0), math.sin(pitch / 2.0)
+        ck, sk = math.cos(yaw / 2.0), math.sin(yaw / 2.0)
+        cc, cs = ci * ck, ci * sk
+        sc, ss = si * ck, si * sk
+        return Quaternion(cj * cc + sj * ss,
+                          cj * sc - sj * cs,
+                          cj * ss + sj * cc,
+                          cj * cs - sj * sc)
 
 
 class RotationMatrix(object):
@@ -0,0 +1,99 @@
+from __future__ import absolute_import
+
+from pygazebo.msg.contacts_pb2 import Contacts
+
+from .wire_format import decode_time, field_tags, read_varint, skip_field
+
+
+class ContactsAggregator(object):
+    """
+    Counts the contact points of every contact (pair of collisions) of the
+    robots in the serialized `Contacts` messages of the physics steps, in one
+    pass over their wire format and without building the message objects. The
+    robot of a contact is the model of its first collision, the mapping from
+    the collision names to the robot names is cached.
+    """
+
+    MAX_CACHED_COLLISIONS = 10000
+    """ The collision names are forgotten beyond this number, the robots change over the evolution """
+
+    def __init__(self):
+        contacts = Contacts.DESCRIPTOR
+        contact = contacts.fields_by_name['contact'].message_type
+        time = contacts.fields_by_name['time'].message_type
+
+        self._contact_tag, self._time_tag = field_tags(contacts, 'contact', 'time')
+        self._time_fields = field_tags(time, 'sec', 'nsec')
+        self._collision_tag, self._position_tag = field_tags(contact, 'collision1', 'position')
+        # name of the model of every collision seen, as bytes
+        self._models = {}
+
+    def _model(self, collision):
+        """
+        :param collision: scoped name of a collision, as bytes
+        :return: name of its model, as bytes
+        """
+        model = self._models.get(collision)
+        if model is None:
+            if len(self._models) >= self.MAX_CACHED_COLLISIONS:
+                self._models.clear()
+            model = self._models[collision] = collision.split(b'::', 1)[0]
+        return model
+
+    def time(self, data):
+        """
+        :param data: serialized Contacts message
+        :return: (sec, nsec) of the physics step, read without decoding the contacts
+        """
+        pos = 0
+        end = len(data)
+        while pos < end:
+            tag, pos = read_varint(data, pos)
+            if tag == self._time_tag:
+                length, pos = read_varint(data, pos)
+                return decode_time(data, pos, pos + length, self._time_fields)
+            pos = skip_field(data, pos, tag & 0x7)
+        return 0, 0
+
+    def aggregate(self, data, index):
+        """
+        :param data: serialized Contacts message
+        :param index: dict from the names of the robots of interest, encoded
+        as bytes, to the objects used as keys of the result
+        :type index: dict[bytes, object]
+        :return: number of contact points of every contact, in the order of the
+        message, of the robots of the index that have contacts in the message
+        :rtype: dict[object, list[int]]
+        """
+        counts = {}
+        pos = 0
+        end = len(data)
+        while pos < end:
+            tag, pos = read_varint(data, pos)
+            if tag == self._contact_tag:
+                length, pos = read_varint(data, pos)
+                self._count_contact(data, pos, pos + length, index, counts)
+                pos += length
+            else:
+                pos = skip_field(data, pos, tag & 0x7)
+        return counts
+
+    def _count_contact(self, data, pos, end, index, counts):
+        robot = None
+        points = 0
+        while pos < end:
+            tag, pos = read_varint(data, pos)
+            if tag == self._collision_tag:
+                length, pos = read_varint(data, pos)
+                robot = index.get(self._model(data[pos:pos + length]))
+                if robot is None:
+                    return
+                pos += length
+            elif tag == self._position_tag:
+                points += 1
+                length, pos = read_varint(data, pos)
+                pos += length
+            else:
+                pos = skip_field(data, pos, tag & 0x7)
+        if robot is not None:
+            counts.setdefault(robot, []).append(points)
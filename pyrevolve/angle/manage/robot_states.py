@@ -0,0 +1,148 @@
+from __future__ import absolute_import
+
+import struct
+
+from pyrevolve.spec.msgs import RobotStates
+from .wire_format import DOUBLE, FIXED64, decode_time, field_tags, read_varint, skip_field
+
+# all the fields of a Vector3d / Quaternion, each a one byte tag and a double
+_DOUBLES = {n: struct.Struct('<' + 'xd' * n) for n in (3, 4)}
+
+
+class RobotStatesDecoder(object):
+    """
+    Decodes serialized `RobotStates` messages straight from the protobuf wire
+    format, without building the message objects: the states of the robots
+    that are not in the index are skipped without being decoded, and the
+    poses of the others are read as plain floats.
+    """
+
+    def __init__(self):
+        states = RobotStates.DESCRIPTOR
+        state = states.fields_by_name['robot_state'].message_type
+        pose = state.fields_by_name['pose'].message_type
+        time = states.fields_by_name['time'].message_type
+        position = pose.fields_by_name['position'].message_type
+        orientation = pose.fields_by_name['orientation'].message_type
+
+        self._time_tag, self._state_tag = field_tags(states, 'time', 'robot_state')
+        self._time_fields = field_tags(time, 'sec', 'nsec')
+        self._name_tag, self._pose_tag, self._dead_tag = field_tags(state, 'name', 'pose', 'dead')
+        self._position_tag, self._orientation_tag = field_tags(pose, 'position', 'orientation')
+        # index in (x, y, z, qw, qx, qy, qz) of the fields of the position and orientation
+        self._position_fields = dict(zip(field_tags(position, 'x', 'y', 'z'), range(3)))
+        self._orientation_fields = dict(zip(field_tags(orientation, 'w', 'x', 'y', 'z'), range(3, 7)))
+        # tags in field order, a submessage with exactly these fields is decoded at once
+        self._position_layout = self._layout(position, 'x', 'y', 'z')
+        self._orientation_layout = self._layout(orientation, 'w', 'x', 'y', 'z')
+        self._default_pose = [field.default_value for field in (
+            position.fields_by_name['x'], position.fields_by_name['y'], position.fields_by_name['z'],
+            orientation.fields_by_name['w'], orientation.fields_by_name['x'],
+            orientation.fields_by_name['y'], orientation.fields_by_name['z'],
+        )]
+
+    @staticmethod
+    def _layout(message_type, *names):
+        """
+        :return: (tags of the fields sorted by number, index of the values of `names` in that order)
+        """
+        numbers = sorted(message_type.fields_by_name[name].number for name in names)
+        tags = tuple(number << 3 | FIXED64 for number in numbers)
+        order = [numbers.index(message_type.fields_by_name[name].number) for name in names]
+        return tags, order
+
+    def decode(self, data, index):
+        """
+        :param data: serialized RobotStates message
+        :param index: dict from the names of the robots of interest, encoded
+        as bytes, to the objects returned with their states
+        :type index: dict[bytes, object]
+        :return: (sec, nsec, states) where states lists the robots of the index
+        in the message as (index value, x, y, z, qw, qx, qy, qz, dead)
+        """
+        sec = nsec = 0
+        states = []
+        pos = 0
+        end = len(data)
+        while pos < end:
+            tag, pos = read_varint(data, pos)
+            if tag == self._state_tag:
+                length, pos = read_varint(data, pos)
+                state = self._decode_state(data, pos, pos + length, index)
+                if state is not None:
+                    states.append(state)
+                pos += length
+            elif tag == self._time_tag:
+                length, pos = read_varint(data, pos)
+                sec, nsec = decode_time(data, pos, pos + length, self._time_fields)
+                pos += length
+            else:
+                pos = skip_field(data, pos, tag & 0x7)
+        return sec, nsec, states
+
+    def _decode_state(self, data, pos, end, index):
+        """
+        :return: state of the robot, None if it is not in the index
+        """
+        value = None
+        pose = None
+        dead = False
+        while pos < end:
+            tag, pos = read_varint(data, pos)
+            if tag == self._name_tag:
+                length, pos = read_varint(data, pos)
+                value = index.get(data[pos:pos + length])
+                if value is None:
+                    return None
+                pos += length
+            elif tag == self._pose_tag:
+                length, pos = read_varint(data, pos)
+                # the pose is decoded once the robot is known to be in the index
+                pose = (pos, pos + length)
+                pos += length
+            elif tag == self._dead_tag:
+                dead, pos = read_varint(data, pos)
+                dead = bool(dead)
+            else:
+                pos = skip_field(data, pos, tag & 0x7)
+        if value is None:
+            return None
+        values = list(self._default_pose)
+        if pose is not None:
+            self._decode_pose(data, pose[0], pose[1], values)
+        return (value, *values, dead)
+
+    def _decode_pose(self, data, pos, end, values):
+        while pos < end:
+            tag, pos = read_varint(data, pos)
+            if tag == self._position_tag:
+                length, pos = read_varint(data, pos)
+                self._decode_doubles(data, pos, pos + length, self._position_fields, self._position_layout, 0,
+                                     values)
+                pos += length
+            elif tag == self._orientation_tag:
+                length, pos = read_varint(data, pos)
+                self._decode_doubles(data, pos, pos + length, self._orientation_fields, self._orientation_layout, 3,
+                                     values)
+                pos += length
+            else:
+                pos = skip_field(data, pos, tag & 0x7)
+
+    @staticmethod
+    def _decode_doubles(data, pos, end, fields, layout, offset, values):
+        tags, order = layout
+        n = len(tags)
+        if end - pos == 9 * n and all(data[pos + 9 * i] == tag for i, tag in enumerate(tags)):
+            # the usual case: every field once, in order
+            doubles = _DOUBLES[n].unpack_from(data, pos)
+            for i, j in enumerate(order):
+                values[offset + i] = doubles[j]
+            return
+        while pos < end:
+            tag, pos = read_varint(data, pos)
+            i = fields.get(tag)
+            if i is not None:
+                values[i] = DOUBLE.unpack_from(data, pos)[0]
+                pos += 8
+            else:
+                pos = skip_field(data, pos, tag & 0x7)
@@ -1,14 +1,22 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import asyncio
 import numpy as np
-from collections import deque
 
-from pyrevolve.SDF.math import Vector3, Quaternion
+from pyrevolve.SDF.math import Vector3, rpy_from_quaternion
 from pyrevolve.util import Time
+from pyrevolve.util.ring_buffer import RingBuffer
 import math
 import os
 
+# Poses of a robot, the time is `float(Time)` as in the other time computations
+POSE_DTYPE = np.dtype([
+    ('time', np.float64),
+    ('x', np.float64), ('y', np.float64), ('z', np.float64),
+    ('roll', np.float64), ('pitch', np.float64), ('yaw', np.float64),
+])
+
 
 class RobotManager(object):
     """
@@ -35,7 +43,15 @@ class RobotManager(object):
         :type battery_level: float
         :return:
         """
+        self._finished = asyncio.Event()
         self.dead = False
+        # Whether the simulator removed the robot from the world, after reporting it
+        # dead or without it (a robot can reach its `max_age` here first)
+        self.removed = False
+        # Life span of the robot in simulation seconds, set by the world manager
+        self.max_age = None
+        # Time of the first states update of the robot, where its life span starts
+        self._first_state_time = None
         self.warmup_time = warmup_time
         self.speed_window = speed_window
         self.robot = robot
@@ -47,16 +63,15 @@ class RobotManager(object):
         self.last_update = time
         self.last_mate = None
 
-        self._ds = deque(maxlen=speed_window)
-        self._dt = deque(maxlen=speed_window)
-        self._positions = deque(maxlen=speed_window)
-        self._orientations = deque(maxlen=speed_window)
-        self._contacts = deque(maxlen=speed_window)
-        self._seconds = deque(maxlen=speed_window)
-        self._times = deque(maxlen=speed_window)
+        # poses and number of contact points of the last contacts in the speed window
+        self._poses = RingBuffer(speed_window, POSE_DTYPE)
+        self._contacts = RingBuffer(speed_window, np.int64)
+        # whether the world manager counts the contacts of the robot
+        self.contacts_sampled = True
+        # (time, x, y) of the pose before the oldest pose of the window,
+        # where the path covered in the window starts
+        self._origin = None
 
-        self._dist = 0
-        self._time = 0
         self._idx = 0
         self._count = 0
         self.second = 1
@@ -72,6 +87,56 @@ class RobotManager(object):
     def name(self):
         return str(self.robot.id)
 
+    @property
+    def last_position(self):
+        """
+        :rtype: Vector3
+        """
+        if self._last_position is None and self._last_xyz is not None:
+            self._last_position = Vector3(*self._last_xyz)
+        return self._last_position
+
+    @last_position.setter
+    def last_position(self, position):
+        self._last_xyz = None if position is None else (position.x, position.y, position.z)
+        self._last_position = position
+
+    def _set_last_position(self, x, y, z):
+        # the Vector3 is created only if it is needed
+        self._last_xyz = (x, y, z)
+        self._last_position = None
+
+    @property
+    def dead(self):
+        return self._dead
+
+    @dead.setter
+    def dead(self, dead):
+        self._dead = dead
+        if dead:
+            self._finished.set()
+
+    async def wait_until_dead(self):
+        """
+        Coroutine that returns as soon as the robot is marked dead, either
+        because it is not in the simulation anymore or because it reached
+        its `max_age`.
+        """
+        await self._finished.wait()
+
+    def reached_max_age(self):
+        """
+        The life span counts from the first states update of the robot, as the
+        death sentence of the world plugin, which starts at the first robot states
+        message with the robot. The plugin reports the robot dead, and removes it,
+        no later than the update where its life span is over here.
+        :return: True if the robot has a life span and lived it entirely
+        :rtype: bool
+        """
+        return self.max_age is not None \
+            and self._first_state_time is not None \
+            and float(self.last_update) - self._first_state_time >= self.max_age
+
     def update_state(self, world, time, state, poses_file):
         """
         Updates the robot state from a state message.
@@ -85,73 +150,73 @@ class RobotManager(object):
         :type poses_file: csv.writer
         :return:
         """
-        dead = state.dead if state.dead is not None else False
-        self.dead = dead or self.dead
-
         pos = state.pose.position
-        position = Vector3(pos.x, pos.y, pos.z)
-
         rot = state.pose.orientation
-        qua = Quaternion(rot.w, rot.x, rot.y, rot.z)
-        euler = qua.get_rpy()
-        euler = np.array([euler[0], euler[1], euler[2]]) # roll / pitch / yaw
+        self.update_pose(world, time, pos.x, pos.y, pos.z, rot.w, rot.x, rot.y, rot.z, state.dead, poses_file)
 
-        age = world.age()
+    def update_pose(self, world, time, x, y, z, qw, qx, qy, qz, dead, poses_file):
+        """
+        Updates the robot state from its position and orientation.
+
+        :param world: Instance of the world
+        :param time: The simulation time at the time of this
+                     position update.
+        :type time: Time
+        :param x, y, z: position
+        :param qw, qx, qy, qz: orientation quaternion
+        :param dead: whether the simulator reports the robot as dead
+        :param poses_file: CSV writer to write pose to, if applicable
+        :type poses_file: csv.writer
+        :return:
+        """
+        dead = dead if dead is not None else False
+        self.dead = dead or self.dead
+        # the world plugin removes the robots it reports dead
+        self.removed = dead or self.removed
+
+        if self._first_state_time is None:
+            self._first_state_time = float(time)
 
         if self.starting_time is None:
             self.starting_time = time
             self.last_update = time
-            self.last_position = position
+            self._set_last_position(x, y, z)
 
         if poses_file:
             age = world.age()
             poses_file.writerow([self.robot.id, age.sec, age.nsec,
-                                 position.x, position.y, position.z,
+                                 x, y, z,
                                  self.get_battery_level()])
 
         if float(self.age()) < self.warmup_time:
             # Don't update position values within the warmup time
-            self.last_position = position
+            self._set_last_position(x, y, z)
             self.last_update = time
             return
 
-        # Calculate the distance the robot has covered as the Euclidean
-        # distance over the x and y coordinates (we don't care for flying),
-        # as well as the time it took to cover this distance.
-        last = self.last_position
-        ds = np.sqrt((position.x - last.x)**2 + (position.y - last.y)**2)
-        dt = float(time - self.last_update)
-
-        # Velocity is of course sum(distance) / sum(time)
-        # Storing all separate distance and time values allows us to
-        # efficiently calculate the new speed over the window without
-        # having to sum the entire arrays each time, by subtracting
-        # the values we're about to remove from the _dist / _time values.
-        self._dist += ds
-        self._time += dt
-
-        if len(self._dt) >= self.speed_window:
-            # Subtract oldest values if we're about to override it
-            self._dist -= self._ds[-1]
-            self._time -= self._dt[-1]
+        # The path covered in the window (see `measures.velocity`) starts
+        # from the pose before the oldest one
+        if len(self._poses) == 0:
+            self._origin = (float(self.last_update), self._last_xyz[0], self._last_xyz[1])
+        elif self._poses.full:
+            oldest = self._poses[0]
+            self._origin = (oldest['time'], oldest['x'], oldest['y'])
 
-        self.last_position = position
-        self.last_update = time
+        roll, pitch, yaw = rpy_from_quaternion(qw, qx, qy, qz)
+        self._poses.append((float(time), x, y, z, roll, pitch, yaw))
 
-        self._positions.append(position)
-        self._times.append(time)
-        self._ds.append(ds)
-        self._dt.append(dt)
-        self._orientations.append(euler)
-        self._seconds.append(age.sec)
+        self._set_last_position(x, y, z)
+        self.last_update = time
 
     def update_contacts(self, world, module_contacts):
+        self._contacts.append(len(module_contacts.position))
 
-        number_contacts = 0
-        for position in module_contacts.position:
-            number_contacts += 1
-
-        self._contacts.append(number_contacts)
+    def record_contacts(self, contact_points):
+        """
+        :param contact_points: number of contact points of every contact of the robot in a physics step
+        """
+        for n_points in contact_points:
+            self._contacts.append(n_points)
 
     def age(self):
         """
@@ -0,0 +1,107 @@
+"""
+Helpers to read protobuf messages straight from their wire format, for the
+high rate streams of the simulator where building the message objects with
+the pure Python protobuf runtime is too expensive.
+"""
+from __future__ import absolute_import
+
+import struct
+
+from google.protobuf.descriptor import FieldDescriptor
+
+DOUBLE = struct.Struct('<d')
+
+# protobuf wire types
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+FIXED32 = 5
+
+# wire type of the (not packed) fields of every type
+_WIRE_TYPES = {
+    FieldDescriptor.TYPE_DOUBLE: FIXED64,
+    FieldDescriptor.TYPE_FIXED64: FIXED64,
+    FieldDescriptor.TYPE_SFIXED64: FIXED64,
+    FieldDescriptor.TYPE_FLOAT: FIXED32,
+    FieldDescriptor.TYPE_FIXED32: FIXED32,
+    FieldDescriptor.TYPE_SFIXED32: FIXED32,
+    FieldDescriptor.TYPE_MESSAGE: LENGTH_DELIMITED,
+    FieldDescriptor.TYPE_STRING: LENGTH_DELIMITED,
+    FieldDescriptor.TYPE_BYTES: LENGTH_DELIMITED,
+    FieldDescriptor.TYPE_INT32: VARINT,
+    FieldDescriptor.TYPE_INT64: VARINT,
+    FieldDescriptor.TYPE_UINT32: VARINT,
+    FieldDescriptor.TYPE_UINT64: VARINT,
+    FieldDescriptor.TYPE_SINT32: VARINT,
+    FieldDescriptor.TYPE_SINT64: VARINT,
+    FieldDescriptor.TYPE_BOOL: VARINT,
+    FieldDescriptor.TYPE_ENUM: VARINT,
+}
+
+
+def read_varint(data, pos):
+    """
+    :return: (value, position after the varint)
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def skip_field(data, pos, wire_type):
+    """
+    :return: position after the value of an unused field
+    """
+    if wire_type == VARINT:
+        return read_varint(data, pos)[1]
+    if wire_type == FIXED64:
+        return pos + 8
+    if wire_type == LENGTH_DELIMITED:
+        length, pos = read_varint(data, pos)
+        return pos + length
+    if wire_type == FIXED32:
+        return pos + 4
+    raise ValueError("Unsupported wire type {}".format(wire_type))
+
+
+def field_tags(message_type, *names):
+    """
+    :param message_type: descriptor of the message
+    :return: wire tags of the fields of a message type, taken from the compiled
+    messages so that they follow the .proto files of the simulator
+    """
+    fields = message_type.fields_by_name
+    tags = []
+    for name in names:
+        field = fields[name]
+        if field.type not in _WIRE_TYPES:
+            raise ValueError("Unsupported type {} of field {}".format(field.type, name))
+        tags.append(field.number << 3 | _WIRE_TYPES[field.type])
+    return tags
+
+
+def decode_time(data, pos, end, tags):
+    """
+    :param tags: tags of the sec and nsec fields of the gazebo.msgs.Time message
+    :return: (sec, nsec) of the Time message between `pos` and `end`
+    """
+    sec_tag, nsec_tag = tags
+    sec = nsec = 0
+    while pos < end:
+        tag, pos = read_varint(data, pos)
+        if tag == sec_tag:
+            sec, pos = read_varint(data, pos)
+            if sec >= 1 << 63:
+                # negative int32, sign-extended to 64 bits
+                sec -= 1 << 64
+        elif tag == nsec_tag:
+            nsec, pos = read_varint(data, pos)
+        else:
+            pos = skip_field(data, pos, tag & 0x7)
+    return sec, nsec
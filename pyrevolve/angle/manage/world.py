@@ -6,22 +6,24 @@ import os
 import pickle
 import shutil
 import sys
+import time
 import traceback
 
-from asyncio import Future
+from asyncio import Future, ensure_future
 from datetime import datetime
 from pygazebo.msg import gz_string_pb2
-from pygazebo.msg.contacts_pb2 import Contacts
 
 from pyrevolve.SDF.math import Vector3
 from pyrevolve.spec.msgs import BoundingBox
 from pyrevolve.spec.msgs import ModelInserted
-from pyrevolve.spec.msgs import RobotStates
+from .contacts import ContactsAggregator
+from .robot_states import RobotStatesDecoder
 from .robotmanager import RobotManager
 from ...gazebo import manage
 from ...gazebo import RequestHandler
 from ...util import multi_future
 from ...util import Time
+from ...util.simulation_clock import SimulationClock
 from ...custom_logging.logger import logger
 
 
@@ -38,6 +40,7 @@ class WorldManager(manage.WorldManager):
             world_address=None,
             output_directory=None,
             state_update_frequency=None,
+            contacts_sampling='step',
             restore=None,
             _private=None
     ):
@@ -46,6 +49,9 @@ class WorldManager(manage.WorldManager):
         :param restore: Restore the world from this directory, if available.
                         Only works if `output_directory` is also specified.
         :param state_update_frequency:
+        :param contacts_sampling: 'step' to count the contacts of every
+        physics step, 'states' to count them once per robot states update,
+        'off' not to subscribe to the contacts at all.
         :param generator:
         :param _private:
         :param world_address:
@@ -73,14 +79,28 @@ class WorldManager(manage.WorldManager):
         self.world_snapshot_filename = None
 
         self.state_update_frequency = state_update_frequency
+        if contacts_sampling not in ('step', 'states', 'off'):
+            raise ValueError("Unknown contacts sampling: {}".format(contacts_sampling))
+        self.contacts_sampling = contacts_sampling
         self.builder = builder
         self.generator = generator
 
         self.robot_managers = {}
+        # the robot managers by their name encoded as in the state messages
+        self._state_index = {}
+        self._states_decoder = RobotStatesDecoder()
+        self._contacts_aggregator = ContactsAggregator()
+        # simulation time of the last contacts counted, when decimating
+        self._last_contacts_time = None
         self.robot_id = 0
 
         self.start_time = None
         self.last_time = None
+        # speed of the simulation, measured on the robot states
+        self.simulation_clock = SimulationClock()
+        # wall-clock seconds spent handling the robot states messages
+        self.state_ingest_time = 0.0
+        self.state_ingest_messages = 0
 
         # List of functions called when the local state updates
         self.update_triggers = []
@@ -208,11 +228,14 @@ class WorldManager(manage.WorldManager):
             self._update_states
         )
 
-        self.contact_subscriber = await self.manager.subscribe(
-            '/gazebo/default/physics/contacts',
-            'gazebo.msgs.Contacts',
-            self._update_contacts
-        )
+        if self.contacts_sampling == 'off':
+            self.contact_subscriber = None
+        else:
+            self.contact_subscriber = await self.manager.subscribe(
+                '/gazebo/default/physics/contacts',
+                'gazebo.msgs.Contacts',
+                self._update_contacts
+            )
 
         # Awaiting this immediately will lock the program
         update_state_future = self.set_state_update_frequency(
@@ -230,7 +253,8 @@ class WorldManager(manage.WorldManager):
 
         # Wait for connections
         await self.pose_subscriber.wait_for_connection()
-        await self.contact_subscriber.wait_for_connection()
+        if self.contact_subscriber is not None:
+            await self.contact_subscriber.wait_for_connection()
         await update_state_future
 
         if self.do_restore:
@@ -239,7 +263,8 @@ class WorldManager(manage.WorldManager):
     async def disconnect(self):
         await super().disconnect()
         await self.pose_subscriber.remove()
-        await self.contact_subscriber.remove()
+        if self.contact_subscriber is not None:
+            await self.contact_subscriber.remove()
         await self.battery_handler.stop()
 
     async def create_snapshot(self, pause_when_saving=True):
@@ -306,6 +331,7 @@ class WorldManager(manage.WorldManager):
         :return:
         """
         self.robot_managers = data['robots']
+        self._state_index = {name.encode(): robot_manager for name, robot_manager in self.robot_managers.items()}
         self.robot_id = data['robot_id']
         self.start_time = data['start_time']
         self.last_time = data['last_time']
@@ -453,6 +479,7 @@ class WorldManager(manage.WorldManager):
                 robot=revolve_bot,
                 msg=response
         )
+        robot_manager.max_age = life_timeout
         return robot_manager
 
     def to_sdfbot(
@@ -482,7 +509,9 @@ class WorldManager(manage.WorldManager):
         # Immediately unregister the robot so no it won't be used
         # for anything else while it is being deleted.
         self.unregister_robot(robot)
-        return await self.delete_model(robot.name, req="delete_robot")
+        # the world plugin answers `delete_robot` with an error, it deletes
+        # the dead robots itself with `entity_delete` requests
+        return await self.delete_model(robot.name, req="entity_delete")
 
     async def delete_all_robots(self):
         """
@@ -492,7 +521,8 @@ class WorldManager(manage.WorldManager):
         """
         futures = []
         for bot in list(self.robot_managers.values()):
-            future = self.delete_robot(bot)
+            # the deletions are in flight together
+            future = ensure_future(self.delete_robot(bot))
             futures.append(future)
 
         return multi_future(futures)
@@ -556,7 +586,9 @@ class WorldManager(manage.WorldManager):
         if robot_manager.name in self.robot_managers:
             raise ValueError("Duplicate robot: {}".format(robot_manager.name))
 
+        robot_manager.contacts_sampled = self.contacts_sampling != 'off'
         self.robot_managers[robot_manager.name] = robot_manager
+        self._state_index[robot_manager.name.encode()] = robot_manager
 
     def unregister_robot(self, robot_manager):
         """
@@ -567,6 +599,7 @@ class WorldManager(manage.WorldManager):
         """
         logger.info("Unregistering robot {}.".format(robot_manager.name))
         del self.robot_managers[robot_manager.name]
+        del self._state_index[robot_manager.name.encode()]
 
     async def reset(self, **kwargs):
         """
@@ -598,7 +631,7 @@ class WorldManager(manage.WorldManager):
         """
         futures = []
         for robot in self.robot_list():
-            fut = self.update_battery_level(robot)
+            fut = ensure_future(self.update_battery_level(robot))
             futures.append(fut)
 
         if futures:
@@ -616,56 +649,69 @@ class WorldManager(manage.WorldManager):
         else:
             return self.last_time - self.start_time
 
+    def state_ingest_cost(self):
+        """
+        :return: mean wall-clock seconds spent handling a robot states
+        message, None if none was received
+        """
+        if self.state_ingest_messages == 0:
+            return None
+        return self.state_ingest_time / self.state_ingest_messages
+
     def _update_states(self, msg):
         """
         Handles the pose info message by updating robot positions.
+        Only the states of the registered robots are decoded.
         :param msg:
         :return:
         """
-        states = RobotStates()
-        states.ParseFromString(msg)
-        self.last_time = t = Time(msg=states.time)
+        start = time.perf_counter()
+        sec, nsec, states = self._states_decoder.decode(msg, self._state_index)
+        self.last_time = t = Time(sec, nsec)
+        self.simulation_clock.update(sec + nsec * 1e-9)
         if self.start_time is None or t < self.start_time:
             # A lower start time may indicate a world reset, which
             # we should copy.
             self.start_time = t
 
-        touched = {}
-        # mark all as dead and make alive only the robots that received data
-        for _name, robot_manager in self.robot_managers.items():
-            touched[robot_manager] = False
-
-        # mark robots alive and receive their states
-        for state in states.robot_state:
-            robot_manager = self.robot_managers.get(state.name, None)
-            if not robot_manager:
-                continue
-            touched[robot_manager] = True
-            robot_manager.update_state(self, t, state, self.write_poses)
-
-        for robot_manager, touch in touched.items():
-            if not touch:
+        # receive the states of the robots in the message
+        for robot_manager, x, y, z, qw, qx, qy, qz, dead in states:
+            robot_manager.update_pose(self, t, x, y, z, qw, qx, qy, qz, dead, self.write_poses)
+            if robot_manager.reached_max_age():
                 robot_manager.dead = True
 
+        # the robots that are not in the simulation anymore are dead
+        if len(states) < len(self._state_index):
+            received = set(state[0] for state in states)
+            for robot_manager in self._state_index.values():
+                if robot_manager not in received:
+                    robot_manager.removed = True
+                    robot_manager.dead = True
+
+        self.state_ingest_time += time.perf_counter() - start
+        self.state_ingest_messages += 1
         self.call_update_triggers()
 
     def _update_contacts(self, msg):
         """
         Handles the contacts with the ground info message by updating robot contacts.
+        The contact points of every robot are counted once per physics step,
+        or once per robot states update when decimating.
         :param msg:
         :return:
         """
-        contacts = Contacts()
-        contacts.ParseFromString(msg)
-        # if there was any contact in that instant
-        if contacts.contact:
-            # fetches one or more contact points for each module that has contacts
-            for module_contacts in contacts.contact:
-                robot_name = module_contacts.collision1.split('::')[0]
-                robot_manager = self.robot_managers.get(robot_name, None)
-                if not robot_manager:
-                    continue
-                robot_manager.update_contacts(self, module_contacts)
+        if self.contacts_sampling == 'states' and self.state_update_frequency:
+            sec, nsec = self._contacts_aggregator.time(msg)
+            t = sec + nsec * 1e-9
+            last = self._last_contacts_time
+            # a lower time may indicate a world reset
+            if last is not None and last <= t < last + 1.0 / self.state_update_frequency:
+                return
+            self._last_contacts_time = t
+
+        counts = self._contacts_aggregator.aggregate(msg, self._state_index)
+        for robot_manager, contact_points in counts.items():
+            robot_manager.record_contacts(contact_points)
 
     def add_update_trigger(self, callback):
         """
@@ -116,10 +116,85 @@ parser.add_argument(
     help="Number of simulators to use at the same time. Default to \"1\"."
 )
 
+parser.add_argument(
+    '--racing-quantile',
+    default=0.0, type=float,
+    help="Racing: the evaluations whose partial fitness is below this quantile of the fitnesses "
+         "of the current population at a checkpoint are stopped early. "
+         "Meant for fitness functions that are rates, like displacement_velocity. 0 disables it. Default \"0.0\"."
+)
+
+parser.add_argument(
+    '--racing-checkpoints',
+    default=[0.25, 0.5], type=float, nargs='+',
+    help="Fractions of the evaluation time at which racing checks the robots. Default \"0.25 0.5\"."
+)
+
+parser.add_argument(
+    '--evaluation-scheduling',
+    default='fifo', type=str, choices=['fifo', 'longest-first'],
+    help="Order in which the simulators pick up the robots to evaluate: "
+         "\"fifo\" in order of arrival, \"longest-first\" the robots expected to take longest first, "
+         "from a model of the duration of the past evaluations. Default to \"fifo\"."
+)
+
+parser.add_argument(
+    '--spare-simulators',
+    default=0, type=int,
+    help="Number of simulators launched and connected in advance, that take the place of the simulators "
+         "that stop responding while these are restarted in the background. "
+         "They use the ports after the ones of the n-cores simulators. Default to \"0\"."
+)
+
+parser.add_argument(
+    '--robots-per-simulator',
+    default=1, type=int,
+    help="Number of robots evaluated at the same time in each simulator. "
+         "The robots are inserted on a grid in the same world. Default to \"1\"."
+)
+
+parser.add_argument(
+    '--robot-spacing',
+    default=2.0, type=float,
+    help="Distance (in meters) between the robots of a batch on the insertion grid. Default to \"2.0\"."
+)
+
+parser.add_argument(
+    '--world-reset',
+    default='full', type=str, choices=['full', 'recycle'],
+    help="How the world is prepared for the next evaluation: \"full\" resets the whole world, "
+         "\"recycle\" deletes only the evaluated robots and resets the simulation time, "
+         "which is cheaper with short evaluation times. Default to \"full\"."
+)
+
+parser.add_argument(
+    '--development-workers',
+    default=0, type=int,
+    help="Number of processes developing, measuring and exporting the new robots. "
+         "With 0 this is done in the main process. Default to \"0\"."
+)
+
+parser.add_argument(
+    '--development-cache-size',
+    default=0, type=int,
+    help="Number of grammars whose development is memoized, so that the new robots with the grammar "
+         "of an already developed one are not developed again. With 0 every robot is developed. "
+         "Default to \"0\"."
+)
+
+parser.add_argument(
+    '--coordinator',
+    default=None, type=str_to_address,
+    help="Address host:port of the coordinator of the distributed evaluations: the manager listens on it "
+         "and the workers (python3 -m pyrevolve.util.supervisor.distributed) connect to it, "
+         "each one evaluating the robots on its n-cores local simulators. "
+         "Without it the simulators are all local. Default to \"None\"."
+)
+
 parser.add_argument(
     '--port-start',
     default=11345, type=int,
-    help="Gazebo ports [start_port, start_port + n_cores + n_analyzers]. Default to \"11345\"."
+    help="Gazebo ports [start_port, start_port + n_cores + spare_simulators + n_analyzers]. Default to \"11345\"."
 )
 
 parser.add_argument(
@@ -147,6 +222,28 @@ parser.add_argument(
     #   "past (simulation) seconds over which its speed is evaluated."
 )
 
+parser.add_argument(
+    '--evaluation-cache',
+    default='bypass', type=str, choices=['bypass', 'reuse', 'average'],
+    help="Policy for robots identical to already evaluated ones: \"bypass\" simulates them again, "
+         "\"reuse\" takes the stored result and \"average\" simulates them up to "
+         "--evaluation-cache-samples times and averages the results. Default \"bypass\"."
+)
+
+parser.add_argument(
+    '--evaluation-cache-samples',
+    default=3, type=int,
+    help="Number of evaluations averaged by the \"average\" evaluation cache policy. Default \"3\"."
+)
+
+parser.add_argument(
+    '--asynchronous-evolution',
+    default=False, type=str_to_bool,
+    help="Breeds a new child as soon as an evaluation finishes instead of waiting for whole generations. "
+         "Only meaningful with steady state population management. "
+         "Not compatible with the recovery, it requires --recovery-enabled False. Default \"False\"."
+)
+
 parser.add_argument(
     '--recovery-enabled',
     default=True, type=str_to_bool,
@@ -159,6 +256,20 @@ parser.add_argument(
     help="Exports yamls with the phenotypes. Default \"True\"."
 )
 
+parser.add_argument(
+    '--results-store',
+    default='files', type=str, choices=['files', 'sqlite'],
+    help="Where the genotypes, fitnesses and descriptors of the robots are exported: "
+         "one file per robot, or a single SQLite database (results.sqlite in the data folder). Default \"files\"."
+)
+
+parser.add_argument(
+    '--background-export',
+    default=False, type=str_to_bool,
+    help="Writes the genotypes, phenotypes, descriptors and fitnesses from a background thread, "
+         "they are flushed to disk at every snapshot. Default \"False\"."
+)
+
 # Directory where robot information will be written. The system writes
 # two main CSV files:
 # - The `robots.csv` file containing all the basic robot information, one line
@@ -205,6 +316,15 @@ parser.add_argument(
          " updates (in number of times per *simulation* second). Default \"5\"."
 )
 
+parser.add_argument(
+    '--contacts-sampling',
+    default='step', type=str, choices=['step', 'states', 'off'],
+    help="How the contacts with the ground are counted: \"step\" in every physics step, "
+         "\"states\" once per pose update (the contacts measure then spans a longer time), "
+         "\"off\" not at all, the contacts measure is then None, when no fitness uses it. "
+         "Default to \"step\"."
+)
+
 
 def make_revolve_config(conf):
     """
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import os
+
+from pyrevolve.custom_logging.logger import logger
+from pyrevolve.tol.manage import measures
+
+
+class EvaluationCache:
+    """
+    Stores the results of the evaluations (fitness and behavioural measurements)
+    indexed by the canonical hash of the evaluated phenotype, so that robots that
+    are structurally identical to already simulated ones do not need a new simulation.
+
+    Every result is appended to `path` (if given) as one json line, and the file is
+    read back when the cache is created to continue after a recovery.
+
+    The evaluations stopped early by racing are not recorded, their fitness only covers
+    the beginning of the evaluation.
+    """
+    BYPASS = 'bypass'
+    REUSE = 'reuse'
+    AVERAGE = 'average'
+    POLICIES = (BYPASS, REUSE, AVERAGE)
+
+    def __init__(self, policy=REUSE, samples=3, path=None):
+        """
+        :param policy: `bypass` always simulates the robot (for noisy fitness),
+        `reuse` simulates only the first occurrence of a phenotype and
+        `average` simulates a phenotype `samples` times and then returns the average
+        :param samples: number of evaluations to average with the `average` policy
+        :param path: file where the results are stored, None to keep them only in memory
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f'Unknown evaluation cache policy "{policy}", choose one of {self.POLICIES}')
+        assert (samples > 0)
+        self.policy = policy
+        self.samples = samples if policy == self.AVERAGE else 1
+        self.path = path
+        self.hits = 0
+        self._results = {}
+        self._pending = {}
+
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def key(robot, conf):
+        """
+        :param robot: individual to evaluate
+        :param conf: configuration of the experiment
+        :return: key identifying the evaluation of this phenotype
+        """
+        return f'{robot.phenotype.canonical_hash()}_{conf.evaluation_time}'
+
+    def __len__(self):
+        return len(self._results)
+
+    def evaluate(self, robot, conf, evaluate_robot):
+        """
+        Returns a future with the result of the evaluation of the robot, using
+        `evaluate_robot` only if the cache cannot provide it.
+
+        :param robot: individual to evaluate
+        :param conf: configuration of the experiment
+        :param evaluate_robot: function (robot, conf) returning a future of (fitness, measurements)
+        :return: future of (fitness, behavioural measurements)
+        """
+        if self.policy == self.BYPASS:
+            return evaluate_robot(robot, conf)
+
+        key = self.key(robot, conf)
+        results = self._results.get(key, [])
+        if len(results) >= self.samples:
+            self.hits += 1
+            logger.info(f'Evaluation of robot {robot.phenotype.id} found in the cache')
+            future = asyncio.Future()
+            future.set_result(self._average(results))
+            return future
+
+        if self.policy == self.REUSE and key in self._pending:
+            self.hits += 1
+            logger.info(f'Evaluation of robot {robot.phenotype.id} shared with an identical robot')
+            pending_future, evaluated_robot = self._pending[key]
+            return self._chain(pending_future, robot, evaluated_robot)
+
+        future = self._chain(evaluate_robot(robot, conf), robot, robot, key)
+        self._pending[key] = (future, robot)
+        return future
+
+    def _chain(self, evaluation, robot, evaluated_robot, key=None):
+        """
+        :param evaluation: future of an evaluation
+        :param robot: individual receiving the result
+        :param evaluated_robot: individual actually simulated, whose `stopped_early` is passed on to `robot`
+        :param key: if not None, records the result of the evaluation under this key
+        :return: future resolved with the (averaged) result of the evaluation
+        """
+        future = asyncio.Future()
+
+        def _callback(_evaluation):
+            if key is not None and self._pending.get(key, (None,))[0] is future:
+                del self._pending[key]
+            if future.cancelled():
+                return
+            if _evaluation.cancelled():
+                future.cancel()
+                return
+            if _evaluation.exception() is not None:
+                future.set_exception(_evaluation.exception())
+                return
+
+            fitness, measurements = _evaluation.result()
+            robot.stopped_early = evaluated_robot.stopped_early
+            if key is not None and fitness is not None and not robot.stopped_early:
+                self._record(key, fitness, measurements)
+                future.set_result(self._average(self._results[key]))
+            else:
+                future.set_result((fitness, measurements))
+
+        evaluation.add_done_callback(_callback)
+        return future
+
+    def _record(self, key, fitness, measurements):
+        result = {
+            'fitness': fitness,
+            'measurements': None if measurements is None else dict(measurements.items()),
+        }
+        self._results.setdefault(key, []).append(result)
+
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'key': key, **result}) + '\n')
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                key = result.pop('key')
+                self._results.setdefault(key, []).append(result)
+        logger.info(f'Loaded {len(self._results)} cached evaluations from {self.path}')
+
+    @staticmethod
+    def _mean(values):
+        values = [value for value in values if value is not None]
+        return sum(values) / len(values) if len(values) > 0 else None
+
+    def _average(self, results):
+        """
+        :param results: recorded results of the same phenotype
+        :return: (fitness, behavioural measurements) averaged over the results
+        """
+        fitness = self._mean([result['fitness'] for result in results])
+
+        recorded = [result['measurements'] for result in results if result['measurements'] is not None]
+        if len(recorded) == 0:
+            return fitness, None
+
+        behavioural_measurements = measures.BehaviouralMeasurements()
+        for name in recorded[0]:
+            setattr(behavioural_measurements, name, self._mean([m.get(name) for m in recorded]))
+        return fitness, behavioural_measurements
@@ -73,6 +73,8 @@ def displacement_velocity_hill(robot_manager, robot):
 def floor_is_lava(robot_manager, robot):
     _displacement_velocity_hill = measures.displacement_velocity_hill(robot_manager)
     _contacts = measures.contacts(robot_manager, robot)
+    if _contacts is None:
+        raise ValueError('floor_is_lava needs the contacts, they are not sampled with --contacts-sampling off')
 
     _contacts = max(_contacts, 0.0001)
     if _displacement_velocity_hill >= 0:
@@ -14,6 +14,8 @@ class Individual:
         self.fitness = None
         self.parents = None
         self.failed_eval_attempt_count = 0
+        # whether the evaluation was stopped before the end by racing
+        self.stopped_early = False
 
     def develop(self):
         """
@@ -4,6 +4,8 @@ from pyrevolve.evolution.individual import Individual
 from pyrevolve.SDF.math import Vector3
 from pyrevolve.tol.manage import measures
 from ..custom_logging.logger import logger
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import time
 import asyncio
 import os
@@ -27,7 +29,8 @@ class PopulationConfig:
                  experiment_name,
                  experiment_management,
                  offspring_size=None,
-                 next_robot_id=1):
+                 next_robot_id=1,
+                 development_workers=0):
         """
         Creates a PopulationConfig object that sets the particular configuration for the population
 
@@ -45,6 +48,8 @@ class PopulationConfig:
         :param experiment_name: name for the folder of the current experiment
         :param experiment_management: object with methods for managing the current experiment
         :param offspring_size (optional): size of offspring (for steady state)
+        :param development_workers (optional): number of processes developing, measuring and exporting
+        the new individuals. With 0 this is done in the main process
         """
         self.population_size = population_size
         self.genotype_constructor = genotype_constructor
@@ -63,10 +68,32 @@ class PopulationConfig:
         self.experiment_management = experiment_management
         self.offspring_size = offspring_size
         self.next_robot_id = next_robot_id
+        self.development_workers = development_workers
+
+
+def develop_individual(genotype, experiment_management):
+    """
+    Develops a genotype into a measured individual and exports its files.
+    It is a module level function so that it can be executed in a worker process.
+
+    :param genotype: genotype of the new individual
+    :param experiment_management: object with methods for managing the current experiment
+    :return: the new individual
+    """
+    individual = Individual(genotype)
+    individual.develop()
+    experiment_management.export_genotype(individual)
+    experiment_management.export_phenotype(individual)
+    experiment_management.export_phenotype_images(os.path.join('data_fullevolution', 'phenotype_images'), individual)
+    individual.phenotype.measure_phenotype()
+    experiment_management.export_phenotype_measurements(individual)
+
+    return individual
 
 
 class Population:
-    def __init__(self, conf: PopulationConfig, simulator_queue, analyzer_queue=None, next_robot_id=1):
+    def __init__(self, conf: PopulationConfig, simulator_queue, analyzer_queue=None, next_robot_id=1,
+                 development_pool=None):
         """
         Creates a Population object that initialises the
         individuals in the population with an empty list
@@ -77,25 +104,50 @@ class Population:
         :param simulator_queue: connection to the simulator queue
         :param analyzer_queue: connection to the analyzer simulator queue
         :param next_robot_id: (sequential) id of the next individual to be created
+        :param development_pool: pool of the development workers, passed on from the previous generation.
+        It is started on first use when conf.development_workers > 0, and stopped by shutdown()
         """
         self.conf = conf
         self.individuals = []
         self.analyzer_queue = analyzer_queue
         self.simulator_queue = simulator_queue
         self.next_robot_id = next_robot_id
+        self.development_pool = development_pool
 
-    def _new_individual(self, genotype):
-        individual = Individual(genotype)
-        individual.develop()
-        self.conf.experiment_management.export_genotype(individual)
-        self.conf.experiment_management.export_phenotype(individual)
-        self.conf.experiment_management.export_phenotype_images(os.path.join('data_fullevolution', 'phenotype_images'), individual)
-        individual.phenotype.measure_phenotype()
-        individual.phenotype.export_phenotype_measurements(self.conf.experiment_management.data_folder)
+    def shutdown(self):
+        """
+        Stops the development workers, at the end of the evolution
+        """
+        if self.development_pool is not None:
+            self.development_pool.shutdown()
+            self.development_pool = None
 
-        return individual
+    async def _new_individual(self, genotype):
+        """
+        Develops, measures and exports a new individual, in the development pool if there is one
+
+        :param genotype: genotype of the new individual
+        :return: the new individual
+        """
+        if self.conf.development_workers == 0:
+            return develop_individual(genotype, self.conf.experiment_management)
+
+        if self.development_pool is None:
+            # the workers are started by a fork server, a plain fork would copy
+            # the threads and the held locks of the main process
+            self.development_pool = ProcessPoolExecutor(self.conf.development_workers,
+                                                        mp_context=multiprocessing.get_context('forkserver'))
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.development_pool,
+                                          develop_individual,
+                                          genotype,
+                                          self.conf.experiment_management)
 
     async def load_individual(self, id):
+        results_store = self.conf.experiment_management.results_store
+        if results_store is not None:
+            return self._load_stored_individual(results_store, id)
+
         data_path = self.conf.experiment_management.data_folder
         genotype = self.conf.genotype_constructor(self.conf.genotype_conf, id)
         genotype.load_genotype(os.path.join(data_path, 'genotypes', f'genotype_{id}.txt'))
@@ -126,7 +178,34 @@ class Population:
                     if line.split(' ')[0] == 'head_balance':
                         individual.phenotype._behavioural_measurements.head_balance = float(line.split(' ')[1])
                     if line.split(' ')[0] == 'contacts':
-                        individual.phenotype._behavioural_measurements.contacts = float(line.split(' ')[1])
+                        # None when the contacts are not sampled
+                        contacts = line.split(' ')[1].strip()
+                        individual.phenotype._behavioural_measurements.contacts = None if contacts == 'None' else float(contacts)
+                    if line.split(' ')[0] == 'stopped_early':
+                        individual.stopped_early = bool(int(line.split(' ')[1]))
+
+        return individual
+
+    def _load_stored_individual(self, results_store, id):
+        """
+        Recovers an individual from the single file results store
+        """
+        genotype = self.conf.genotype_constructor(self.conf.genotype_conf, id)
+        genotype.load_text(results_store.genotype(id))
+
+        individual = Individual(genotype)
+        individual.develop()
+        individual.phenotype.measure_phenotype()
+        individual.fitness = results_store.fitness(id)
+        individual.stopped_early = results_store.stopped_early(id)
+
+        behaviour = results_store.behaviour(id)
+        if behaviour is None:
+            individual.phenotype._behavioural_measurements = None
+        else:
+            individual.phenotype._behavioural_measurements = measures.BehaviouralMeasurements()
+            for name, value in behaviour.items():
+                setattr(individual.phenotype._behavioural_measurements, name, value)
 
         return individual
 
@@ -165,14 +244,49 @@ class Population:
         """
         Populates the population (individuals list) with Individual objects that contains their respective genotype.
         """
+        genotypes = []
         for i in range(self.conf.population_size-len(recovered_individuals)):
-            individual = self._new_individual(self.conf.genotype_constructor(self.conf.genotype_conf, self.next_robot_id))
-            self.individuals.append(individual)
+            genotypes.append(self.conf.genotype_constructor(self.conf.genotype_conf, self.next_robot_id))
             self.next_robot_id += 1
+        self.individuals.extend(await asyncio.gather(*[self._new_individual(genotype) for genotype in genotypes]))
 
         await self.evaluate(self.individuals, 0)
         self.individuals = recovered_individuals + self.individuals
 
+    def _breed_child(self):
+        """
+        Creates a new genotype from the current population through selection, crossover and mutation
+
+        :return: genotype of the child
+        """
+        # Selection operator (based on fitness)
+        # Crossover
+        if self.conf.crossover_operator is not None:
+            parents = self.conf.parent_selection(self.individuals)
+            child_genotype = self.conf.crossover_operator(parents, self.conf.genotype_conf, self.conf.crossover_conf)
+            child = Individual(child_genotype)
+        else:
+            child = self.conf.selection(self.individuals)
+
+        child.genotype.id = self.next_robot_id
+        self.next_robot_id += 1
+
+        # Mutation operator
+        return self.conf.mutation_operator(child.genotype, self.conf.mutation_conf)
+
+    def _select_survivors(self, new_individuals):
+        """
+        Applies the population management to the current individuals and the new ones
+
+        :param new_individuals: evaluated new individuals
+        :return: list of surviving individuals
+        """
+        if self.conf.population_management_selector is not None:
+            return self.conf.population_management(self.individuals, new_individuals,
+                                                   self.conf.population_management_selector)
+        else:
+            return self.conf.population_management(self.individuals, new_individuals)
+
     async def next_gen(self, gen_num, recovered_individuals=[]):
         """
         Creates next generation of the population through selection, mutation, crossover
@@ -182,27 +296,15 @@ class Population:
         :return: new population
         """
 
-        new_individuals = []
+        child_genotypes = []
 
         for _i in range(self.conf.offspring_size-len(recovered_individuals)):
-            # Selection operator (based on fitness)
-            # Crossover
-            if self.conf.crossover_operator is not None:
-                parents = self.conf.parent_selection(self.individuals)
-                child_genotype = self.conf.crossover_operator(parents, self.conf.genotype_conf, self.conf.crossover_conf)
-                child = Individual(child_genotype)
-            else:
-                child = self.conf.selection(self.individuals)
+            child_genotypes.append(self._breed_child())
 
-            child.genotype.id = self.next_robot_id
-            self.next_robot_id += 1
+        # Insert individuals in new population
+        new_individuals = list(await asyncio.gather(*[self._new_individual(genotype) for genotype in child_genotypes]))
 
-            # Mutation operator
-            child_genotype = self.conf.mutation_operator(child.genotype, self.conf.mutation_conf)
-            # Insert individual in new population
-            individual = self._new_individual(child_genotype)
-
-            new_individuals.append(individual)
+        self.simulator_queue.set_reference_fitnesses([individual.fitness for individual in self.individuals])
 
         # evaluate new individuals
         await self.evaluate(new_individuals, gen_num)
@@ -210,47 +312,165 @@ class Population:
         new_individuals = recovered_individuals + new_individuals
 
         # create next population
-        if self.conf.population_management_selector is not None:
-            new_individuals = self.conf.population_management(self.individuals, new_individuals,
-                                                              self.conf.population_management_selector)
-        else:
-            new_individuals = self.conf.population_management(self.individuals, new_individuals)
-        new_population = Population(self.conf, self.simulator_queue, self.analyzer_queue, self.next_robot_id)
+        new_individuals = self._select_survivors(new_individuals)
+        new_population = Population(self.conf, self.simulator_queue, self.analyzer_queue, self.next_robot_id,
+                                     self.development_pool)
         new_population.individuals = new_individuals
         logger.info(f'Population selected in gen {gen_num} with {len(new_population.individuals)} individuals...')
 
         return new_population
 
+    async def evolve_asynchronously(self, num_generations, gen_num=0, concurrency=None):
+        """
+        Steady state evolution that does not wait for whole generations: a new child is bred and
+        submitted as soon as an evaluation finishes, and the survivor selection is applied to
+        each evaluated child. Every `offspring_size` evaluated children count as a generation,
+        for which a snapshot is exported. A child whose development or evaluation fails is
+        replaced by a new one.
+        It is not compatible with the recovery, which expects the children of a generation to
+        have consecutive ids, while here children with later ids are evaluated at every snapshot.
+
+        :param num_generations: total number of generations of the experiment
+        :param gen_num: number of the last completed generation
+        :param concurrency: number of children being evaluated at the same time,
+        it should be at least the number of simulators. Defaults to `offspring_size`
+        :return: number of the last completed generation
+        """
+        concurrency = self.conf.offspring_size if concurrency is None else concurrency
+        remaining_children = (num_generations - 1 - gen_num) * self.conf.offspring_size
+        evaluated_children = 0
+        failures_in_a_row = 0
+        pending = set()
+        # robot id of every pending evaluation
+        child_ids = {}
+
+        async def create_and_evaluate_child(child_genotype, child_gen_num):
+            individual = await self._new_individual(child_genotype)
+            return await self._evaluate_individual(individual, child_gen_num)
+
+        def submit_child():
+            nonlocal remaining_children
+            remaining_children -= 1
+            child_genotype = self._breed_child()
+            evaluation = asyncio.ensure_future(create_and_evaluate_child(child_genotype, gen_num + 1))
+            child_ids[evaluation] = child_genotype.id
+            pending.add(evaluation)
+
+        self.simulator_queue.set_reference_fitnesses([individual.fitness for individual in self.individuals])
+        try:
+            while remaining_children > 0 and len(pending) < concurrency:
+                submit_child()
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for evaluation in done:
+                    child_id = child_ids.pop(evaluation)
+                    try:
+                        individual = evaluation.result()
+                    except Exception:
+                        logger.exception(f'Evaluation of child {child_id} failed, breeding another child')
+                        failures_in_a_row += 1
+                        # the children keep failing for a reason that is not their genotype
+                        if failures_in_a_row >= max(concurrency, self.conf.offspring_size):
+                            raise
+                        remaining_children += 1
+                    else:
+                        failures_in_a_row = 0
+                        self.individuals = self._select_survivors([individual])
+                        self.simulator_queue.set_reference_fitnesses([individual.fitness
+                                                                      for individual in self.individuals])
+                        evaluated_children += 1
+
+                        if evaluated_children % self.conf.offspring_size == 0:
+                            gen_num += 1
+                            logger.info(f'Population selected in gen {gen_num} '
+                                        f'with {len(self.individuals)} individuals...')
+                            await self.conf.experiment_management.export_snapshots_async(self.individuals, gen_num)
+
+                    if remaining_children > 0:
+                        submit_child()
+        finally:
+            # nothing is left running when the evolution stops on an error
+            for evaluation in pending:
+                evaluation.cancel()
+
+        return gen_num
+
     async def evaluate(self, new_individuals, gen_num, type_simulation = 'evolve'):
         """
-        Evaluates each individual in the new gen population
+        Evaluates each individual in the new gen population.
+        The results are stored in the individuals in the order the evaluations finish,
+        and exported in the order of the individuals: the recovery considers all the
+        robots before the last one with an exported fitness as evaluated.
 
         :param new_individuals: newly created population after an evolution iteration
         :param gen_num: generation number
         """
         # Parse command line / file input arguments
         # await self.simulator_connection.pause(True)
-        robot_futures = []
-        for individual in new_individuals:
-            logger.info(f'Evaluating individual (gen {gen_num}) {individual.genotype.id} ...')
-            robot_futures.append(asyncio.ensure_future(self.evaluate_single_robot(individual)))
+        evaluations = [asyncio.ensure_future(self._evaluate_individual(individual, gen_num, type_simulation,
+                                                                       export=False))
+                       for individual in new_individuals]
+
+        start = time.time()
+        n_exported = 0
+        for n_evaluated, evaluation in enumerate(asyncio.as_completed(evaluations), start=1):
+            individual = await evaluation
+            elapsed = time.time() - start
+            eta = elapsed / n_evaluated * (len(evaluations) - n_evaluated)
+            logger.info(f'Evaluation of Individual {individual.phenotype.id} done: '
+                        f'{n_evaluated}/{len(evaluations)} of gen {gen_num} '
+                        f'(elapsed {elapsed:.1f}s, ETA {eta:.1f}s)')
+
+            while n_exported < len(evaluations) and evaluations[n_exported].done():
+                self._export_evaluation_result(new_individuals[n_exported], type_simulation)
+                n_exported += 1
+
+    async def _evaluate_individual(self, individual, gen_num, type_simulation='evolve', export=True):
+        """
+        Evaluates a single individual and exports the result
 
-        await asyncio.sleep(1)
+        :param individual: individual to evaluate
+        :param gen_num: generation number
+        :param export: whether the result is exported, or only stored in the individual
+        :return: the evaluated individual
+        """
+        logger.info(f'Evaluating individual (gen {gen_num}) {individual.genotype.id} ...')
+        result = await self.evaluate_single_robot(individual)
+        self._set_evaluation_result(individual, result)
+        if export:
+            self._export_evaluation_result(individual, type_simulation)
+        return individual
 
-        for i, future in enumerate(robot_futures):
-            individual = new_individuals[i]
-            logger.info(f'Evaluation of Individual {individual.phenotype.id}')
-            individual.fitness, individual.phenotype._behavioural_measurements = await future
+    def _set_evaluation_result(self, individual, result):
+        """
+        Stores the result of the evaluation in the individual
 
-            if individual.phenotype._behavioural_measurements is None:
-                assert (individual.fitness is None)
+        :param individual: evaluated individual
+        :param result: (fitness, behavioural measurements) of the individual
+        """
+        individual.fitness, individual.phenotype._behavioural_measurements = result
 
-            if type_simulation == 'evolve':
-                self.conf.experiment_management.export_behavior_measures(individual.phenotype.id, individual.phenotype._behavioural_measurements)
+        if individual.phenotype._behavioural_measurements is None:
+            assert (individual.fitness is None)
 
+        if individual.stopped_early:
+            logger.info(f'Individual {individual.phenotype.id} has a fitness of {individual.fitness} '
+                        f'(evaluation stopped early)')
+        else:
             logger.info(f'Individual {individual.phenotype.id} has a fitness of {individual.fitness}')
-            if type_simulation == 'evolve':
-                self.conf.experiment_management.export_fitness(individual)
+
+    def _export_evaluation_result(self, individual, type_simulation):
+        """
+        Exports the behavioural measurements and the fitness of an evaluated individual
+
+        :param individual: evaluated individual
+        """
+        if type_simulation == 'evolve':
+            self.conf.experiment_management.export_behavior_measures(individual.phenotype.id,
+                                                                     individual.phenotype._behavioural_measurements,
+                                                                     individual.stopped_early)
+            self.conf.experiment_management.export_fitness(individual)
 
     async def evaluate_single_robot(self, individual):
         """
@@ -0,0 +1,154 @@
+import json
+import sqlite3
+import threading
+
+
+class ResultsStore:
+    """
+    Single file SQLite store of the results of an experiment, alternative to the
+    files per robot of the data folder. Every robot is one row, indexed by its id,
+    with its genotype, fitness, behavioural descriptors (and whether the evaluation
+    was stopped early by racing) and phenotype (morphological and brain) descriptors.
+
+    The connection is opened on the first use, so that the store can be pickled to
+    the development worker processes, which open their own connection.
+    """
+    _SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS robots (
+            id TEXT PRIMARY KEY,
+            number INTEGER NOT NULL,
+            genotype TEXT,
+            evaluated INTEGER NOT NULL DEFAULT 0,
+            fitness REAL,
+            behaviour TEXT,
+            stopped_early INTEGER NOT NULL DEFAULT 0,
+            phenotype_descriptors TEXT
+        );
+        CREATE INDEX IF NOT EXISTS robots_evaluated_number ON robots (evaluated, number);
+    '''
+
+    def __init__(self, path):
+        """
+        :param path: path of the SQLite database, created if it does not exist
+        """
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            # the store is also written from the background writer thread, the lock serializes the access
+            self._connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(self._SCHEMA)
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    @staticmethod
+    def robot_number(_id):
+        """
+        :param _id: id of the robot, in the format 'robot_ID'
+        :return: the sequential number ID of the robot
+        """
+        return int(str(_id).split('_')[-1])
+
+    def _set(self, _id, **columns):
+        names = ', '.join(columns)
+        placeholders = ', '.join('?' for _ in columns)
+        updates = ', '.join(f'{name}=excluded.{name}' for name in columns)
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    f'INSERT INTO robots (id, number, {names}) VALUES (?, ?, {placeholders}) '
+                    f'ON CONFLICT(id) DO UPDATE SET {updates}',
+                    (str(_id), self.robot_number(_id), *columns.values()))
+
+    def _get(self, _id, column):
+        with self._lock:
+            row = self.connection.execute(f'SELECT {column} FROM robots WHERE id = ?', (str(_id),)).fetchone()
+        if row is None:
+            raise KeyError(f'Robot {_id} not found in {self.path}')
+        return row[0]
+
+    @staticmethod
+    def _dumps(measurements):
+        # numpy numbers are not serializable by json
+        return None if measurements is None else json.dumps(dict(measurements), default=float)
+
+    @staticmethod
+    def _loads(text):
+        return None if text is None else json.loads(text)
+
+    def save_genotype(self, _id, genotype):
+        """
+        :param _id: id of the robot
+        :param genotype: text of the genotype
+        """
+        self._set(_id, genotype=genotype)
+
+    def save_fitness(self, _id, fitness):
+        self._set(_id, evaluated=1, fitness=fitness)
+
+    def save_behaviour(self, _id, measurements, stopped_early=False):
+        """
+        :param _id: id of the robot
+        :param measurements: items of the behavioural measurements, None if the evaluation failed
+        :param stopped_early: whether the evaluation was stopped before the end by racing
+        """
+        self._set(_id, behaviour=self._dumps(measurements), stopped_early=int(stopped_early))
+
+    def save_phenotype_descriptors(self, _id, descriptors):
+        self._set(_id, phenotype_descriptors=self._dumps(descriptors))
+
+    def genotype(self, _id):
+        return self._get(_id, 'genotype')
+
+    def fitness(self, _id):
+        return self._get(_id, 'fitness')
+
+    def behaviour(self, _id):
+        return self._loads(self._get(_id, 'behaviour'))
+
+    def stopped_early(self, _id):
+        return bool(self._get(_id, 'stopped_early'))
+
+    def phenotype_descriptors(self, _id):
+        return self._loads(self._get(_id, 'phenotype_descriptors'))
+
+    def last_evaluated_number(self):
+        """
+        :return: the highest number of an evaluated robot, None if no robot was evaluated
+        """
+        with self._lock:
+            return self.connection.execute('SELECT MAX(number) FROM robots WHERE evaluated = 1').fetchone()[0]
+
+    def evaluations(self):
+        """
+        Loads the results of all the evaluated robots with a single query, for the analysis of the experiment
+
+        :return: list of dictionaries with the id, fitness, behaviour, stopped_early and
+        phenotype_descriptors of the robots
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                'SELECT id, fitness, behaviour, stopped_early, phenotype_descriptors FROM robots '
+                'WHERE evaluated = 1 ORDER BY number').fetchall()
+        return [{
+            'id': _id,
+            'fitness': fitness,
+            'behaviour': self._loads(behaviour),
+            'stopped_early': bool(stopped_early),
+            'phenotype_descriptors': self._loads(phenotype_descriptors),
+        } for _id, fitness, behaviour, stopped_early, phenotype_descriptors in rows]
@@ -1,7 +1,10 @@
+import asyncio
 import os
 import shutil
 import numpy as np
 from pyrevolve.custom_logging.logger import logger
+from pyrevolve.evolution.results_store import ResultsStore
+from pyrevolve.util.background_writer import BackgroundWriter
 import sys
 
 
@@ -13,8 +16,31 @@ class ExperimentManagement:
         manager_folder = os.path.dirname(self.settings.manager)
         self._experiment_folder = os.path.join(manager_folder, 'data', self.settings.experiment_name, self.settings.run)
         self._data_folder = os.path.join(self._experiment_folder, 'data_fullevolution')
+        self._writer = BackgroundWriter() if settings.background_export else None
+        self._results_store = ResultsStore(self.results_store_path) if settings.results_store == 'sqlite' else None
+
+    def __getstate__(self):
+        # the writer thread stays in the main process, worker processes export synchronously
+        state = self.__dict__.copy()
+        state['_writer'] = None
+        return state
+
+    def _export(self, function, *args):
+        if self._writer is not None:
+            self._writer.submit(function, *args)
+        else:
+            function(*args)
+
+    def flush(self):
+        """
+        Waits until all the exports submitted to the background writer are written
+        """
+        if self._writer is not None:
+            self._writer.flush()
 
     def create_exp_folders(self):
+        if self.results_store is not None:
+            self.results_store.close()
         if os.path.exists(self.experiment_folder):
             shutil.rmtree(self.experiment_folder)
         os.makedirs(self.experiment_folder)
@@ -34,31 +60,72 @@ class ExperimentManagement:
     def data_folder(self):
         return self._data_folder
 
+    @property
+    def evaluation_cache_path(self):
+        return os.path.join(self.data_folder, 'evaluation_cache.txt')
+
+    @property
+    def results_store_path(self):
+        return os.path.join(self.data_folder, 'results.sqlite')
+
+    @property
+    def results_store(self):
+        """
+        :return: the single file store of the results, None if the results are exported to one file per robot
+        """
+        return self._results_store
+
     def export_genotype(self, individual):
         if self.settings.recovery_enabled:
-            individual.export_genotype(self.data_folder)
+            if self.results_store is not None:
+                self._export(self.results_store.save_genotype, individual.id, individual.genotype.to_text())
+            else:
+                self._export(individual.export_genotype, self.data_folder)
 
     def export_phenotype(self, individual):
         if self.settings.export_phenotype:
-            individual.export_phenotype(self.data_folder)
+            self._export(individual.export_phenotype, self.data_folder)
+
+    def export_phenotype_measurements(self, individual):
+        if self.results_store is not None:
+            self._export(self.results_store.save_phenotype_descriptors,
+                         individual.id, individual.phenotype.phenotype_measurements())
+        else:
+            self._export(individual.phenotype.export_phenotype_measurements, self.data_folder)
 
     def export_fitnesses(self, individuals):
         folder = self.data_folder
         for individual in individuals:
-            individual.export_fitness(folder)
+            self._export(individual.export_fitness, folder)
 
     def export_fitness(self, individual):
+        if self.results_store is not None:
+            self._export(self.results_store.save_fitness, individual.id, individual.fitness)
+            return
         folder = os.path.join(self.data_folder, 'fitness')
-        individual.export_fitness(folder)
-
-    def export_behavior_measures(self, _id, measures):
+        self._export(individual.export_fitness, folder)
+
+    def export_behavior_measures(self, _id, measures, stopped_early=False):
+        """
+        :param stopped_early: whether the evaluation was stopped before the end by racing, the
+        measures (and the fitness) then only cover the beginning of the evaluation
+        """
+        if self.results_store is not None:
+            self._export(self.results_store.save_behaviour, _id,
+                         None if measures is None else dict(measures.items()), stopped_early)
+            return
         filename = os.path.join(self.data_folder, 'descriptors', f'behavior_desc_{_id}.txt')
+        self._export(self._write_behavior_measures, filename, measures, stopped_early)
+
+    @staticmethod
+    def _write_behavior_measures(filename, measures, stopped_early=False):
         with open(filename, "w") as f:
             if measures is None:
                 f.write(str(None))
             else:
                 for key, val in measures.items():
                     f.write(f"{key} {val}\n")
+                f.write(f"stopped_early {int(stopped_early)}\n")
 
     def export_phenotype_images(self, dirpath, individual):
         individual.phenotype.render_body(os.path.join(self.experiment_folder, dirpath, f'body_{individual.phenotype.id}.png'))
@@ -70,6 +137,19 @@ class ExperimentManagement:
         individual.phenotype.save_file(os.path.join(self.data_folder, 'failed_eval_robots', f'phenotype_{individual.phenotype.id}.sdf'), conf_type='sdf')
 
     def export_snapshots(self, individuals, gen_num):
+        # a snapshot is a recovery point, everything exported before it has to be on disk
+        self.flush()
+        self._export_snapshot(individuals, gen_num)
+
+    async def export_snapshots_async(self, individuals, gen_num):
+        """
+        As `export_snapshots`, for the snapshots taken while evaluations are in flight:
+        the event loop keeps handling the simulators while the pending exports are written
+        """
+        await asyncio.get_event_loop().run_in_executor(None, self.flush)
+        self._export_snapshot(individuals, gen_num)
+
+    def _export_snapshot(self, individuals, gen_num):
         if self.settings.recovery_enabled:
             path = os.path.join(self.experiment_folder, f'selectedpop_{gen_num}')
             if os.path.exists(path):
@@ -82,6 +162,8 @@ class ExperimentManagement:
     def experiment_is_new(self):
         if not os.path.exists(self.experiment_folder):
             return True
+        if self.results_store is not None:
+            return self.results_store.last_evaluated_number() is None
         path, dirs, files = next(os.walk(os.path.join(self.data_folder, 'fitness')))
         if len(files) == 0:
             return True
@@ -107,11 +189,14 @@ class ExperimentManagement:
             last_snapshot = -1
             n_robots = 0
 
-        robot_ids = []
-        for r, d, f in os.walk(os.path.join(self.data_folder, 'fitness')):
-            for file in f:
-                robot_ids.append(int(file.split('.')[0].split('_')[-1]))
-        last_id = np.sort(robot_ids)[-1]
+        if self.results_store is not None:
+            last_id = self.results_store.last_evaluated_number()
+        else:
+            robot_ids = []
+            for r, d, f in os.walk(os.path.join(self.data_folder, 'fitness')):
+                for file in f:
+                    robot_ids.append(int(file.split('.')[0].split('_')[-1]))
+            last_id = np.sort(robot_ids)[-1]
 
         # if there are more robots to recover than the number expected in this snapshot
         if last_id > n_robots:
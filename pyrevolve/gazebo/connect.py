@@ -20,6 +20,10 @@ class RequestHandler(object):
     """
     Utility class to send `Request` messages and accept
     responses to them.
+
+    Many requests can be in flight at the same time, their responses are
+    matched to them by type and ID. The number of requests in flight is
+    bounded: further requests wait until a response is received.
     """
     # Object used to make constructor private
     _PRIVATE = object()
@@ -38,6 +42,8 @@ class RequestHandler(object):
             msg_id_base,
             wait_for_subscriber,
             wait_for_publisher,
+            max_in_flight=None,
+            timeout=None,
             _private=None
     ):
         """
@@ -64,6 +70,9 @@ class RequestHandler(object):
         self.wait_for_publisher = wait_for_publisher
         self.wait_for_subscriber = wait_for_subscriber
         self.msg_id = int(msg_id_base)
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self._in_flight = asyncio.Semaphore(max_in_flight) if max_in_flight else None
 
     @classmethod
     async def create(
@@ -79,10 +88,16 @@ class RequestHandler(object):
             request_attr='request',
             wait_for_subscriber=True,
             wait_for_publisher=True,
-            msg_id_base=0
+            msg_id_base=0,
+            max_in_flight=64,
+            timeout=None
     ):
         """
 
+        :param max_in_flight: maximum number of requests waiting for their
+        response, None for no limit
+        :param timeout: default time in seconds to wait for a response,
+        None to wait forever
         :param wait_for_publisher:
         :param wait_for_subscriber:
         :param manager:
@@ -110,6 +125,8 @@ class RequestHandler(object):
                 msg_id_base,
                 wait_for_subscriber,
                 wait_for_publisher,
+                max_in_flight,
+                timeout,
                 cls._PRIVATE
         )
         await handler._init()
@@ -151,17 +168,15 @@ class RequestHandler(object):
         request_type = str(self.get_request_type_from_msg(msg))
         req, cb = self._get_response_map(request_type)
 
-        if msg_id not in req:
+        future = cb.get(msg_id)
+        if future is None:
             # Message was not requested here, ignore it
             return
 
-        #TODO why you save this here if you are about to delete this?
-        # deletion happens in self._handled()
-        req[msg_id] = msg
-
-        # Call the future's set_result
-        cb[msg_id].set_result(msg)
         self._handled(request_type, msg_id)
+        # The request may have timed out or been cancelled meanwhile
+        if not future.done():
+            future.set_result(msg)
 
     def get_id_from_msg(self, msg):
         """
@@ -198,15 +213,23 @@ class RequestHandler(object):
         msg_type = str(msg_type)
         req, cb = self._get_response_map(msg_type)
 
-        del req[msg_id]
-        del cb[msg_id]
+        req.pop(msg_id, None)
+        cb.pop(msg_id, None)
+
+    @property
+    def in_flight(self):
+        """
+        :return: number of requests waiting for their response
+        """
+        return sum(len(cb) for cb in self.callbacks.values())
 
     async def do_gazebo_request(
             self,
             request,
             data=None,
             dbl_data=None,
-            msg_id=None
+            msg_id=None,
+            timeout=None
     ):
         """
         Convenience wrapper to use `do_request` with a default Gazebo
@@ -219,6 +242,8 @@ class RequestHandler(object):
         :param msg_id: Force the message to use this ID. Sequencer is used if no
                        message ID is specified.
         :type msg_id: int
+        :param timeout: Time in seconds to wait for the response, the default
+                        timeout of the handler is used if not specified.
         :return: Response to the request
         """
         if msg_id is None:
@@ -234,7 +259,7 @@ class RequestHandler(object):
         if dbl_data is not None:
             req.dbl_data = dbl_data
 
-        return await self.do_request(req)
+        return await self.do_request(req, timeout)
 
     def _get_response_map(self, request_type):
         """
@@ -249,22 +274,36 @@ class RequestHandler(object):
 
         return self.responses[request_type], self.callbacks[request_type]
 
-    async def do_request(self, msg):
+    async def do_request(self, msg, timeout=None):
         """
         Performs a request. The only requirement
         of `msg` is that it has an `id` attribute.
 
-        Publishing of the request is always yielded to prevent multiple messages
-        from going over the same pipe. The returned future is for the response.
+        Other requests can be sent while this one waits for its response, so
+        requests made concurrently (e.g. with `asyncio.gather`) take about one
+        round-trip in total. When `max_in_flight` requests are already waiting,
+        the request is only sent once one of them is answered.
 
         :param msg: Message object to publish
+        :param timeout: Time in seconds to wait for the response, the default
+                        timeout of the handler is used if not specified.
+        :raises asyncio.TimeoutError: if the response is not received in time
         :return: Response to the request
         """
+        if timeout is None:
+            timeout = self.timeout
+
+        if self._in_flight is None:
+            return await self._do_request(msg, timeout)
+        async with self._in_flight:
+            return await self._do_request(msg, timeout)
+
+    async def _do_request(self, msg, timeout):
         msg_id = str(self.get_id_from_msg(msg))
         request_type = str(self.get_request_type_from_msg(msg))
         req, cb = self._get_response_map(request_type)
 
-        if msg_id in req:
+        if msg_id in cb:
             raise RuntimeError(
                     "Duplicate request ID: `{}` for type `{}`".format(
                             msg_id, request_type))
@@ -273,9 +312,13 @@ class RequestHandler(object):
         req[msg_id] = None
         cb[msg_id] = future
 
-        # Ensures the message is sent, but don't wait for it.
-        # it sends to multiple listeners, some of them stop responding after a while, making this function stop for no
-        # real reason
-        await self.publisher.publish(msg)
-        await future
-        return future.result()
+        try:
+            await self.publisher.publish(msg)
+            if timeout is None:
+                return await future
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            # The response will not be waited for anymore after a timeout or
+            # a cancellation, do not keep the request around
+            if cb.get(msg_id) is future:
+                self._handled(request_type, msg_id)
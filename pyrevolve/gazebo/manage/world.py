@@ -159,10 +159,9 @@ class WorldManager(object):
         """
         Deletes the model with the given name from the world.
         :param name:
-        :param req: Type of request to use. If you are going to
-        delete a robot, I suggest using `delete_robot` rather than `entity_delete`
-        because this attempts to prevent some issues with segmentation faults
-        occurring from deleting sensors.
+        :param req: Type of request to use. The Revolve world plugin answers
+        `delete_robot` requests with an error, the robots are deleted with
+        `entity_delete` as any other model (see `WorldManager.delete_robot`).
         :return:
         """
         return await self.request_handler.do_gazebo_request(
@@ -0,0 +1,613 @@
+#!/usr/bin/env python3
+"""
+Stand-in for gzserver with the Revolve world and analyzer plugins, speaking the
+Gazebo transport protocol on the same topics and with the same messages.
+
+There is no physics: every inserted robot follows a synthetic trajectory (a
+straight line with a speed proportional to its number of joints), so that the
+Python side of the evaluation pipeline (SimulatorQueue, World, RequestHandler,
+BodyAnalyzer) can be run and profiled without Gazebo.
+
+It can replace `gzserver` as simulator command, e.g.
+    --simulator-cmd "python3 -m pyrevolve.gazebo.stand_in_server"
+and prints the same ready string as the world plugin once it accepts connections.
+"""
+from __future__ import absolute_import
+
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import random
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+from urllib.parse import urlparse
+
+from pygazebo.msg import contacts_pb2
+from pygazebo.msg import gz_string_pb2
+from pygazebo.msg import gz_string_v_pb2
+from pygazebo.msg import packet_pb2
+from pygazebo.msg import publish_pb2
+from pygazebo.msg import publishers_pb2
+from pygazebo.msg import request_pb2
+from pygazebo.msg import response_pb2
+from pygazebo.msg import subscribe_pb2
+from pygazebo.msg import world_control_pb2
+
+from pyrevolve.spec.msgs import BodyAnalysisResponse
+from pyrevolve.spec.msgs import ModelInserted
+from pyrevolve.spec.msgs import RobotStates
+
+# what the supervisors wait for, of the world plugin and of the body analyzer
+READY_STRINGS = ('World plugin loaded.', 'Body analyzer ready')
+GAZEBO_VERSION = 'gazebo 10.0'
+HEADER_SIZE = 8
+
+# Topics published and subscribed by gzserver and the Revolve plugins
+REQUEST_TOPIC = '/gazebo/default/request'
+RESPONSE_TOPIC = '/gazebo/default/response'
+WORLD_CONTROL_TOPIC = '/gazebo/default/world_control'
+ROBOT_STATES_TOPIC = '/gazebo/default/revolve/robot_states'
+CONTACTS_TOPIC = '/gazebo/default/physics/contacts'
+BATTERY_REQUEST_TOPIC = '/gazebo/default/battery_level/request'
+BATTERY_RESPONSE_TOPIC = '/gazebo/default/battery_level/response'
+
+PUBLICATIONS = {
+    RESPONSE_TOPIC: 'gazebo.msgs.Response',
+    ROBOT_STATES_TOPIC: 'revolve.msgs.RobotStates',
+    CONTACTS_TOPIC: 'gazebo.msgs.Contacts',
+    BATTERY_RESPONSE_TOPIC: 'gazebo.msgs.Response',
+}
+
+# Half the size of a module, used for the bounding boxes
+MODULE_HALF_SIZE = 0.045
+
+
+class _Connection(object):
+    """
+    Gazebo transport connection: every message is preceded by its size,
+    written as 8 hexadecimal characters.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def read_raw(self):
+        """
+        :return: the next message, None if the connection is closed
+        """
+        try:
+            header = await self.reader.readexactly(HEADER_SIZE)
+            return await self.reader.readexactly(int(header, 16))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+
+    async def read_packet(self):
+        data = await self.read_raw()
+        return None if data is None else packet_pb2.Packet.FromString(data)
+
+    def write_raw(self, data):
+        self.writer.write(b'%08X' % len(data) + data)
+
+    def write_packet(self, packet_type, msg):
+        packet = packet_pb2.Packet()
+        now = time.time()
+        packet.stamp.sec = int(now)
+        packet.stamp.nsec = int(math.fmod(now, 1) * 1e9)
+        packet.type = packet_type
+        packet.serialized_data = msg.SerializeToString()
+        self.write_raw(packet.SerializeToString())
+
+    def close(self):
+        self.writer.close()
+
+
+class TrajectoryModel(object):
+    """
+    Synthetic motion of the robots: a straight line with a random heading and a
+    speed proportional to the number of joints, plus gaussian noise on the positions.
+    The motion of a robot only depends on its name and the seed.
+    """
+
+    def __init__(self, speed_per_joint=0.01, position_noise=0.0, seed=0):
+        """
+        :param speed_per_joint: average speed (m/s) given by every joint of the robot
+        :param position_noise: standard deviation (m) of the noise added to the positions
+        :param seed: seed of the random headings and speeds
+        """
+        self.speed_per_joint = speed_per_joint
+        self.position_noise = position_noise
+        self.seed = seed
+
+    def velocity(self, name, n_joints):
+        """
+        :return: (vx, vy, heading) of the robot
+        """
+        digest = hashlib.sha1(f'{self.seed}_{name}'.encode()).digest()
+        rng = random.Random(digest)
+        heading = rng.uniform(-math.pi, math.pi)
+        speed = self.speed_per_joint * n_joints * rng.uniform(0.5, 1.5)
+        return speed * math.cos(heading), speed * math.sin(heading), heading
+
+    def noise(self):
+        if self.position_noise <= 0:
+            return 0.0
+        return random.gauss(0, self.position_noise)
+
+
+class _Robot(object):
+    def __init__(self, model_id, name, position, n_joints, n_links, life_timeout, trajectory):
+        self.id = model_id
+        self.name = name
+        self.start = position
+        self.n_links = n_links
+        self.life_timeout = life_timeout
+        self.vx, self.vy, self.heading = trajectory.velocity(name, n_joints)
+        self.insert_time = None
+        # as the death sentence of the world plugin, the life left starts
+        # to run at the next robot states update with the robot
+        self.life_left = life_timeout if life_timeout > 0 else None
+        self.death_time = None
+
+    def inserted(self, sim_time):
+        self.insert_time = sim_time
+
+    def dead(self, sim_time):
+        """
+        :param sim_time: time of the robot states update
+        :return: whether the robot is dead at this update
+        """
+        if self.life_left is None:
+            return False
+        if self.death_time is None:
+            self.death_time = sim_time + self.life_left
+            return False
+        return self.death_time <= sim_time
+
+    def time_reset(self, sim_time):
+        """
+        The simulation time goes back to zero, the life left counts again from the next update
+        :param sim_time: time of the last robot states update
+        """
+        if self.death_time is not None:
+            self.life_left = self.death_time - sim_time
+            self.death_time = None
+
+    def position(self, sim_time, trajectory):
+        age = sim_time - self.insert_time
+        return (self.start[0] + self.vx * age + trajectory.noise(),
+                self.start[1] + self.vy * age + trajectory.noise(),
+                self.start[2])
+
+
+def _set_time(msg, sim_time):
+    msg.sec = int(sim_time)
+    msg.nsec = int(round((sim_time - int(sim_time)) * 1e9))
+
+
+def _set_pose(msg, position, heading=0.0):
+    msg.position.x, msg.position.y, msg.position.z = position
+    msg.orientation.w = math.cos(heading / 2)
+    msg.orientation.x = 0.0
+    msg.orientation.y = 0.0
+    msg.orientation.z = math.sin(heading / 2)
+
+
+def _parse_pose(element):
+    pose = element.find('pose') if element is not None else None
+    if pose is None or not pose.text:
+        return 0.0, 0.0, 0.0
+    x, y, z = (float(value) for value in pose.text.split()[:3])
+    return x, y, z
+
+
+def _parse_model(sdf):
+    """
+    :param sdf: SDF of a robot
+    :return: (name, position, joint positions, link positions) of the model
+    """
+    root = ElementTree.fromstring(sdf.encode() if isinstance(sdf, str) else sdf)
+    model = root if root.tag == 'model' else root.find('model')
+    joints = [_parse_pose(joint) for joint in model.iter('joint')]
+    links = [_parse_pose(link) for link in model.iter('link')]
+    return model.get('name'), _parse_pose(model), joints, links
+
+
+class StandInServer(object):
+    """
+    Gazebo master and node with the topics of the Revolve world and analyzer plugins.
+    """
+
+    def __init__(self, host='127.0.0.1', port=11345, real_time_factor=1.0,
+                 trajectory=None, contact_points=1):
+        """
+        :param host: address of the master and of the publishers
+        :param port: port of the master
+        :param real_time_factor: simulated seconds per real second, 0 to simulate as fast as possible
+        :param trajectory: motion of the robots
+        :type trajectory: TrajectoryModel
+        :param contact_points: number of contact points with the ground reported for every robot
+        """
+        self.host = host
+        self.port = port
+        self.real_time_factor = real_time_factor
+        self.trajectory = TrajectoryModel() if trajectory is None else trajectory
+        self.contact_points = contact_points
+
+        self.sim_time = 0.0
+        self.paused = False
+        self.robot_states_frequency = 5
+
+        self._robots = {}
+        self._pending_insertions = []
+        self._next_model_id = 10
+
+        self._master = None
+        self._publisher_server = None
+        self._publisher_port = None
+        # clients of the master
+        self._nodes = []
+        # topic -> [(node, Publish)] and topic -> [(node, Subscribe)] of the clients
+        self._publications = {}
+        self._subscriptions = {}
+        # topic -> connections listening to our publications
+        self._listeners = {topic: [] for topic in PUBLICATIONS}
+        self._handlers = {
+            REQUEST_TOPIC: (request_pb2.Request, self._handle_request),
+            WORLD_CONTROL_TOPIC: (world_control_pb2.WorldControl, self._handle_world_control),
+            BATTERY_REQUEST_TOPIC: (request_pb2.Request, self._handle_battery_request),
+        }
+        self._subscribed_publishers = set()
+        self._tasks = []
+        self._simulation = None
+        self._inserting = None
+
+    async def start(self):
+        self._publisher_server = await asyncio.start_server(self._serve_subscriber, self.host, 0)
+        self._publisher_port = self._publisher_server.sockets[0].getsockname()[1]
+        self._master = await asyncio.start_server(self._serve_node, self.host, self.port)
+        self._inserting = asyncio.Event()
+        self._simulation = asyncio.ensure_future(self._simulate())
+
+    async def stop(self):
+        self._simulation.cancel()
+        for task in self._tasks:
+            task.cancel()
+        self._master.close()
+        self._publisher_server.close()
+        await self._master.wait_closed()
+        await self._publisher_server.wait_closed()
+
+    # MASTER
+
+    def _own_publication(self, topic):
+        msg = publish_pb2.Publish()
+        msg.topic = topic
+        msg.msg_type = PUBLICATIONS[topic]
+        msg.host = self.host
+        msg.port = self._publisher_port
+        return msg
+
+    def _all_publications(self):
+        publications = [self._own_publication(topic) for topic in PUBLICATIONS]
+        for topic_publications in self._publications.values():
+            publications.extend(publish for _, publish in topic_publications)
+        return publications
+
+    async def _serve_node(self, reader, writer):
+        node = _Connection(reader, writer)
+        self._nodes.append(node)
+
+        version = gz_string_pb2.GzString()
+        version.data = GAZEBO_VERSION
+        node.write_packet('version_init', version)
+        namespaces = gz_string_v_pb2.GzString_V()
+        namespaces.data.append('default')
+        # misspelled in Gazebo too
+        node.write_packet('topic_namepaces_init', namespaces)
+        publishers = publishers_pb2.Publishers()
+        for publish in self._all_publications():
+            publishers.publisher.add().CopyFrom(publish)
+        node.write_packet('publishers_init', publishers)
+
+        try:
+            while True:
+                packet = await node.read_packet()
+                if packet is None:
+                    break
+                if packet.type == 'advertise':
+                    self._advertise(node, publish_pb2.Publish.FromString(packet.serialized_data))
+                elif packet.type == 'subscribe':
+                    self._subscribe(node, subscribe_pb2.Subscribe.FromString(packet.serialized_data))
+                elif packet.type == 'unadvertise':
+                    self._remove(self._publications, node, publish_pb2.Publish.FromString(packet.serialized_data))
+                elif packet.type == 'unsubscribe':
+                    self._remove(self._subscriptions, node, subscribe_pb2.Subscribe.FromString(packet.serialized_data))
+        finally:
+            self._nodes.remove(node)
+            for registry in (self._publications, self._subscriptions):
+                for topic in registry:
+                    registry[topic] = [(_node, msg) for (_node, msg) in registry[topic] if _node is not node]
+            node.close()
+
+    def _advertise(self, node, publish):
+        self._publications.setdefault(publish.topic, []).append((node, publish))
+        for other in self._nodes:
+            other.write_packet('publisher_add', publish)
+        for subscriber, _ in self._subscriptions.get(publish.topic, []):
+            subscriber.write_packet('publisher_advertise', publish)
+        if publish.topic in self._handlers:
+            self._tasks.append(asyncio.ensure_future(self._subscribe_to_publisher(publish)))
+
+    def _subscribe(self, node, subscribe):
+        self._subscriptions.setdefault(subscribe.topic, []).append((node, subscribe))
+        publications = [publish for _, publish in self._publications.get(subscribe.topic, [])]
+        if subscribe.topic in PUBLICATIONS:
+            publications.append(self._own_publication(subscribe.topic))
+        for publish in publications:
+            node.write_packet('publisher_subscribe', publish)
+
+    @staticmethod
+    def _remove(registry, node, msg):
+        registry[msg.topic] = [(_node, _msg) for (_node, _msg) in registry.get(msg.topic, [])
+                               if _node is not node or _msg.msg_type != msg.msg_type]
+
+    # PUBLISHERS
+
+    async def _serve_subscriber(self, reader, writer):
+        connection = _Connection(reader, writer)
+        packet = await connection.read_packet()
+        if packet is None or packet.type != 'sub':
+            connection.close()
+            return
+        subscribe = subscribe_pb2.Subscribe.FromString(packet.serialized_data)
+        if PUBLICATIONS.get(subscribe.topic) != subscribe.msg_type:
+            connection.close()
+            return
+
+        listeners = self._listeners[subscribe.topic]
+        listeners.append(connection)
+        # nothing else is sent by the subscriber, wait until it disconnects
+        await connection.read_raw()
+        listeners.remove(connection)
+        connection.close()
+
+    def _publish(self, topic, msg):
+        listeners = self._listeners[topic]
+        if not listeners:
+            return
+        data = msg.SerializeToString()
+        for connection in list(listeners):
+            if connection.writer.is_closing():
+                listeners.remove(connection)
+                continue
+            connection.write_raw(data)
+
+    def _respond(self, request, response, data=None, data_type=None, topic=RESPONSE_TOPIC):
+        msg = response_pb2.Response()
+        msg.id = request.id
+        msg.request = request.request
+        msg.response = response
+        if data is not None:
+            msg.type = data_type
+            msg.serialized_data = data.SerializeToString()
+        self._publish(topic, msg)
+
+    # SUBSCRIBERS
+
+    async def _subscribe_to_publisher(self, publish):
+        address = (publish.host, publish.port, publish.topic)
+        if address in self._subscribed_publishers:
+            return
+        self._subscribed_publishers.add(address)
+        msg_class, handler = self._handlers[publish.topic]
+        host = publish.host if publish.host not in ('', '0.0.0.0') else '127.0.0.1'
+        try:
+            reader, writer = await asyncio.open_connection(host, publish.port)
+            connection = _Connection(reader, writer)
+
+            subscribe = subscribe_pb2.Subscribe()
+            subscribe.topic = publish.topic
+            subscribe.msg_type = publish.msg_type
+            subscribe.host = self.host
+            subscribe.port = self._publisher_port
+            subscribe.latching = False
+            connection.write_packet('sub', subscribe)
+
+            while True:
+                data = await connection.read_raw()
+                if data is None:
+                    break
+                handler(msg_class.FromString(data))
+            connection.close()
+        except ConnectionError:
+            pass
+        finally:
+            self._subscribed_publishers.discard(address)
+
+    def _handle_request(self, request):
+        if request.request == 'insert_sdf':
+            name, position, joints, links = _parse_model(request.data)
+            self._next_model_id += 1
+            robot = _Robot(self._next_model_id, name, position, len(joints), len(links),
+                           request.dbl_data if request.HasField('dbl_data') else 0.0, self.trajectory)
+            # as the world plugin, insertions happen at the next world update
+            self._pending_insertions.append((request, robot))
+            self._inserting.set()
+        elif request.request == 'entity_delete':
+            robot = self._robots.pop(request.data.split('::')[0], None)
+            self._respond(request, 'error' if robot is None else 'success')
+        elif request.request == 'delete_robot':
+            # as the world plugin, that cannot delete the robots with this request
+            self._respond(request, 'error')
+        elif request.request == 'set_robot_state_update_frequency':
+            self.robot_states_frequency = int(request.data)
+            self._respond(request, 'success')
+        elif request.request == 'analyze_body':
+            self._respond(request, 'success', self._analyze_body(request.data), 'revolve.msgs.BodyAnalysisResponse')
+        elif request.request == 'world_sdf':
+            world = gz_string_pb2.GzString()
+            world.data = '<sdf version="1.6"><world name="default"/></sdf>'
+            self._respond(request, 'success', world, 'gazebo.msgs.GzString')
+        else:
+            self._respond(request, 'error')
+
+    def _handle_battery_request(self, request):
+        self._respond(request, 'success', topic=BATTERY_RESPONSE_TOPIC)
+
+    def _handle_world_control(self, msg):
+        if msg.HasField('pause'):
+            self.paused = msg.pause
+        if msg.HasField('reset'):
+            # as the world plugin, the death sentences keep the life left
+            for robot in self._robots.values():
+                robot.time_reset(self.sim_time)
+            if msg.reset.all or msg.reset.model_only:
+                self.sim_time = 0.0
+                for robot in self._robots.values():
+                    robot.inserted(self.sim_time)
+            else:
+                # as Gazebo, a time only reset leaves the robots where they are
+                for robot in self._robots.values():
+                    robot.insert_time -= self.sim_time
+                self.sim_time = 0.0
+
+    @staticmethod
+    def _analyze_body(sdf):
+        """
+        Bounding box of the origins of the links, enlarged by the size of a module.
+        No internal collisions are reported.
+        """
+        _, _, _, links = _parse_model(sdf)
+        links = links if links else [(0.0, 0.0, 0.0)]
+        analysis = BodyAnalysisResponse()
+        for axis, name in enumerate(('x', 'y', 'z')):
+            values = [link[axis] for link in links]
+            setattr(analysis.boundingBox.min, name, min(values) - MODULE_HALF_SIZE)
+            setattr(analysis.boundingBox.max, name, max(values) + MODULE_HALF_SIZE)
+        return analysis
+
+    # SIMULATION
+
+    async def _simulate(self):
+        while True:
+            step = 1.0 / self.robot_states_frequency if self.robot_states_frequency > 0 else 0.1
+            if self.real_time_factor > 0:
+                await asyncio.sleep(step / self.real_time_factor)
+            elif not self._robots and not self._pending_insertions:
+                # nothing to simulate, keep the real time pace until the next insertion
+                self._inserting.clear()
+                try:
+                    await asyncio.wait_for(self._inserting.wait(), step)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)
+            if self.paused:
+                continue
+            self.sim_time += step
+            self._insert_pending()
+            if self.robot_states_frequency > 0:
+                self._publish_states()
+
+    def _insert_pending(self):
+        for request, robot in self._pending_insertions:
+            robot.inserted(self.sim_time)
+            self._robots[robot.name] = robot
+
+            inserted = ModelInserted()
+            _set_time(inserted.time, self.sim_time)
+            inserted.model.name = robot.name
+            inserted.model.id = robot.id
+            _set_pose(inserted.model.pose, robot.start)
+            self._respond(request, 'success', inserted, 'revolve.msgs.ModelInserted')
+        self._pending_insertions.clear()
+
+    def _publish_states(self):
+        # as the world plugin, nothing is published while the world is empty,
+        # the dead robots are in the last message that reports them
+        if not self._robots:
+            return
+        states = RobotStates()
+        _set_time(states.time, self.sim_time)
+        contacts = contacts_pb2.Contacts()
+        _set_time(contacts.time, self.sim_time)
+
+        for robot in list(self._robots.values()):
+            position = robot.position(self.sim_time, self.trajectory)
+            state = states.robot_state.add()
+            state.id = robot.id
+            state.name = robot.name
+            _set_pose(state.pose, position, robot.heading)
+            dead = robot.dead(self.sim_time)
+            state.dead = dead
+            if dead:
+                del self._robots[robot.name]
+
+            if self.contact_points > 0:
+                contact = contacts.contact.add()
+                contact.collision1 = f'{robot.name}::Core::collision'
+                contact.collision2 = 'ground_plane::link::collision'
+                _set_time(contact.time, self.sim_time)
+                contact.world = 'default'
+                for _ in range(self.contact_points):
+                    point = contact.position.add()
+                    point.x, point.y, point.z = position[0], position[1], 0.0
+                    contact.depth.append(0.0)
+
+        self._publish(ROBOT_STATES_TOPIC, states)
+        if self.contact_points > 0 and len(contacts.contact) > 0:
+            self._publish(CONTACTS_TOPIC, contacts)
+
+
+def _master_port():
+    master_uri = os.environ.get('GAZEBO_MASTER_URI')
+    if master_uri:
+        port = urlparse(master_uri).port
+        if port is not None:
+            return port
+    return 11345
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', default=None, type=int,
+                        help='port of the master, by default taken from GAZEBO_MASTER_URI or 11345')
+    parser.add_argument('--real-time-factor', default=1.0, type=float,
+                        help='simulated seconds per real second, 0 to simulate as fast as possible')
+    parser.add_argument('--speed-per-joint', default=0.01, type=float,
+                        help='average speed (m/s) given by every joint of a robot')
+    parser.add_argument('--position-noise', default=0.0, type=float,
+                        help='standard deviation (m) of the noise added to the positions')
+    parser.add_argument('--contact-points', default=1, type=int,
+                        help='contact points with the ground reported for every robot at every update')
+    parser.add_argument('--seed', default=0, type=int, help='seed of the synthetic trajectories')
+    # the arguments of gzserver (e.g. --verbose and the world file) are ignored
+    args, _ = parser.parse_known_args()
+
+    random.seed(args.seed)
+    server = StandInServer(
+        port=_master_port() if args.port is None else args.port,
+        real_time_factor=args.real_time_factor,
+        trajectory=TrajectoryModel(args.speed_per_joint, args.position_noise, args.seed),
+        contact_points=args.contact_points,
+    )
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(server.start())
+    for ready_string in READY_STRINGS:
+        print(ready_string, flush=True)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.stop())
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
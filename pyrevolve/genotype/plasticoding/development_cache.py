@@ -0,0 +1,104 @@
+"""
+Memoized development of Plasticoding genotypes: crossover copies whole
+production rules from the parents and mutation often leaves the grammar
+unchanged, so many new genotypes have the grammar of an already developed one.
+"""
+import pickle
+from collections import OrderedDict
+
+
+def _rule_key(rule):
+    """
+    :param rule: production rule of a Plasticoding grammar
+    :return: hashable copy of the rule
+    """
+    return tuple((item[0], tuple(item[1])) for item in rule)
+
+
+class DevelopmentCache(object):
+    """
+    Least recently used cache of the development of the grammars: the
+    intermediate phenotype and the serialized phenotype of each grammar,
+    keyed by its production rules and the configuration of the development.
+    `hits` counts the developments that copied the phenotype of an earlier one.
+    """
+    _shared = None
+
+    def __init__(self, max_size):
+        """
+        :param max_size: maximum number of grammars in the cache
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @classmethod
+    def shared(cls, max_size):
+        """
+        :param max_size: maximum number of grammars in the cache
+        :return: the cache of the process
+        :rtype: DevelopmentCache
+        """
+        if cls._shared is None:
+            cls._shared = cls(max_size)
+        cls._shared.max_size = max_size
+        return cls._shared
+
+    @staticmethod
+    def key(genotype):
+        """
+        :param genotype: Plasticoding genotype
+        :return: key of the development of the genotype
+        """
+        conf = genotype.conf
+        return (conf.axiom_w, conf.i_iterations, conf.max_structural_modules,
+                conf.oscillator_param_min, conf.oscillator_param_max,
+                conf.weight_param_min, conf.weight_param_max,
+                frozenset((symbol, _rule_key(rule)) for symbol, rule in genotype.grammar.items()))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def develop(self, genotype):
+        """
+        Develops the genotype, or copies the development of the same grammar.
+        Only the grammars met a second time are stored, so that the development
+        of the others costs about the same as without the cache. From the third
+        time, the intermediate phenotype is shared with the other genotypes of
+        that grammar and must not be modified.
+        :param genotype: Plasticoding genotype
+        :return: phenotype of the genotype
+        :rtype: RevolveBot
+        """
+        key = self.key(genotype)
+        if key not in self._entries:
+            # only the key is kept for the grammars met once, most of the grammars of an evolution
+            self.misses += 1
+            self._entries[key] = None
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            genotype.early_development()
+            return genotype.late_development()
+
+        self._entries.move_to_end(key)
+        entry = self._entries[key]
+        if entry is None:
+            self.misses += 1
+            genotype.early_development()
+            phenotype = genotype.late_development()
+            # the symbols of the intermediate phenotype are the ones of the grammar, which the
+            # genetic operators insert, remove and reorder without modifying them
+            self._entries[key] = (genotype.intermediate_phenotype, pickle.dumps(phenotype, pickle.HIGHEST_PROTOCOL))
+            return phenotype
+
+        self.hits += 1
+        genotype.intermediate_phenotype, serialized_phenotype = entry
+        genotype.phenotype = pickle.loads(serialized_phenotype)
+        genotype.phenotype._id = genotype.phenotype_id()
+        return genotype.phenotype
@@ -1,6 +1,7 @@
 # no mother classes have been defined yet! not sure how to separate the the filed in folders...
 
 from enum import Enum
+from types import MappingProxyType
 from pyrevolve.genotype import Genotype
 from pyrevolve.revolve_bot import RevolveBot
 from pyrevolve.revolve_bot.revolve_module import Orientation
@@ -15,7 +16,6 @@ from pyrevolve.revolve_bot.brain.brain_nn import Params
 from ...custom_logging.logger import logger
 import random
 import math
-import copy
 import itertools
 
 
@@ -96,6 +96,44 @@ class Alphabet(Enum):
             [Alphabet.MOVE_REF_O, []]
         ]
 
+    @staticmethod
+    def categories():
+        """
+        :return: read-only map from each symbol to the name of its category,
+        which is the name of the static method listing the symbols of that category
+        :rtype: MappingProxyType
+        """
+        return _SYMBOL_CATEGORIES
+
+    @staticmethod
+    def category(symbol):
+        """
+        :param symbol: symbol of the alphabet
+        :type symbol: Alphabet
+        :return: name of the category of the symbol
+        :rtype: str
+        """
+        return _SYMBOL_CATEGORIES[symbol]
+
+
+MODULES = 'modules'
+MORPHOLOGY_MOUNTING_COMMANDS = 'morphology_mounting_commands'
+MORPHOLOGY_MOVING_COMMANDS = 'morphology_moving_commands'
+CONTROLLER_CHANGING_COMMANDS = 'controller_changing_commands'
+CONTROLLER_MOVING_COMMANDS = 'controller_moving_commands'
+
+_SYMBOL_CATEGORIES = MappingProxyType({
+    symbol[0]: category
+    for category in (MODULES,
+                     MORPHOLOGY_MOUNTING_COMMANDS,
+                     MORPHOLOGY_MOVING_COMMANDS,
+                     CONTROLLER_CHANGING_COMMANDS,
+                     CONTROLLER_MOVING_COMMANDS)
+    for symbol in getattr(Alphabet, category)()
+})
+
+_MODULE_SYMBOLS = frozenset(symbol for symbol, category in _SYMBOL_CATEGORIES.items() if category == MODULES)
+
 
 class Plasticoding(Genotype):
     """
@@ -129,13 +167,29 @@ class Plasticoding(Genotype):
         self.edges = {}
 
     def clone(self):
-        return copy.deepcopy(self)
+        """
+        Copies the grammar, in time linear in its size, without the
+        phenotype and the other state of the development.
+        :rtype: Plasticoding
+        """
+        clone = Plasticoding(self.conf, self.id)
+        clone.id = self.id
+        clone.grammar = {
+            symbol: [[item[self.index_symbol], list(item[self.index_params])] for item in rule]
+            for symbol, rule in self.grammar.items()
+        }
+        clone.valid = self.valid
+        return clone
 
     def load_genotype(self, genotype_file):
         with open(genotype_file) as f:
-            lines = f.readlines()
+            self.load_text(f.read())
 
-        for line in lines:
+    def load_text(self, text):
+        """
+        Loads the grammar from its text, in the format of the genotype files
+        """
+        for line in text.splitlines(keepends=True):
             line_array = line.split(' ')
             repleceable_symbol = Alphabet(line_array[0])
             self.grammar[repleceable_symbol] = []
@@ -150,7 +204,14 @@ class Plasticoding(Genotype):
                 self.grammar[repleceable_symbol].append([symbol, params])
 
     def export_genotype(self, filepath):
-        file = open(filepath, 'w+')
+        with open(filepath, 'w+') as file:
+            file.write(self.to_text())
+
+    def to_text(self):
+        """
+        :return: text of the grammar, in the format of the genotype files
+        """
+        lines = []
         for key, rule in self.grammar.items():
             line = key.value + ' '
             for item_rule in range(0, len(rule)):
@@ -163,8 +224,8 @@ class Plasticoding(Genotype):
                             params += '|'
                     symbol += params
                 line += symbol + ' '
-            file.write(line+'\n')
-        file.close()
+            lines.append(line+'\n')
+        return ''.join(lines)
 
     def load_and_develop(self, load, genotype_path='', id_genotype=None):
 
@@ -183,81 +244,85 @@ class Plasticoding(Genotype):
             self.valid = True
 
     def develop(self):
+        if self.conf.development_cache_size > 0:
+            return development_cache.DevelopmentCache.shared(self.conf.development_cache_size).develop(self)
         self.early_development()
         phenotype = self.late_development()
         return phenotype
 
+    def phenotype_id(self):
+        """
+        :return: id of the phenotype of the genotype
+        """
+        return self.id if type(self.id) == str and self.id.startswith("robot") else "robot_{}".format(self.id)
+
     def early_development(self):
 
         self.intermediate_phenotype = [[self.conf.axiom_w, []]]
 
         for i in range(0, self.conf.i_iterations):
 
-            position = 0
-            for aux_index in range(0, len(self.intermediate_phenotype)):
-
-                symbol = self.intermediate_phenotype[position]
-                if [symbol[self.index_symbol], []] in Alphabet.modules():
-                    # removes symbol
-                    self.intermediate_phenotype.pop(position)
+            # rewrites the whole string in a single pass
+            rewritten_phenotype = []
+            for symbol in self.intermediate_phenotype:
+                if symbol[self.index_symbol] in _MODULE_SYMBOLS:
                     # replaces by its production rule
-                    for ii in range(0, len(self.grammar[symbol[self.index_symbol]])):
-                        self.intermediate_phenotype.insert(position+ii,
-                                                           self.grammar[symbol[self.index_symbol]][ii])
-                    position = position+ii+1
+                    rewritten_phenotype.extend(self.grammar[symbol[self.index_symbol]])
                 else:
-                    position = position + 1
+                    rewritten_phenotype.append(symbol)
+            self.intermediate_phenotype = rewritten_phenotype
         # logger.info('Robot ' + str(self.id) + ' was early-developed.')
 
     def late_development(self):
 
         self.phenotype = RevolveBot()
-        self.phenotype._id = self.id if type(self.id) == str and self.id.startswith("robot") else "robot_{}".format(self.id)
+        self.phenotype._id = self.phenotype_id()
         self.phenotype._brain = BrainNN()
 
-        for symbol in self.intermediate_phenotype:
-
-            if symbol[self.index_symbol] == Alphabet.CORE_COMPONENT:
-                module = CoreModule()
-                self.phenotype._body = module
-                module.id = str(self.quantity_modules)
-                module.info = {'orientation': Orientation.NORTH,
-                               'new_module_type': Alphabet.CORE_COMPONENT}
-                module.orientation = 0
-                module.rgb = [1, 1, 0]
-                self.mounting_reference = module
+        # one decoder per category of symbols
+        decoders = {
+            MODULES: self.decode_module,
+            MORPHOLOGY_MOUNTING_COMMANDS: self.decode_mounting,
+            MORPHOLOGY_MOVING_COMMANDS: self.move_in_body,
+            CONTROLLER_CHANGING_COMMANDS: self.decode_brain_changing,
+            CONTROLLER_MOVING_COMMANDS: self.decode_brain_moving,
+        }
 
-            if [symbol[self.index_symbol], []] in Alphabet.morphology_mounting_commands():
-                self.morph_mounting_container = symbol[self.index_symbol]
+        for symbol in self.intermediate_phenotype:
+            decoders[_SYMBOL_CATEGORIES[symbol[self.index_symbol]]](symbol)
 
-            if [symbol[self.index_symbol], []] in Alphabet.modules() \
-                    and symbol[self.index_symbol] is not Alphabet.CORE_COMPONENT \
-                    and self.morph_mounting_container is not None:
+        self.add_imu_nodes()
+        logger.info('Robot ' + str(self.id) + ' was late-developed.')
 
-                if type(self.mounting_reference) == CoreModule \
-                        or type(self.mounting_reference) == BrickModule:
-                    slot = self.get_slot(self.morph_mounting_container).value
-                if type(self.mounting_reference) == ActiveHingeModule:
-                    slot = Orientation.NORTH.value
+        return self.phenotype
 
-                if self.quantity_modules < self.conf.max_structural_modules:
-                    self.new_module(slot,
-                                    symbol[self.index_symbol],
-                                    symbol)
+    def decode_module(self, symbol):
 
-            if [symbol[self.index_symbol], []] in Alphabet.morphology_moving_commands():
-                self.move_in_body(symbol)
+        if symbol[self.index_symbol] == Alphabet.CORE_COMPONENT:
+            module = CoreModule()
+            self.phenotype._body = module
+            module.id = str(self.quantity_modules)
+            module.info = {'orientation': Orientation.NORTH,
+                           'new_module_type': Alphabet.CORE_COMPONENT}
+            module.orientation = 0
+            module.rgb = [1, 1, 0]
+            self.mounting_reference = module
 
-            if [symbol[self.index_symbol], []] in Alphabet.controller_changing_commands():
-                self.decode_brain_changing(symbol)
+        elif self.morph_mounting_container is not None:
 
-            if [symbol[self.index_symbol], []] in Alphabet.controller_moving_commands():
-                self.decode_brain_moving(symbol)
+            if type(self.mounting_reference) == CoreModule \
+                    or type(self.mounting_reference) == BrickModule:
+                slot = self.get_slot(self.morph_mounting_container).value
+            if type(self.mounting_reference) == ActiveHingeModule:
+                slot = Orientation.NORTH.value
 
-        self.add_imu_nodes()
-        logger.info('Robot ' + str(self.id) + ' was late-developed.')
+            if self.quantity_modules < self.conf.max_structural_modules:
+                self.new_module(slot,
+                                symbol[self.index_symbol],
+                                symbol)
 
-        return self.phenotype
+    def decode_mounting(self, symbol):
+        self.morph_mounting_container = symbol[self.index_symbol]
 
     def move_in_body(self, symbol):
 
@@ -671,6 +736,7 @@ class NodeExtended(Node):
 
 
 from pyrevolve.genotype.plasticoding import initialization
+from pyrevolve.genotype.plasticoding import development_cache
 
 
 class PlasticodingConfig:
@@ -686,7 +752,8 @@ class PlasticodingConfig:
                  axiom_w=Alphabet.CORE_COMPONENT,
                  i_iterations=3,
                  max_structural_modules=100,
-                 robot_id=0
+                 robot_id=0,
+                 development_cache_size=0
                  ):
         self.initialization_genome = initialization_genome
         self.e_max_groups = e_max_groups
@@ -700,3 +767,5 @@ class PlasticodingConfig:
         self.i_iterations = i_iterations
         self.max_structural_modules = max_structural_modules
         self.robot_id = robot_id
+        # number of grammars whose development is memoized, 0 to develop every genotype
+        self.development_cache_size = development_cache_size
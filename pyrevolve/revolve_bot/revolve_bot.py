@@ -2,6 +2,7 @@
 Revolve body generator based on RoboGen framework
 """
 import yaml
+import hashlib
 import traceback
 from collections import OrderedDict
 from collections import deque
@@ -86,12 +87,18 @@ class RevolveBot:
         except Exception as e:
             logger.exception('Failed measuring body')
 
+    def phenotype_measurements(self):
+        """
+        :return: dict of the morphological and brain measurements
+        """
+        measurements = self._morphological_measurements.measurements_to_dict()
+        measurements.update(self._brain_measurements.measurements_to_dict())
+        return measurements
+
     def export_phenotype_measurements(self, data_path):
         filepath = os.path.join(data_path, 'descriptors', f'phenotype_desc_{self.id}.txt')
         with open(filepath, 'w+') as file:
-            for key, value in self._morphological_measurements.measurements_to_dict().items():
-                file.write(f'{key} {value}\n')
-            for key, value in self._brain_measurements.measurements_to_dict().items():
+            for key, value in self.phenotype_measurements().items():
                 file.write(f'{key} {value}\n')
 
     def measure_brain(self):
@@ -175,6 +182,21 @@ class RevolveBot:
 
         return yaml.dump(yaml_dict)
 
+    def canonical_hash(self):
+        """
+        Hash of the body and brain of the robot, ignoring its id, so that two
+        robots developed into the same structure share the same hash
+
+        :return: hexadecimal digest
+        :rtype: str
+        """
+        yaml_dict = OrderedDict()
+        yaml_dict['body'] = self._body.to_yaml()
+        if self._brain is not None:
+            yaml_dict['brain'] = self._brain.to_yaml()
+
+        return hashlib.sha1(yaml.dump(yaml_dict).encode()).hexdigest()
+
     def save_file(self, path, conf_type='yaml'):
         """
         Save robot's description on a given file path in a specified format
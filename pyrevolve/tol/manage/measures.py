@@ -43,12 +43,28 @@ class BehaviouralMeasurements:
 
 
 
+def _window_path(robot_manager):
+    """
+    Distance covered over the x and y coordinates (we don't care for flying)
+    in the speed window, and the time it took to cover it.
+    :return: (distance, time)
+    """
+    poses = robot_manager._poses.array()
+    if len(poses) == 0:
+        return 0.0, 0.0
+    origin_time, origin_x, origin_y = robot_manager._origin
+    dx = np.diff(poses['x'], prepend=origin_x)
+    dy = np.diff(poses['y'], prepend=origin_y)
+    return float(np.sqrt(dx * dx + dy * dy).sum()), float(poses['time'][-1] - origin_time)
+
+
 def velocity(robot_manager):
     """
     Returns the velocity over the maintained window
     :return:
     """
-    return robot_manager._dist / robot_manager._time if robot_manager._time > 0 else 0
+    dist, time = _window_path(robot_manager)
+    return dist / time if time > 0 else 0
 
 
 def displacement(robot_manager):
@@ -60,16 +76,17 @@ def displacement(robot_manager):
              and the second a `Time` instance.
     :rtype: tuple(Vector3, Time)
     """
-    if len(robot_manager._positions) == 0:
+    if len(robot_manager._poses) == 0:
         return Vector3(0, 0, 0), Time()
+    first, last = robot_manager._poses[0], robot_manager._poses[-1]
     return (
-        robot_manager._positions[-1] - robot_manager._positions[0],
-        robot_manager._times[-1] - robot_manager._times[0]
+        Vector3(last['x'] - first['x'], last['y'] - first['y'], last['z'] - first['z']),
+        Time(dbl=last['time'] - first['time'])
     )
 
 
 def path_length(robot_manager):
-    return robot_manager._dist
+    return _window_path(robot_manager)[0]
 
 
 def displacement_velocity(robot_manager):
@@ -80,17 +97,23 @@ def displacement_velocity(robot_manager):
     ignoring the path that was taken.
     :return:
     """
-    dist, time = displacement(robot_manager)
-    if time.is_zero():
+    if len(robot_manager._poses) == 0:
+        return 0.0
+    first, last = robot_manager._poses[0], robot_manager._poses[-1]
+    time = last['time'] - first['time']
+    if time == 0:
         return 0.0
-    return np.sqrt(dist.x ** 2 + dist.y ** 2) / float(time)
+    return math.sqrt((last['x'] - first['x']) ** 2 + (last['y'] - first['y']) ** 2) / time
 
 
 def displacement_velocity_hill(robot_manager):
-    dist, time = displacement(robot_manager)
-    if time.is_zero():
+    if len(robot_manager._poses) == 0:
+        return 0.0
+    first, last = robot_manager._poses[0], robot_manager._poses[-1]
+    time = last['time'] - first['time']
+    if time == 0:
         return 0.0
-    return dist.y / float(time)
+    return (last['y'] - first['y']) / time
 
 
 def head_balance(robot_manager):
@@ -98,18 +121,16 @@ def head_balance(robot_manager):
     Returns the average rotation of teh head in the roll and pitch dimensions.
     :return:
     """
-    roll = 0
-    pitch = 0
-    instants = len(robot_manager._orientations)
-    for o in robot_manager._orientations:
-        roll = roll + abs(o[0]) * 180 / math.pi
-        pitch = pitch + abs(o[1]) * 180 / math.pi
+    poses = robot_manager._poses.array()
+    instants = len(poses)
     #  accumulated angles for each type of rotation
     #  divided by iterations * maximum angle * each type of rotation
     if instants == 0:
         balance = None
     else:
-        balance = (roll + pitch) / (instants * 180 * 2)
+        roll = np.abs(poses['roll']).sum() * 180 / math.pi
+        pitch = np.abs(poses['pitch']).sum() * 180 / math.pi
+        balance = float(roll + pitch) / (instants * 180 * 2)
         # turns imbalance to balance
         balance = 1 - balance
     return balance
@@ -124,11 +145,11 @@ def contacts(robot_manager, robot):
 
     :param robot_manager: reference to the robot in simulation
     :param robot: reference to the robot for size measurement
-    :return: average number of contacts per block in the lifetime
+    :return: average number of contacts per block in the lifetime, None if the contacts are not sampled
     """
-    avg_contacts = 0
-    for c in robot_manager._contacts:
-        avg_contacts += c
+    if not robot_manager.contacts_sampled:
+        return None
+    avg_contacts = int(robot_manager._contacts.array().sum())
     avg_contacts = avg_contacts / robot.phenotype._morphological_measurements.measurements_to_dict()['absolute_size']
     return avg_contacts
 
@@ -136,12 +157,13 @@ def contacts(robot_manager, robot):
 def logs_position_orientation(robot_manager, o, evaluation_time, robotid, path):
     with open(path + '/data_fullevolution/descriptors/positions_' + robotid + '.txt', "a+") as f:
         if robot_manager.second <= evaluation_time:
-            robot_manager.avg_roll += robot_manager._orientations[o][0]
-            robot_manager.avg_pitch += robot_manager._orientations[o][1]
-            robot_manager.avg_yaw += robot_manager._orientations[o][2]
-            robot_manager.avg_x += robot_manager._positions[o].x
-            robot_manager.avg_y += robot_manager._positions[o].y
-            robot_manager.avg_z += robot_manager._positions[o].z
+            pose = robot_manager._poses[o]
+            robot_manager.avg_roll += pose['roll']
+            robot_manager.avg_pitch += pose['pitch']
+            robot_manager.avg_yaw += pose['yaw']
+            robot_manager.avg_x += pose['x']
+            robot_manager.avg_y += pose['y']
+            robot_manager.avg_z += pose['z']
             robot_manager.avg_roll = robot_manager.avg_roll / robot_manager.count_group
             robot_manager.avg_pitch = robot_manager.avg_pitch / robot_manager.count_group
             robot_manager.avg_yaw = robot_manager.avg_yaw / robot_manager.count_group
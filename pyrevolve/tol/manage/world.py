@@ -3,6 +3,7 @@ from __future__ import print_function
 
 import os
 import time
+from asyncio import ensure_future
 
 from pyrevolve import parser, str_to_address, make_revolve_config
 from pyrevolve.angle import Tree, Crossover, Mutator, WorldManager
@@ -51,6 +52,7 @@ class World(WorldManager):
             output_directory=conf.output_directory,
             builder=None,
             state_update_frequency=conf.pose_update_frequency,
+            contacts_sampling=conf.contacts_sampling,
             generator=None,
             restore=conf.restore_directory
         )
@@ -170,7 +172,8 @@ class World(WorldManager):
         """
         futures = []
         for tree, pose in zip(trees, poses):
-            future = self.insert_robot(tree, pose)
+            # the insertions are in flight together
+            future = ensure_future(self.insert_robot(tree, pose))
             futures.append(future)
 
         future = multi_future(futures)
@@ -211,7 +214,7 @@ class World(WorldManager):
                 end=end,
                 thickness=constants.WALL_THICKNESS,
                 height=constants.WALL_HEIGHT)
-            future = self.insert_model(SDF(elements=[wall]))
+            future = ensure_future(self.insert_model(SDF(elements=[wall])))
             futures.append(future)
 
         return multi_future(futures)
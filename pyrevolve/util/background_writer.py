@@ -0,0 +1,54 @@
+import atexit
+import queue
+import threading
+
+from pyrevolve.custom_logging.logger import logger
+
+
+class BackgroundWriter:
+    """
+    Executes file exports in a background thread, so that the coroutines
+    exporting many small files never wait for the disk.
+
+    The thread takes all the exports waiting in the queue at once and executes
+    them as a batch. `flush` blocks until all the submitted exports are written.
+    """
+
+    def __init__(self, name='background-writer'):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        # pending exports are written before the interpreter exits
+        atexit.register(self.flush)
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Schedules `function(*args, **kwargs)` in the writer thread.
+        The arguments must not be modified after the submission.
+        """
+        self._queue.put((function, args, kwargs))
+
+    def flush(self):
+        """
+        Waits until all the submitted exports have been executed
+        """
+        self._queue.join()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            for function, args, kwargs in batch:
+                try:
+                    function(*args, **kwargs)
+                except Exception:
+                    logger.exception(f'Background export {function.__qualname__} failed')
+                finally:
+                    self._queue.task_done()
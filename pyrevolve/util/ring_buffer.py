@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated circular buffer keeping the last `capacity` records of a numpy dtype,
+    so that appending does not allocate and the history can be processed as an array.
+    """
+
+    def __init__(self, capacity, dtype):
+        """
+        :param capacity: number of records kept, the oldest are overwritten
+        :param dtype: numpy dtype of the records, possibly structured
+        """
+        assert (capacity > 0)
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    @property
+    def full(self):
+        return self._size == len(self._data)
+
+    def append(self, record):
+        """
+        :param record: value, or tuple with the fields of a structured dtype
+        """
+        self._data[self._next] = record
+        self._next += 1
+        if self._next == len(self._data):
+            self._next = 0
+        if self._size < len(self._data):
+            self._size += 1
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+
+    def _index(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('ring buffer index out of range')
+        return (self._next - self._size + index) % len(self._data)
+
+    def __getitem__(self, index):
+        """
+        :param index: position from the oldest record, negative from the newest
+        :return: copy of the record
+        """
+        return self._data[self._index(index)].copy()
+
+    def array(self):
+        """
+        :return: the records from the oldest to the newest. It is a view of the buffer
+        until it wraps around, then a copy
+        """
+        if self._size < len(self._data):
+            return self._data[:self._size]
+        if self._next == 0:
+            return self._data
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
@@ -0,0 +1,69 @@
+import time
+from collections import deque
+
+
+class SimulationClock:
+    """
+    Follows the clock of a simulator from the timestamps of the messages it
+    publishes, to know how fast it is running and whether it is still running.
+
+    The real time factor is measured on the messages of the last `window`
+    seconds. A world reset (the simulation time going back) starts a new
+    measurement, the last estimate is kept in the meantime.
+    """
+
+    def __init__(self, window=5.0, min_span=0.5):
+        """
+        :param window: wall-clock seconds of messages used to measure the real time factor
+        :param min_span: minimum wall-clock seconds of messages to measure the real time factor
+        """
+        self.window = window
+        self.min_span = min_span
+        self.real_time_factor = None
+        self.last_update = None
+        # (wall time, simulation time) of the messages in the window
+        self._samples = deque()
+
+    def update(self, sim_time, wall_time=None):
+        """
+        Registers a message of the simulator
+        :param sim_time: simulation time of the message, in seconds
+        :param wall_time: wall-clock time of the message, `time.monotonic()` by default
+        """
+        if wall_time is None:
+            wall_time = time.monotonic()
+        if self._samples and sim_time < self._samples[-1][1]:
+            # the world was reset
+            self._samples.clear()
+        self._samples.append((wall_time, sim_time))
+        while wall_time - self._samples[0][0] > self.window:
+            self._samples.popleft()
+        self.last_update = wall_time
+
+        first_wall_time, first_sim_time = self._samples[0]
+        span = wall_time - first_wall_time
+        if span >= self.min_span:
+            self.real_time_factor = (sim_time - first_sim_time) / span
+
+    def stalled_for(self, wall_time=None, since=None):
+        """
+        :param wall_time: current wall-clock time, `time.monotonic()` by default
+        :param since: wall-clock time from which the stall is counted when it is later than the last
+        message, e.g. the start of an evaluation: the simulator sends nothing while its world is empty
+        :return: seconds since the last message of the simulator (or `since`), None if there is neither
+        """
+        last_update = max((t for t in (self.last_update, since) if t is not None), default=None)
+        if last_update is None:
+            return None
+        if wall_time is None:
+            wall_time = time.monotonic()
+        return wall_time - last_update
+
+    def wall_time(self, sim_seconds):
+        """
+        :param sim_seconds: simulation seconds
+        :return: expected wall-clock seconds to simulate them, None if the real time factor is not known
+        """
+        if not self.real_time_factor:
+            return None
+        return sim_seconds / self.real_time_factor
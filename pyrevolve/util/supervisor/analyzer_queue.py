@@ -9,8 +9,9 @@ from pyrevolve.util.supervisor.supervisor_collision import CollisionSimSuperviso
 class AnalyzerQueue(SimulatorQueue):
     EVALUATION_TIMEOUT = 30  # seconds
 
-    def __init__(self, n_cores: int, settings, port_start=11345, simulator_cmd='gzserver'):
-        super(AnalyzerQueue, self).__init__(n_cores, settings, port_start, simulator_cmd)
+    def __init__(self, n_cores: int, settings, port_start=11345, simulator_cmd='gzserver', spare_simulators=0):
+        super(AnalyzerQueue, self).__init__(n_cores, settings, port_start, simulator_cmd, batch_size=1,
+                                            spare_simulators=spare_simulators, scheduling='fifo')
 
     def _simulator_supervisor(self, simulator_name_postfix):
         return CollisionSimSupervisor(
@@ -25,6 +26,14 @@ class AnalyzerQueue(SimulatorQueue):
     async def _connect_to_simulator(self, settings, address, port):
         return await BodyAnalyzer.create(address, port)
 
+    def _simulation_clock(self, connection):
+        # the analyzer does not publish robot states
+        return None
+
+    def _log_state_ingest(self, connection):
+        # the analyzer does not publish robot states
+        pass
+
     async def _evaluate_robot(self, simulator_connection, robot, conf):
         if robot.failed_eval_attempt_count == 3:
             logger.info(f'Robot {robot.phenotype.id} analyze failed (reached max attempt of 3), fitness set to None.')
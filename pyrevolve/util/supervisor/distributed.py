@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Evaluation of the robots on simulators spread over several machines.
+
+The manager of the experiment uses a `DistributedSimulatorQueue` in place of
+the `SimulatorQueue`: it listens on the `--coordinator` address and hands out
+the robots to the workers connected to it. A worker runs on every machine with
+its own local `SimulatorQueue` (launching and restarting the local simulators),
+and is started with the same command line settings as the manager:
+    python3 -m pyrevolve.util.supervisor.distributed --coordinator head-node:11300 --n-cores 8
+
+The protocol is one json message per line over TCP. The robots are sent as yaml
+and the workers answer with the fitness and the behavioural measurements. The
+evaluations of a worker that disconnects or stops sending heartbeats are queued
+again, and the workers reconnect to the coordinator when the connection is lost.
+"""
+import asyncio
+import importlib
+import itertools
+import json
+import socket
+
+from pyrevolve import parser
+from pyrevolve.custom_logging.logger import logger
+from pyrevolve.evolution.individual import Individual
+from pyrevolve.revolve_bot import RevolveBot
+from pyrevolve.tol.manage import measures
+from pyrevolve.util.supervisor.scheduling import EvaluationQueue, SCHEDULING_POLICIES
+from pyrevolve.util.supervisor.simulator_queue import SimulatorQueue
+
+MESSAGE_LIMIT = 2 ** 24  # bytes, the yaml of the robots can exceed the default line limit
+HEARTBEAT_PERIOD = 5  # seconds
+CONNECTION_TIMEOUT = 30  # seconds without messages before the other side is considered lost
+
+
+def fitness_function_name(fitness_function):
+    """
+    :param fitness_function: module level function
+    :return: name the workers import the fitness function with
+    """
+    name = f'{fitness_function.__module__}:{fitness_function.__qualname__}'
+    if '<' in name:
+        raise ValueError(f'The fitness function {name} cannot be imported by the workers, '
+                         f'use a module level function')
+    return name
+
+
+def import_fitness_function(name):
+    """
+    :param name: name returned by `fitness_function_name`
+    :return: the fitness function
+    """
+    module_name, qualname = name.split(':', 1)
+    fitness_function = importlib.import_module(module_name)
+    for attribute in qualname.split('.'):
+        fitness_function = getattr(fitness_function, attribute)
+    return fitness_function
+
+
+class _Connection:
+    """
+    Json lines over an asyncio stream, the messages sent concurrently are serialized
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, message):
+        if self.writer.is_closing():
+            raise ConnectionResetError('Connection closed')
+        data = json.dumps(message, default=float).encode() + b'\n'
+        async with self._send_lock:
+            self.writer.write(data)
+            await self.writer.drain()
+
+    async def receive(self, timeout=None):
+        """
+        :return: the next message, None if the connection is closed
+        """
+        line = await asyncio.wait_for(self.reader.readline(), timeout)
+        if not line:
+            return None
+        return json.loads(line)
+
+    def close(self):
+        self.writer.close()
+
+
+async def _send_heartbeats(connection):
+    """
+    Keeps the connection alive while there is nothing else to send
+    """
+    try:
+        while True:
+            await asyncio.sleep(HEARTBEAT_PERIOD)
+            await connection.send({'type': 'heartbeat'})
+    except ConnectionError:
+        pass
+
+
+class DistributedSimulatorQueue:
+    """
+    Coordinator of the distributed evaluations, it can replace the `SimulatorQueue`
+    in the managers of the experiments.
+    """
+
+    def __init__(self, settings, address=None, evaluation_cache=None, scheduling=None):
+        """
+        :param settings: command line settings
+        :param address: (host, port) the workers connect to. Defaults to `settings.coordinator`
+        :param evaluation_cache: cache of the evaluation results, None to simulate every robot
+        :type evaluation_cache: EvaluationCache
+        :param scheduling: order of the evaluations, one of `SCHEDULING_POLICIES`.
+        Defaults to `settings.evaluation_scheduling`
+        """
+        self._address = settings.coordinator if address is None else address
+        assert (self._address is not None)
+        self._evaluation_cache = evaluation_cache
+        scheduling = settings.evaluation_scheduling if scheduling is None else scheduling
+        self._robot_queue = EvaluationQueue(SCHEDULING_POLICIES[scheduling]())
+        self._evaluation_ids = itertools.count()
+        self._reference_fitnesses = None
+        # connection -> capacity of the connected workers
+        self._workers = {}
+        self._server = None
+
+    @property
+    def address(self):
+        """
+        (host, port) the coordinator listens on, with the actual port if 0 was requested
+        """
+        if self._server is None:
+            return self._address
+        return self._server.sockets[0].getsockname()[:2]
+
+    @property
+    def capacity(self):
+        """
+        Number of evaluations the connected workers run at the same time
+        """
+        return sum(self._workers.values())
+
+    async def start(self):
+        host, port = self._address
+        self._server = await asyncio.start_server(self._serve_worker, host, port, limit=MESSAGE_LIMIT)
+        logger.info(f'Coordinator listening on {self.address[0]}:{self.address[1]}')
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        for connection in list(self._workers):
+            connection.close()
+
+    def set_reference_fitnesses(self, fitnesses):
+        """
+        Sets the fitnesses of the current population, for the racing of the workers.
+        :param fitnesses: fitnesses of the current population
+        """
+        self._reference_fitnesses = list(fitnesses)
+        for connection in self._workers:
+            asyncio.ensure_future(self._send_reference(connection))
+
+    def test_robot(self, robot, conf):
+        """
+        :param robot: individual to evaluate
+        :param conf: configuration of the experiment
+        :return: future of (fitness, behavioural measurements)
+        """
+        if self._evaluation_cache is not None:
+            return self._evaluation_cache.evaluate(robot, conf, self._enqueue_robot)
+        return self._enqueue_robot(robot, conf)
+
+    def _enqueue_robot(self, robot, conf):
+        future = asyncio.Future()
+        self._robot_queue.put_nowait((robot, future, conf))
+        return future
+
+    async def _send_reference(self, connection):
+        try:
+            await connection.send({'type': 'reference', 'fitnesses': self._reference_fitnesses})
+        except ConnectionError:
+            # the worker is being dropped by `_serve_worker`
+            pass
+
+    async def _serve_worker(self, reader, writer):
+        connection = _Connection(reader, writer)
+        peer = writer.get_extra_info('peername')
+        # evaluation id -> (robot, future, conf) sent to the worker
+        in_flight = {}
+        dispatcher = None
+        heartbeat = asyncio.ensure_future(_send_heartbeats(connection))
+        try:
+            hello = await connection.receive(CONNECTION_TIMEOUT)
+            if hello is None or hello['type'] != 'hello':
+                return
+            name = f"{hello['name']} ({peer[0]}:{peer[1]})"
+            logger.info(f"Worker {name} connected with {hello['capacity']} evaluation slots")
+            self._workers[connection] = hello['capacity']
+            if self._reference_fitnesses is not None:
+                await self._send_reference(connection)
+
+            slots = asyncio.Semaphore(hello['capacity'])
+            dispatcher = asyncio.ensure_future(self._dispatch(connection, in_flight, slots))
+            while True:
+                message = await connection.receive(CONNECTION_TIMEOUT)
+                if message is None:
+                    logger.warning(f'Worker {name} disconnected')
+                    break
+                if message['type'] in ('result', 'error'):
+                    robot, future, conf = in_flight.pop(message['id'])
+                    slots.release()
+                    if message['type'] == 'result':
+                        self._resolve(robot, future, conf, message)
+                    else:
+                        self._failed(robot, future, conf, message)
+                    self._robot_queue.task_done()
+        except asyncio.TimeoutError:
+            logger.warning(f'Worker {peer[0]}:{peer[1]} stopped responding')
+        except (ConnectionError, json.JSONDecodeError):
+            logger.exception(f'Connection to worker {peer[0]}:{peer[1]} lost')
+        finally:
+            self._workers.pop(connection, None)
+            heartbeat.cancel()
+            if dispatcher is not None:
+                dispatcher.cancel()
+                await asyncio.wait([dispatcher])
+            for robot, future, conf in in_flight.values():
+                logger.info(f'Robot {robot.phenotype.id} queued again')
+                self._robot_queue.put_nowait((robot, future, conf))
+                self._robot_queue.task_done()
+            connection.close()
+
+    async def _dispatch(self, connection, in_flight, slots):
+        """
+        Sends the robots of the queue to a worker, as long as it has free slots
+        """
+        while True:
+            await slots.acquire()
+            robot, future, conf = await self._robot_queue.get()
+            if future.done():
+                # cancelled while waiting in the queue
+                slots.release()
+                self._robot_queue.task_done()
+                continue
+            evaluation_id = next(self._evaluation_ids)
+            in_flight[evaluation_id] = (robot, future, conf)
+            try:
+                await connection.send({
+                    'type': 'evaluate',
+                    'id': evaluation_id,
+                    'robot': robot.phenotype.to_yaml(),
+                    'evaluation_time': conf.evaluation_time,
+                    'fitness_function': fitness_function_name(conf.fitness_function),
+                })
+            except ConnectionError:
+                # the robots in flight are queued again by `_serve_worker`
+                return
+
+    def _failed(self, robot, future, conf, error):
+        """
+        The worker could not evaluate the robot, it is queued again up to 3 times
+        """
+        logger.error(f"Robot {robot.phenotype.id} could not be evaluated: {error['error']}")
+        robot.failed_eval_attempt_count += 1
+        if robot.failed_eval_attempt_count < 3:
+            self._robot_queue.put_nowait((robot, future, conf))
+            return
+        logger.info(f'Robot {robot.phenotype.id} evaluation failed (reached max attempt of 3), fitness set to None.')
+        conf.experiment_management.export_failed_eval_robot(robot)
+        robot.failed_eval_attempt_count = 0
+        if not future.done():
+            future.set_result((None, None))
+
+    @staticmethod
+    def _resolve(robot, future, conf, result):
+        if future.done():
+            return
+        robot.stopped_early = result['stopped_early']
+        if result['failed']:
+            logger.info('Robot failed to be evaluated 3 times. Saving robot to failed_eval file')
+            conf.experiment_management.export_failed_eval_robot(robot)
+
+        behavioural_measurements = None
+        if result['behaviour'] is not None:
+            behavioural_measurements = measures.BehaviouralMeasurements()
+            for name, value in result['behaviour'].items():
+                setattr(behavioural_measurements, name, value)
+        future.set_result((result['fitness'], behavioural_measurements))
+
+
+class _RemoteEvaluation:
+    """
+    Configuration of an evaluation received from the coordinator, in place of the
+    `PopulationConfig` of the experiment. It also takes the place of the experiment
+    management, to report the robots that could not be evaluated.
+    """
+
+    def __init__(self, evaluation_time, fitness_function):
+        self.evaluation_time = evaluation_time
+        self.fitness_function = fitness_function
+        self.experiment_management = self
+        self.failed = False
+
+    def export_failed_eval_robot(self, _individual):
+        self.failed = True
+
+
+class SimulatorWorker:
+    """
+    Evaluates on the local simulators the robots sent by the coordinator
+    """
+    RECONNECT_PERIOD = 5  # seconds
+
+    def __init__(self, address, simulator_queue, capacity, name=None):
+        """
+        :param address: (host, port) of the coordinator
+        :param simulator_queue: queue of the local simulators
+        :type simulator_queue: SimulatorQueue
+        :param capacity: number of evaluations run at the same time
+        :param name: name of the worker in the logs of the coordinator, defaults to the host name
+        """
+        self._address = address
+        self._simulator_queue = simulator_queue
+        self._capacity = capacity
+        self._name = socket.gethostname() if name is None else name
+
+    async def run(self):
+        """
+        Serves the coordinator, forever
+        """
+        host, port = self._address
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(host, port, limit=MESSAGE_LIMIT)
+            except OSError as e:
+                logger.info(f'Coordinator {host}:{port} not reachable ({e}), retrying in {self.RECONNECT_PERIOD}s')
+                await asyncio.sleep(self.RECONNECT_PERIOD)
+                continue
+
+            logger.info(f'Connected to the coordinator {host}:{port}')
+            connection = _Connection(reader, writer)
+            try:
+                await self._serve(connection)
+            except asyncio.TimeoutError:
+                logger.warning('The coordinator stopped responding')
+            except (ConnectionError, json.JSONDecodeError):
+                logger.exception('Connection to the coordinator lost')
+            finally:
+                connection.close()
+            logger.warning(f'Disconnected from the coordinator, reconnecting in {self.RECONNECT_PERIOD}s')
+            await asyncio.sleep(self.RECONNECT_PERIOD)
+
+    async def _serve(self, connection):
+        await connection.send({'type': 'hello', 'name': self._name, 'capacity': self._capacity})
+        heartbeat = asyncio.ensure_future(_send_heartbeats(connection))
+        try:
+            while True:
+                message = await connection.receive(CONNECTION_TIMEOUT)
+                if message is None:
+                    return
+                if message['type'] == 'evaluate':
+                    # the evaluations of a lost connection go on, their results are dropped
+                    asyncio.ensure_future(self._evaluate(connection, message))
+                elif message['type'] == 'reference':
+                    self._simulator_queue.set_reference_fitnesses(message['fitnesses'])
+        finally:
+            heartbeat.cancel()
+
+    async def _evaluate(self, connection, message):
+        try:
+            phenotype = RevolveBot()
+            phenotype.load_yaml(message['robot'])
+            phenotype.measure_phenotype()
+            robot = Individual(None, phenotype)
+            conf = _RemoteEvaluation(message['evaluation_time'],
+                                     import_fitness_function(message['fitness_function']))
+
+            fitness, behavioural_measurements = await self._simulator_queue.test_robot(robot, conf)
+            result = {
+                'type': 'result',
+                'id': message['id'],
+                'fitness': fitness,
+                'behaviour': None if behavioural_measurements is None else dict(behavioural_measurements.items()),
+                'stopped_early': robot.stopped_early,
+                'failed': conf.failed,
+            }
+        except Exception as e:
+            logger.exception(f"Exception evaluating the robot of evaluation {message['id']}")
+            result = {'type': 'error', 'id': message['id'], 'error': repr(e)}
+
+        try:
+            await connection.send(result)
+        except ConnectionError:
+            logger.info(f"Result of evaluation {message['id']} dropped, the coordinator is not connected")
+
+
+def main():
+    settings = parser.parse_args()
+    if settings.coordinator is None:
+        raise ValueError('The address of the coordinator is required (--coordinator host:port)')
+
+    loop = asyncio.get_event_loop()
+    simulator_queue = SimulatorQueue(settings.n_cores, settings, settings.port_start)
+    loop.run_until_complete(simulator_queue.start())
+    worker = SimulatorWorker(settings.coordinator, simulator_queue, settings.n_cores * settings.robots_per_simulator)
+    loop.run_until_complete(worker.run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import asyncio
+
+import numpy as np
+
+from pyrevolve.custom_logging.logger import logger
+
+
+class Racing:
+    """
+    Early stopping of the evaluations that are not going to be competitive.
+
+    At every checkpoint (fraction of the evaluation time) the fitness function
+    is applied to the partial evaluation of the robot, and the evaluation is
+    stopped if the partial fitness is below the `quantile` of the fitnesses of
+    the current population. The partial fitness is comparable with the final
+    one only for fitness functions that are rates, like `displacement_velocity`.
+    """
+
+    def __init__(self, quantile, checkpoints=(0.25, 0.5), min_reference=5):
+        """
+        :param quantile: quantile of the fitnesses of the population a robot has to reach at the checkpoints
+        :param checkpoints: fractions of the evaluation time at which the robots are checked
+        :param min_reference: minimum number of fitnesses in the population to stop any evaluation
+        """
+        self.quantile = quantile
+        self.checkpoints = sorted(checkpoints)
+        self.min_reference = min_reference
+        self.threshold = None
+
+    def set_reference(self, fitnesses):
+        """
+        Sets the fitnesses of the current population, the evaluations are compared with them
+        :param fitnesses: fitnesses of the population, None for the robots that could not be evaluated
+        """
+        fitnesses = [fitness for fitness in fitnesses if fitness is not None]
+        if len(fitnesses) < self.min_reference:
+            self.threshold = None
+        else:
+            self.threshold = float(np.quantile(fitnesses, self.quantile))
+
+    async def wait_until_done(self, world, robot_manager, robot, conf):
+        """
+        Waits until the robot is dead or until its evaluation is stopped at a checkpoint.
+        :param world: world of the robot
+        :param robot_manager: manager of the robot in the world
+        :param robot: evaluated individual
+        :param conf: configuration of the experiment
+        :return: True if the evaluation was stopped before the end
+        """
+        for checkpoint in self.checkpoints:
+            if not await self._wait_until_age(world, robot_manager, checkpoint * conf.evaluation_time):
+                return False
+            threshold = self.threshold
+            if threshold is None:
+                continue
+            partial_fitness = conf.fitness_function(robot_manager, robot)
+            if partial_fitness is not None and partial_fitness < threshold:
+                logger.info(f'Evaluation of robot {robot.phenotype.id} stopped at {checkpoint:.0%}: '
+                            f'partial fitness {partial_fitness} below {threshold}')
+                return True
+
+        await robot_manager.wait_until_dead()
+        return False
+
+    @staticmethod
+    async def _wait_until_age(world, robot_manager, age):
+        """
+        :return: True when the robot reaches `age` simulation seconds, False if it dies before
+        """
+        reached = asyncio.Event()
+
+        def check_age(_world):
+            if robot_manager.dead or float(robot_manager.age()) >= age:
+                reached.set()
+
+        world.add_update_trigger(check_age)
+        try:
+            check_age(world)
+            await reached.wait()
+        finally:
+            world.remove_update_trigger(check_age)
+        return not robot_manager.dead
@@ -0,0 +1,128 @@
+import asyncio
+import heapq
+import itertools
+from collections import deque
+
+import numpy as np
+
+from pyrevolve.revolve_bot.revolve_module import ActiveHingeModule
+
+
+def body_features(phenotype):
+    """
+    :param phenotype: robot
+    :type phenotype: RevolveBot
+    :return: (number of modules, number of active hinges) of the body of the robot
+    """
+    modules, hinges = 0, 0
+    stack = [phenotype.body]
+    while stack:
+        module = stack.pop()
+        modules += 1
+        if module.TYPE == ActiveHingeModule.TYPE:
+            hinges += 1
+        stack.extend(child for _, child in module.iter_children() if child is not None)
+    return modules, hinges
+
+
+class LongestExpectedFirst:
+    """
+    Scheduling policy that evaluates first the robots expected to take longest,
+    so that a generation ends with the short evaluations and the simulators
+    finish together.
+
+    The wall-clock duration of an evaluation is predicted with a linear model
+    of the evaluation time, the number of modules and the number of active
+    hinges of the body, fitted on the past evaluations. Until enough
+    evaluations are observed, the size of the body is used as cost.
+    """
+
+    def __init__(self, min_observations=10, max_observations=1000):
+        """
+        :param min_observations: evaluations to observe before using the learned model
+        :param max_observations: number of the last evaluations the model is fitted on
+        """
+        self.min_observations = min_observations
+        self._features = deque(maxlen=max_observations)
+        self._durations = deque(maxlen=max_observations)
+        self._coefficients = None
+        self._fitted = True
+
+    @staticmethod
+    def _features_of(robot, conf):
+        modules, hinges = body_features(robot.phenotype)
+        return np.array([1.0, modules, hinges]) * conf.evaluation_time
+
+    def expected_cost(self, robot, conf):
+        """
+        :param robot: individual to evaluate
+        :param conf: configuration of the experiment
+        :return: expected wall-clock seconds of the evaluation, or a relative cost
+        before the model is learned
+        """
+        features = self._features_of(robot, conf)
+        if not self._fitted:
+            self._fit()
+        if self._coefficients is None:
+            return float(features[1] + features[2])
+        return float(features @ self._coefficients)
+
+    def observe(self, evaluations, elapsed):
+        """
+        Learns from an evaluation.
+        :param evaluations: list of (robot, conf) evaluated together in a simulator
+        :param elapsed: wall-clock seconds of the evaluation
+        """
+        self._features.append(sum(self._features_of(robot, conf) for robot, conf in evaluations))
+        self._durations.append(elapsed)
+        self._fitted = False
+
+    def _fit(self):
+        self._fitted = True
+        if len(self._durations) < self.min_observations:
+            return
+        coefficients, _, _, _ = np.linalg.lstsq(np.array(self._features), np.array(self._durations), rcond=None)
+        self._coefficients = coefficients
+
+
+SCHEDULING_POLICIES = {
+    'fifo': lambda: None,
+    'longest-first': LongestExpectedFirst,
+}
+
+
+class EvaluationQueue(asyncio.Queue):
+    """
+    Queue of (robot, future, conf) evaluations. Without a scheduling policy it is
+    a FIFO queue, otherwise the evaluation with the highest expected cost comes first
+    (in order of arrival between equal costs).
+    """
+
+    def __init__(self, policy=None):
+        """
+        :param policy: scheduling policy, None for FIFO
+        :type policy: LongestExpectedFirst
+        """
+        self.policy = policy
+        super().__init__()
+
+    def _init(self, maxsize):
+        self._queue = []
+        self._arrival = itertools.count()
+
+    def _put(self, item):
+        robot, future, conf = item
+        cost = 0.0 if self.policy is None else self.policy.expected_cost(robot, conf)
+        heapq.heappush(self._queue, (-cost, next(self._arrival), item))
+
+    def _get(self):
+        return heapq.heappop(self._queue)[2]
+
+    def observe(self, batch, elapsed):
+        """
+        Reports the duration of an evaluation to the scheduling policy
+        :param batch: list of (robot, future, conf) evaluated together
+        :param elapsed: wall-clock seconds of the evaluation
+        """
+        if self.policy is not None:
+            self.policy.observe([(robot, conf) for robot, _, conf in batch], elapsed)
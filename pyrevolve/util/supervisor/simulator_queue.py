@@ -1,27 +1,69 @@
 import asyncio
+import math
 import os
 import time
+from collections import deque
 
 from pyrevolve.custom_logging.logger import logger
 from pyrevolve.evolution.population import PopulationConfig
 from pyrevolve.tol.manage import World
+from pyrevolve.util.supervisor.racing import Racing
+from pyrevolve.util.supervisor.scheduling import EvaluationQueue, SCHEDULING_POLICIES
 from pyrevolve.util.supervisor.supervisor_multi import DynamicSimSupervisor
 from pyrevolve.SDF.math import Vector3
 from pyrevolve.tol.manage import measures
 
 
 class SimulatorQueue:
-    EVALUATION_TIMEOUT = 120  # seconds
+    EVALUATION_TIMEOUT = 120  # seconds, while the speed of the simulator is not known
+    EVALUATION_MARGIN = 30  # seconds, on top of the expected duration of an evaluation
+    EVALUATION_SAFETY_FACTOR = 2  # times the expected duration of an evaluation
+    STALL_TIMEOUT = 15  # seconds without updates of the simulation clock
+    WATCHDOG_PERIOD = 1  # seconds
+    STARTUP_TIMEOUT = 120  # seconds
 
-    def __init__(self, n_cores: int, settings, port_start=11345, simulator_cmd=None):
+    def __init__(self, n_cores: int, settings, port_start=11345, simulator_cmd=None, batch_size=None,
+                 evaluation_cache=None, spare_simulators=None, scheduling=None, world_reset=None):
+        """
+        :param n_cores: number of simulators to launch
+        :param settings: command line settings
+        :param port_start: port of the first simulator, the others use the following ports
+        :param simulator_cmd: overrides the simulator command from the settings
+        :param batch_size: number of robots evaluated at the same time in each simulator.
+        Defaults to `settings.robots_per_simulator`
+        :param evaluation_cache: cache of the evaluation results, None to simulate every robot
+        :type evaluation_cache: EvaluationCache
+        :param spare_simulators: number of simulators launched and connected in advance, that replace
+        the simulators that stop responding while those are restarted in the background. They use the
+        ports after the ones of the `n_cores` simulators. Defaults to `settings.spare_simulators`
+        :param scheduling: order of the evaluations, one of `SCHEDULING_POLICIES`.
+        Defaults to `settings.evaluation_scheduling`
+        :param world_reset: how the world is cleared after the evaluations, "full" resets the whole world,
+        "recycle" only resets the simulation time (the evaluated robots are already deleted).
+        Defaults to `settings.world_reset`
+        """
         assert (n_cores > 0)
         self._n_cores = n_cores
         self._settings = settings
         self._port_start = port_start
         self._simulator_cmd = settings.simulator_cmd if simulator_cmd is None else simulator_cmd
+        self._batch_size = settings.robots_per_simulator if batch_size is None else batch_size
+        assert (self._batch_size > 0)
+        self._evaluation_cache = evaluation_cache
+        self._n_spares = settings.spare_simulators if spare_simulators is None else spare_simulators
+        assert (self._n_spares >= 0)
         self._supervisors = []
         self._connections = []
-        self._robot_queue = asyncio.Queue()
+        self._ports = []
+        # (supervisor, connection, port) of the simulators ready to replace a broken one
+        self._spares = deque()
+        self._spare_restarts = []
+        scheduling = settings.evaluation_scheduling if scheduling is None else scheduling
+        self._robot_queue = EvaluationQueue(SCHEDULING_POLICIES[scheduling]())
+        self._racing = Racing(settings.racing_quantile, settings.racing_checkpoints) \
+            if settings.racing_quantile > 0 else None
+        self._world_reset = settings.world_reset if world_reset is None else world_reset
+        assert (self._world_reset in ('full', 'recycle'))
         self._free_simulator = [True for _ in range(n_cores)]
         self._workers = []
 
@@ -38,38 +80,74 @@ class SimulatorQueue:
     async def _connect_to_simulator(self, settings, address, port):
         return await World.create(settings, world_address=(address, port))
 
+    @property
+    def port_end(self):
+        """
+        :return: first port after the ones used by the simulators of this queue
+        """
+        return self._port_start + self._n_cores + self._n_spares
+
     async def _start_debug(self):
         connection = await self._connect_to_simulator(self._settings, "127.0.0.1", self._port_start)
         self._connections.append(connection)
+        self._ports.append(self._port_start)
         self._workers.append(asyncio.ensure_future(self._simulator_queue_worker(0)))
 
+    async def _connect_when_ready(self, address, port):
+        """
+        Connects to a simulator as soon as it accepts connections. The connection
+        is returned once its topics are connected, i.e. when the simulator is ready.
+        :return: connection to the simulator
+        """
+        deadline = time.time() + self.STARTUP_TIMEOUT
+        while True:
+            try:
+                return await asyncio.wait_for(self._connect_to_simulator(self._settings, address, port),
+                                              timeout=max(deadline - time.time(), 0))
+            except OSError:
+                # the simulator is not listening yet
+                if time.time() >= deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+    async def _launch_simulator(self, i):
+        """
+        Launches the `i`-th simulator and connects to it
+        :return: (supervisor, connection) of the simulator
+        """
+        simulator_supervisor = self._simulator_supervisor(
+            simulator_name_postfix=i
+        )
+        await simulator_supervisor.launch_simulator(port=self._port_start+i)
+        connection = await self._connect_when_ready("127.0.0.1", self._port_start+i)
+        return simulator_supervisor, connection
+
     async def start(self):
         if self._settings.simulator_cmd == 'debug':
             await self._start_debug()
             return
-        future_launches = []
-        future_connections = []
-        for i in range(self._n_cores):
-            simulator_supervisor = self._simulator_supervisor(
-                simulator_name_postfix=i
-            )
-            simulator_future_launch = simulator_supervisor.launch_simulator(port=self._port_start+i)
+        # the startup takes as long as the slowest simulator
+        simulators = await asyncio.gather(*[
+            self._launch_simulator(i) for i in range(self._n_cores + self._n_spares)
+        ])
 
-            future_launches.append(simulator_future_launch)
-            self._supervisors.append(simulator_supervisor)
+        for i, (supervisor, connection) in enumerate(simulators):
+            if i < self._n_cores:
+                self._supervisors.append(supervisor)
+                self._connections.append(connection)
+                self._ports.append(self._port_start+i)
+                self._workers.append(asyncio.ensure_future(self._simulator_queue_worker(i)))
+            else:
+                self._spares.append((supervisor, connection, self._port_start+i))
 
-        await asyncio.sleep(5)
-
-        for i, future_launch in enumerate(future_launches):
-            await future_launch
-            connection_future = self._connect_to_simulator(self._settings, "127.0.0.1", self._port_start+i)
-            future_connections.append(connection_future)
-
-        for i, future_conn in enumerate(future_connections):
-            self._connections.append(await future_conn)
-            self._workers.append(asyncio.ensure_future(self._simulator_queue_worker(i)))
-
-        await asyncio.sleep(1)
+    def set_reference_fitnesses(self, fitnesses):
+        """
+        Sets the fitnesses of the current population. With racing, the evaluations that
+        cannot reach their `racing_quantile` are stopped early.
+        :param fitnesses: fitnesses of the current population
+        """
+        if self._racing is not None:
+            self._racing.set_reference(fitnesses)
 
     def test_robot(self, robot, conf: PopulationConfig):
         """
@@ -77,33 +155,129 @@ class SimulatorQueue:
         :param conf: configuration of the experiment
         :return:
         """
+        if self._evaluation_cache is not None:
+            return self._evaluation_cache.evaluate(robot, conf, self._enqueue_robot)
+        return self._enqueue_robot(robot, conf)
+
+    def _enqueue_robot(self, robot, conf):
         future = asyncio.Future()
         self._robot_queue.put_nowait((robot, future, conf))
         return future
 
     async def _restart_simulator(self, i):
+        if self._spares:
+            # swap in a spare simulator and restart the broken one in the background
+            broken = (self._supervisors[i], self._connections[i], self._ports[i])
+            self._supervisors[i], self._connections[i], self._ports[i] = self._spares.popleft()
+            logger.error(f"Replacing simulator {i} with the spare simulator on port {self._ports[i]}")
+            restart = asyncio.ensure_future(self._restart_spare(*broken))
+            self._spare_restarts.append(restart)
+            restart.add_done_callback(self._spare_restarts.remove)
+            return
+
         # restart simulator
         address = '127.0.0.1'
-        port = self._port_start+i
+        port = self._ports[i]
         logger.error("Restarting simulator")
+        self._connections[i] = await self._relaunch(self._supervisors[i], self._connections[i], address, port)
+
+    async def _restart_spare(self, supervisor, connection, port):
+        """
+        Restarts a broken simulator and adds it to the spare simulators.
+        """
+        try:
+            connection = await self._relaunch(supervisor, connection, '127.0.0.1', port)
+        except Exception:
+            logger.exception(f"Could not restart the simulator on port {port}")
+            return
+        self._spares.append((supervisor, connection, port))
+
+    async def _relaunch(self, supervisor, connection, address, port):
+        """
+        Restarts a simulator and connects to it again.
+        :return: the new connection
+        """
         logger.error("Restarting simulator... disconnecting")
         try:
-            await asyncio.wait_for(self._connections[i].disconnect(), 10)
+            await asyncio.wait_for(connection.disconnect(), 10)
         except asyncio.TimeoutError:
             pass
         logger.error("Restarting simulator... restarting")
-        await self._supervisors[i].relaunch(10, address=address, port=port)
-        await asyncio.sleep(10)
+        await supervisor.relaunch(10, address=address, port=port)
         logger.debug("Restarting simulator done... connecting")
-        self._connections[i] = await self._connect_to_simulator(self._settings, address, port)
+        connection = await self._connect_when_ready(address, port)
         logger.debug("Restarting simulator done... connection done")
+        return connection
+
+    def _simulation_clock(self, connection):
+        """
+        :return: clock of the simulator of the connection, None if it is not followed
+        :rtype: SimulationClock
+        """
+        return connection.simulation_clock
+
+    def _log_state_ingest(self, connection):
+        """
+        Logs the mean cost of handling the robot states messages of a simulator
+        :param connection: connection to the simulator
+        """
+        cost = connection.state_ingest_cost()
+        if cost is not None:
+            logger.info(f"robot states handled in {cost * 1e6:.1f} us per message on average")
+
+    def _evaluation_timeout(self, clock, evaluation_time, n_robots):
+        """
+        Wall-clock seconds after which an evaluation is considered failed, from the measured
+        speed of the simulator. Falls back to EVALUATION_TIMEOUT when the speed is not known.
+        :param clock: clock of the simulator
+        :type clock: SimulationClock
+        :param evaluation_time: simulated seconds of the evaluation
+        :param n_robots: number of robots evaluated together
+        """
+        expected = clock.wall_time(evaluation_time) if clock is not None else None
+        if expected is None:
+            return self.EVALUATION_TIMEOUT * n_robots
+        return self.EVALUATION_MARGIN * n_robots + self.EVALUATION_SAFETY_FACTOR * expected
+
+    async def _watch_evaluation(self, connection, evaluation, evaluation_time, n_robots=1):
+        """
+        Runs an evaluation, stopping it when it lasts longer than its timeout or when the
+        simulator does not update its clock for STALL_TIMEOUT seconds.
+        The timeout follows the speed of the simulator during the evaluation.
+        :param connection: connection to the simulator
+        :param evaluation: evaluation coroutine
+        :param evaluation_time: simulated seconds of the evaluation
+        :param n_robots: number of robots evaluated together
+        :return: result of the evaluation
+        :raises asyncio.TimeoutError: if the evaluation was stopped
+        """
+        clock = self._simulation_clock(connection)
+        task = asyncio.ensure_future(evaluation)
+        start = time.time()
+        # the world may have been idle before the evaluation, the stall counts from its start
+        stall_start = time.monotonic()
+        try:
+            while True:
+                done, _ = await asyncio.wait([task], timeout=self.WATCHDOG_PERIOD)
+                if done:
+                    return task.result()
+                stalled = clock.stalled_for(since=stall_start) if clock is not None else None
+                if stalled is not None and stalled > self.STALL_TIMEOUT:
+                    logger.error(f"The simulation clock did not move for {stalled:.1f}s")
+                    raise asyncio.TimeoutError()
+                if time.time() - start > self._evaluation_timeout(clock, evaluation_time, n_robots):
+                    raise asyncio.TimeoutError()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.wait([task])
 
     async def _worker_evaluate_robot(self, connection, robot, future, conf):
         await asyncio.sleep(0.01)
         start = time.time()
         try:
-            timeout = self.EVALUATION_TIMEOUT  # seconds
-            result = await asyncio.wait_for(self._evaluate_robot(connection, robot, conf), timeout=timeout)
+            result = await self._watch_evaluation(connection, self._evaluate_robot(connection, robot, conf),
+                                                  conf.evaluation_time)
         except asyncio.TimeoutError:
             # WAITED TO MUCH, RESTART SIMULATOR
             elapsed = time.time()-start
@@ -115,33 +289,88 @@ class SimulatorQueue:
 
         elapsed = time.time()-start
         logger.info(f"time taken to do a simulation {elapsed}")
+        self._log_state_ingest(connection)
+        self._robot_queue.observe([(robot, future, conf)], elapsed)
 
-        robot.failed_eval_attempt_count = 0
         future.set_result(result)
         return True
 
+    async def _worker_evaluate_batch(self, connection, batch):
+        """
+        Evaluates a batch of robots in the same simulator.
+        :param connection: connection to the simulator
+        :param batch: list of (robot, future, conf) tuples
+        :return: list of the (robot, future, conf) tuples that could not be evaluated
+        """
+        await asyncio.sleep(0.01)
+        start = time.time()
+        try:
+            # all the robots of a batch share the same physics engine
+            evaluation_time = max(conf.evaluation_time for _, _, conf in batch)
+            await self._watch_evaluation(connection, self._evaluate_batch(connection, batch),
+                                         evaluation_time, len(batch))
+        except asyncio.TimeoutError:
+            # WAITED TO MUCH, RESTART SIMULATOR
+            elapsed = time.time()-start
+            logger.error(f"Simulator restarted after {elapsed}")
+        except Exception:
+            logger.exception(f"Exception running batch {[robot.phenotype.id for robot, _, _ in batch]}")
+        else:
+            elapsed = time.time()-start
+            logger.info(f"time taken to do a simulation of {len(batch)} robots {elapsed}")
+            self._log_state_ingest(connection)
+            self._robot_queue.observe(batch, elapsed)
+
+        return [(robot, future, conf) for (robot, future, conf) in batch if not future.done()]
+
+    async def _get_batch(self):
+        """
+        Waits for at least one robot in the queue and then takes the robots that are
+        already waiting, up to the batch size.
+        :return: list of (robot, future, conf) tuples
+        """
+        batch = [await self._robot_queue.get()]
+        while len(batch) < self._batch_size and not self._robot_queue.empty():
+            batch.append(self._robot_queue.get_nowait())
+        return batch
+
+    def _after_evaluation(self, robot, conf):
+        if robot.failed_eval_attempt_count == 3:
+            logger.info("Robot failed to be evaluated 3 times. Saving robot to failed_eval file")
+            conf.experiment_management.export_failed_eval_robot(robot)
+        robot.failed_eval_attempt_count = 0
+
     async def _simulator_queue_worker(self, i):
         try:
             self._free_simulator[i] = True
             while True:
                 logger.info(f"simulator {i} waiting for robot")
-                (robot, future, conf) = await self._robot_queue.get()
+                batch = await self._get_batch()
                 self._free_simulator[i] = False
-                logger.info(f"Picking up robot {robot.phenotype.id} into simulator {i}")
-                success = await self._worker_evaluate_robot(self._connections[i], robot, future, conf)
-                if success:
-                    if robot.failed_eval_attempt_count == 3:
-                        logger.info("Robot failed to be evaluated 3 times. Saving robot to failed_eval file")
-                        conf.experiment_management.export_failed_eval_robot(robot)
-                    robot.failed_eval_attempt_count = 0
-                    logger.info(f"simulator {i} finished robot {robot.phenotype.id}")
+                if len(batch) == 1:
+                    (robot, future, conf) = batch[0]
+                    logger.info(f"Picking up robot {robot.phenotype.id} into simulator {i}")
+                    success = await self._worker_evaluate_robot(self._connections[i], robot, future, conf)
+                    failed = [] if success else batch
                 else:
+                    logger.info(f"Picking up robots {[robot.phenotype.id for robot, _, _ in batch]} "
+                                f"into simulator {i}")
+                    failed = await self._worker_evaluate_batch(self._connections[i], batch)
+
+                for (robot, future, conf) in batch:
+                    if future.done():
+                        self._after_evaluation(robot, conf)
+                        logger.info(f"simulator {i} finished robot {robot.phenotype.id}")
+
+                if failed:
                     # restart of the simulator happened
-                    robot.failed_eval_attempt_count += 1
-                    logger.info(f"Robot {robot.phenotype.id} current failed attempt: {robot.failed_eval_attempt_count}")
-                    await self._robot_queue.put((robot, future, conf))
+                    for (robot, future, conf) in failed:
+                        robot.failed_eval_attempt_count += 1
+                        logger.info(f"Robot {robot.phenotype.id} current failed attempt: {robot.failed_eval_attempt_count}")
+                        await self._robot_queue.put((robot, future, conf))
                     await self._restart_simulator(i)
-                self._robot_queue.task_done()
+                for _ in batch:
+                    self._robot_queue.task_done()
                 self._free_simulator[i] = True
         except Exception:
             logger.exception(f"Exception occurred for Simulator worker {i}")
@@ -152,25 +381,108 @@ class SimulatorQueue:
             robot_fitness = None
             return robot_fitness, None
         else:
-            # Change this `max_age` from the command line parameters (--evalution-time)
-            max_age = conf.evaluation_time
-            robot_manager = await simulator_connection.insert_robot(robot.phenotype, Vector3(0, 0, self._settings.z_start), max_age)
-            start = time.time()
-            # Start a run loop to do some stuff
-            while not robot_manager.dead:  # robot_manager.age() < max_age:
-                await asyncio.sleep(1.0 / 2)  # 5= state_update_frequency
-            end = time.time()
-            elapsed = end-start
-            logger.info(f'Time taken: {elapsed}')
-
-            robot_fitness = conf.fitness_function(robot_manager, robot)
+            robot_manager = await self._insert_robot(simulator_connection, robot, conf,
+                                                     Vector3(0, 0, self._settings.z_start))
+            result = await self._wait_robot_result(simulator_connection, robot_manager, robot, conf)
+            await self._clear_world(simulator_connection)
+            return result
 
-            simulator_connection.unregister_robot(robot_manager)
-            # await simulator_connection.delete_all_robots()
-            # await simulator_connection.delete_robot(robot_manager)
-            # await simulator_connection.pause(True)
+    async def _evaluate_batch(self, simulator_connection, batch):
+        """
+        Inserts all the robots of the batch on a grid in the same world and resolves
+        the future of each robot as soon as its evaluation is over.
+        The world is reset only once all the robots are evaluated.
+        :param simulator_connection: connection to the simulator
+        :param batch: list of (robot, future, conf) tuples
+        """
+        inserted = []
+        insertions = []
+        for index, (robot, future, conf) in enumerate(batch):
+            if robot.failed_eval_attempt_count == 3:
+                logger.info(f'Robot {robot.phenotype.id} evaluation failed (reached max attempt of 3), '
+                            f'fitness set to None.')
+                future.set_result((None, None))
+                continue
+            inserted.append((robot, future, conf))
+            insertions.append(self._insert_robot(simulator_connection, robot, conf, self._batch_position(index)))
+        # the insertion requests are in flight together
+        robot_managers = await asyncio.gather(*insertions)
+
+        await asyncio.gather(*[
+            self._resolve_robot(simulator_connection, robot_manager, robot, future, conf)
+            for robot_manager, (robot, future, conf) in zip(robot_managers, inserted)
+        ])
+        await self._clear_world(simulator_connection)
+
+    async def _clear_world(self, simulator_connection):
+        """
+        Prepares the world for the next evaluation, once the evaluated robots are
+        dead. The world plugin deletes the robots it reports dead and the robots
+        stopped early are deleted by `_wait_robot_result`, the robots that reached
+        their `max_age` before the plugin removed them are deleted here. Then recycling
+        the world only needs to bring the simulation time back to zero, while the full
+        reset also resets the physics engine, the static models and the plugins.
+        :param simulator_connection: connection to the simulator
+        """
+        for robot_manager in list(simulator_connection.robot_managers.values()):
+            if robot_manager.removed:
+                simulator_connection.unregister_robot(robot_manager)
+            else:
+                await simulator_connection.delete_robot(robot_manager)
+
+        if self._world_reset == 'recycle':
+            await simulator_connection.reset(rall=False, time_only=True, model_only=False)
+        else:
             await simulator_connection.reset(rall=True, time_only=True, model_only=False)
-            return robot_fitness, measures.BehaviouralMeasurements(robot_manager, robot)
+
+    def _batch_position(self, index):
+        """
+        Insertion position of the `index`-th robot of a batch, on a square grid
+        centered in the origin of the world.
+        :param index: index of the robot in the batch
+        :return: insertion position
+        :rtype: Vector3
+        """
+        side = int(math.ceil(math.sqrt(self._batch_size)))
+        row, column = divmod(index, side)
+        spacing = self._settings.robot_spacing
+        offset = (side - 1) / 2.0
+        return Vector3((column - offset) * spacing, (row - offset) * spacing, self._settings.z_start)
+
+    async def _insert_robot(self, simulator_connection, robot, conf, position):
+        # Change this `max_age` from the command line parameters (--evalution-time)
+        max_age = conf.evaluation_time
+        return await simulator_connection.insert_robot(robot.phenotype, position, max_age)
+
+    async def _wait_robot_result(self, simulator_connection, robot_manager, robot, conf):
+        """
+        Waits until the robot is dead, then measures it and removes it from the connection.
+        :return: (fitness, behavioural measurements) of the robot
+        """
+        start = time.time()
+        if self._racing is not None:
+            robot.stopped_early = await self._racing.wait_until_done(simulator_connection, robot_manager,
+                                                                     robot, conf)
+        else:
+            await robot_manager.wait_until_dead()
+        end = time.time()
+        elapsed = end-start
+        logger.info(f'Time taken: {elapsed}')
+
+        robot_fitness = conf.fitness_function(robot_manager, robot)
+        behavioural_measurements = measures.BehaviouralMeasurements(robot_manager, robot)
+
+        if robot.stopped_early:
+            # the robot is still alive in the simulation
+            await simulator_connection.delete_robot(robot_manager)
+        elif robot_manager.removed:
+            simulator_connection.unregister_robot(robot_manager)
+        # else the robot is still in the world, it is deleted by `_clear_world`
+        return robot_fitness, behavioural_measurements
+
+    async def _resolve_robot(self, simulator_connection, robot_manager, robot, future, conf):
+        result = await self._wait_robot_result(simulator_connection, robot_manager, robot, conf)
+        future.set_result(result)
 
     async def _joint(self):
         await self._robot_queue.join()
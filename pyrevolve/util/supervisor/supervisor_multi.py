@@ -2,9 +2,11 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 import atexit
-import subprocess
+import functools
+import shutil
 import os
 import psutil
+import shlex
 import sys
 import asyncio
 import platform
@@ -14,7 +16,7 @@ from datetime import datetime
 from ...custom_logging.logger import create_logger
 from ...custom_logging.logger import logger as revolve_logger
 
-from .stream import PrettyStreamReader
+from .stream import PrettyStreamReader, StreamEnded
 
 mswindows = (sys.platform == "win32")
 
@@ -36,6 +38,38 @@ def terminate_process(proc):
     process.terminate()
 
 
+@functools.lru_cache(maxsize=None)
+def simulator_libraries_path(simulator_cmd):
+    """
+    Finds the folder of the simulator libraries, next to its executable.
+    The result is cached, every simulator of an experiment uses the same command.
+    :param simulator_cmd: executable of the simulator
+    :return: path of the simulator libraries
+    """
+    simulator_path = shutil.which(simulator_cmd)
+    if simulator_path is None:
+        raise FileNotFoundError(f'Simulator "{simulator_cmd}" not found')
+    gazebo_libraries_path = os.path.dirname(simulator_path)
+    for lib_f in ['lib', 'lib64']:
+        _gazebo_libraries_path = os.path.join(gazebo_libraries_path, '..', lib_f)
+        if os.path.isfile(os.path.join(_gazebo_libraries_path, 'libgazebo_common.so')):
+            return _gazebo_libraries_path
+    return gazebo_libraries_path
+
+
+def _append_env_path(variable, path):
+    """
+    Appends a path to a `:` separated environment variable, if it is not there yet
+    """
+    try:
+        paths = os.environ[variable]
+    except KeyError:
+        os.environ[variable] = path
+        return
+    if path not in paths.split(':'):
+        os.environ[variable] = f'{paths}:{path}'
+
+
 class DynamicSimSupervisor(object):
     """
     Utility class that allows you to automatically restore a crashing
@@ -102,8 +136,9 @@ class DynamicSimSupervisor(object):
         self.snapshot_world_file = snapshot_world_file
         self.restore_arg = restore_arg
         self.simulator_args = simulator_args if simulator_args is not None else ["-u"]
+        # a command line string can carry arguments, e.g. "python3 -m pyrevolve.gazebo.stand_in_server"
         self.simulator_cmd = simulator_cmd \
-            if isinstance(simulator_cmd, list) else [simulator_cmd]
+            if isinstance(simulator_cmd, list) else shlex.split(simulator_cmd)
         self._simulator_name = simulator_name
 
         self.world_file = os.path.abspath(world_file)
@@ -122,24 +157,12 @@ class DynamicSimSupervisor(object):
         # Set plugins dir path for Gazebo
         if plugins_dir_path is not None:
             plugins_dir_path = os.path.abspath(plugins_dir_path)
-            try:
-                new_env_var = "{curr_paths}:{new_path}".format(
-                    curr_paths=os.environ["GAZEBO_PLUGIN_PATH"],
-                    new_path=plugins_dir_path)
-            except KeyError:
-                new_env_var = plugins_dir_path
-            os.environ["GAZEBO_PLUGIN_PATH"] = new_env_var
+            _append_env_path("GAZEBO_PLUGIN_PATH", plugins_dir_path)
 
         # Set models dir path for Gazebo
         if models_dir_path is not None:
             models_dir_path = os.path.abspath(models_dir_path)
-            try:
-                new_env_var = "{curr_paths}:{new_path}".format(
-                    curr_paths=os.environ["GAZEBO_MODEL_PATH"],
-                    new_path=models_dir_path)
-            except KeyError:
-                new_env_var = models_dir_path
-            os.environ['GAZEBO_MODEL_PATH'] = new_env_var
+            _append_env_path("GAZEBO_MODEL_PATH", models_dir_path)
 
         self._logger.info("Created Supervisor with:"
                           f"\n\t- simulator command: {simulator_cmd} {simulator_args}"
@@ -245,16 +268,7 @@ class DynamicSimSupervisor(object):
             env[key] = value
         env['GAZEBO_MASTER_URI'] = f'http://{address}:{port}'
 
-        process = subprocess.run(['which', self.simulator_cmd[0]], stdout=subprocess.PIPE)
-        process.check_returncode()
-        gazebo_libraries_path = process.stdout.decode()
-        gazebo_libraries_path = os.path.dirname(gazebo_libraries_path)
-        for lib_f in ['lib', 'lib64']:
-            _gazebo_libraries_path = os.path.join(gazebo_libraries_path, '..', lib_f)
-            if os.path.isfile(os.path.join(_gazebo_libraries_path, 'libgazebo_common.so')):
-                gazebo_libraries_path = _gazebo_libraries_path
-                break
-
+        gazebo_libraries_path = simulator_libraries_path(self.simulator_cmd[0])
         if platform.system() == 'Darwin':
             env['DYLD_LIBRARY_PATH'] = gazebo_libraries_path
         else:  # linux
@@ -303,15 +317,21 @@ class DynamicSimSupervisor(object):
 
         async def read_stdout():
             while not ready_str_found.done():
-                if process.returncode is None:
+                if process.returncode is not None:
+                    ready_str_found.set_exception(SimulatorEnded())
+                    break
+                try:
+                    out = await stdout.readline()
+                except StreamEnded:
+                    # the simulator closed its output, it is exiting
                     ready_str_found.set_exception(SimulatorEnded())
-                out = await stdout.readline()
+                    break
                 self._logger.info(f'[starting] {out}')
                 if ready_str in out:
                     ready_str_found.set_result(None)
 
         async def read_stderr():
-            while not ready_str_found.done() and process.returncode is None:
+            while not ready_str_found.done() and process.returncode is None and not stderr.at_eof():
                 err = await stderr.readline()
                 if err:
                     self._logger.error(f'[starting] {err}')
@@ -322,10 +342,15 @@ class DynamicSimSupervisor(object):
         try:
             await ready_str_found
         except SimulatorEnded:
-            pass
+            await process.wait()
         finally:
             await stdout_async
-            await stderr_async
+            # the simulator may not write anything else on stderr
+            stderr_async.cancel()
+            try:
+                await stderr_async
+            except asyncio.CancelledError:
+                pass
 
         if process.returncode is not None:
             await process.wait()
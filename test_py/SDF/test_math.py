@@ -0,0 +1,139 @@
+from __future__ import absolute_import
+
+import copy
+import math
+import pickle
+import random
+import unittest
+
+import numpy as np
+
+from pyrevolve.SDF.math import Quaternion, QuaternionArray, RotationMatrix, Vector3, Vector3Array
+from pyrevolve.SDF.math import transformations
+
+
+class TestVector3(unittest.TestCase):
+    """
+    Tests the 3D vectors
+    """
+
+    def test_components(self):
+        v = Vector3(1, 2, 3)
+        self.assertEqual((1.0, 2.0, 3.0), (v.x, v.y, v.z))
+        self.assertListEqual([1.0, 2.0, 3.0], list(v))
+        self.assertEqual(3.0, v[2])
+        v[0] = 4
+        v.y = 5
+        self.assertListEqual([4.0, 5.0, 3.0], list(Vector3(v.data)))
+        self.assertListEqual([4.0, 5.0, 3.0], np.array(v).tolist())
+        with self.assertRaises(AttributeError):
+            v.w = 1
+        with self.assertRaises(AssertionError):
+            Vector3([1, 2])
+
+        w = copy.copy(v)
+        w.x = 0
+        self.assertEqual(4.0, v.x)
+        self.assertListEqual(list(v), list(pickle.loads(pickle.dumps(v))))
+
+    def test_operators(self):
+        a, b = Vector3(1, 2, 3), Vector3(-2, 0.5, 4)
+        self.assertListEqual([-1, 2.5, 7], list(a + b))
+        self.assertListEqual([3, 1.5, -1], list(a - b))
+        self.assertListEqual([0, 0, 0], list([1, 2, 3] - a))
+        self.assertListEqual([2, 4, 6], list(a * 2))
+        # numpy numbers defer to the vector
+        self.assertIsInstance(np.float64(2) * a, Vector3)
+        self.assertListEqual([0.5, 1, 1.5], list(a / 2))
+        self.assertListEqual(np.cross(a.data, b.data).tolist(), list(a.cross(b)))
+        self.assertAlmostEqual(np.dot(a.data, b.data), a.dot(b))
+        self.assertAlmostEqual(math.sqrt(14), a.norm())
+
+        c = Vector3(1, 2, 3)
+        c += b
+        c -= a
+        c *= 2
+        c /= 4
+        self.assertListEqual([-1, 0.25, 2], list(c))
+        self.assertTrue(Vector3(1, 0, 0).parallel_to(Vector3(2, 0, 0)))
+        self.assertTrue(Vector3(1, 0, 0).orthogonal_to(Vector3(0, 0, 3)))
+
+
+class TestQuaternion(unittest.TestCase):
+    """
+    Tests the quaternions against the functions of `transformations.py`
+    """
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.quaternions = [[rng.gauss(0, 1) for _ in range(4)] for _ in range(100)]
+        self.vectors = [[rng.gauss(0, 1) for _ in range(3)] for _ in range(100)]
+
+    def assertAllClose(self, expected, actual):
+        self.assertTrue(np.allclose(np.asarray(expected, dtype=float), np.asarray(actual, dtype=float)),
+                        '{} != {}'.format(expected, actual))
+
+    def test_product(self):
+        for q0, q1 in zip(self.quaternions, self.quaternions[1:]):
+            self.assertAllClose(transformations.quaternion_multiply(q0, q1), Quaternion(*q0) * Quaternion(*q1))
+            q = Quaternion(*q0)
+            q *= Quaternion(*q1)
+            self.assertAllClose(transformations.quaternion_multiply(q0, q1), q)
+            self.assertAllClose(transformations.quaternion_inverse(q0), Quaternion(*q0).inversed())
+
+    def test_rotation(self):
+        for q, v in zip(self.quaternions, self.vectors):
+            matrix = transformations.quaternion_matrix(q)
+            self.assertAllClose(np.dot(matrix[:3, :3], v), Quaternion(*q) * Vector3(*v))
+            self.assertAllClose(RotationMatrix(matrix) * Vector3(*v), Quaternion(*q) * Vector3(*v))
+        self.assertListEqual([1, 2, 3], list(Quaternion(0, 0, 0, 0) * Vector3(1, 2, 3)))
+
+    def test_angles(self):
+        for q, v in zip(self.quaternions, self.vectors):
+            self.assertAllClose(transformations.euler_from_quaternion(q), Quaternion(*q).get_rpy())
+            self.assertAllClose(transformations.quaternion_from_euler(*v), Quaternion.from_rpy(*v))
+            self.assertAllClose(transformations.quaternion_about_axis(q[0], v), Quaternion.from_angle_axis(q[0], Vector3(*v)))
+        # gimbal lock
+        q = transformations.quaternion_from_euler(0.3, math.pi / 2, 0)
+        self.assertAllClose(transformations.euler_from_quaternion(q), Quaternion(*q).get_rpy())
+
+
+class TestArrays(unittest.TestCase):
+    """
+    Tests the arrays of vectors and quaternions against the single ones
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.quaternions = QuaternionArray(rng.normal(size=(50, 4)))
+        self.vectors = Vector3Array(rng.normal(size=(50, 3)))
+
+    def assertAllClose(self, expected, actual):
+        self.assertTrue(np.allclose(np.asarray(expected, dtype=float), np.asarray(actual, dtype=float)))
+
+    def test_vectors(self):
+        self.assertEqual(50, len(self.vectors))
+        self.assertIsInstance(self.vectors[3], Vector3)
+        self.assertEqual(10, len(self.vectors[:10]))
+        other = Vector3(1, 2, 3)
+        self.assertAllClose([list(v + other) for v in self.vectors], self.vectors + other)
+        self.assertAllClose([list(v.cross(other)) for v in self.vectors], self.vectors.cross(other))
+        self.assertAllClose([v.dot(other) for v in self.vectors], self.vectors.dot(other))
+        self.assertAllClose([v.norm() for v in self.vectors], self.vectors.norm())
+        self.assertAllClose(sum((v * 2.0 for v in self.vectors), Vector3()),
+                            self.vectors.sum(weights=np.full(50, 2.0)))
+
+    def test_quaternions(self):
+        singles = list(self.quaternions)
+        vectors = list(self.vectors)
+        self.assertAllClose([list(q * v) for q, v in zip(singles, vectors)], self.quaternions * self.vectors)
+        self.assertAllClose([q.get_rpy() for q in singles], self.quaternions.get_rpy())
+        self.assertAllClose([list(q * singles[0]) for q in singles], self.quaternions * singles[0])
+        self.assertAllClose([list(singles[0] * q) for q in singles], singles[0] * self.quaternions)
+        self.assertAllClose([list(q.conjugated()) for q in singles], self.quaternions.conjugated())
+
+        rpy = self.vectors.data
+        self.assertAllClose([list(Quaternion.from_rpy(*angles)) for angles in rpy],
+                            QuaternionArray.from_rpy(rpy[:, 0], rpy[:, 1], rpy[:, 2]))
+        self.assertAllClose([list(Quaternion.from_angle_axis(angle, v)) for angle, v in zip(rpy[:, 0], vectors)],
+                            QuaternionArray.from_angle_axis(rpy[:, 0], self.vectors))
@@ -0,0 +1,3 @@
+from __future__ import absolute_import
+
+__author__ = 'elte'
@@ -0,0 +1,133 @@
+from __future__ import absolute_import
+
+import asyncio
+import random
+import unittest
+from types import SimpleNamespace
+
+from pygazebo.msg.contacts_pb2 import Contacts
+
+from pyrevolve.angle.manage.contacts import ContactsAggregator
+from pyrevolve.angle.manage.robotmanager import RobotManager
+from pyrevolve.angle.manage.world import WorldManager
+from pyrevolve.SDF.math import Vector3
+from pyrevolve.tol.manage import measures
+from pyrevolve.util import Time
+
+
+def _contacts_message(sec, nsec, contacts, rng):
+    """
+    :param contacts: (collision1, number of contact points) of every contact
+    :return: (serialized message, message)
+    """
+    message = Contacts()
+    message.time.sec = sec
+    message.time.nsec = nsec
+    for collision, n_points in contacts:
+        contact = message.contact.add()
+        contact.collision1 = collision
+        contact.collision2 = 'ground_plane::link::collision'
+        contact.world = 'default'
+        contact.time.sec = sec
+        contact.time.nsec = nsec
+        for _ in range(n_points):
+            position = contact.position.add()
+            position.x, position.y, position.z = (rng.uniform(-1, 1) for _ in range(3))
+            normal = contact.normal.add()
+            normal.x, normal.y, normal.z = 0.0, 0.0, 1.0
+            contact.depth.append(rng.uniform(0, 1e-3))
+    return message.SerializeToString(), message
+
+
+class _Robot:
+    def __init__(self, name):
+        self.id = name
+        body = SimpleNamespace(measurements_to_dict=lambda: {'absolute_size': 4})
+        self.phenotype = SimpleNamespace(_morphological_measurements=body)
+
+
+class TestContactsAggregator(unittest.TestCase):
+    """
+    Tests the counting of the contacts against the protobuf messages
+    """
+
+    def test_aggregate(self):
+        rng = random.Random(0)
+        collisions = [f'robot_{i % 5}::link_{i}::collision' for i in range(20)]
+        contacts = [(collision, rng.randint(1, 4)) for collision in collisions]
+        data, message = _contacts_message(7, 250, contacts, rng)
+        index = {b'robot_1': 1, b'robot_3': 3}
+
+        aggregator = ContactsAggregator()
+        counts = aggregator.aggregate(data, index)
+        expected = {}
+        for contact in message.contact:
+            robot = index.get(contact.collision1.split('::')[0].encode())
+            if robot is not None:
+                expected.setdefault(robot, []).append(len(contact.position))
+        self.assertDictEqual(expected, counts)
+        self.assertEqual((7, 250), aggregator.time(data))
+        # the cached collision names give the same counts
+        self.assertDictEqual(expected, aggregator.aggregate(data, index))
+
+    def test_cache_bound(self):
+        aggregator = ContactsAggregator()
+        aggregator.MAX_CACHED_COLLISIONS = 4
+        data, _ = _contacts_message(0, 0, [(f'robot_1::link_{i}::collision', 1) for i in range(10)],
+                                    random.Random(1))
+        self.assertDictEqual({1: [1] * 10}, aggregator.aggregate(data, {b'robot_1': 1}))
+        self.assertLessEqual(len(aggregator._models), 4)
+
+
+class TestWorldManagerContacts(unittest.TestCase):
+    """
+    Tests the handling of the contacts messages by the world manager
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _world(self, contacts_sampling):
+        world = WorldManager(builder=None, generator=None, state_update_frequency=5,
+                             contacts_sampling=contacts_sampling, _private=WorldManager._PRIVATE)
+        robot_manager = RobotManager(_Robot('robot_1'), Vector3(), Time())
+        world.register_robot(robot_manager)
+        return world, robot_manager
+
+    def _send(self, world, times):
+        rng = random.Random(2)
+        for t in times:
+            sec, nsec = divmod(int(round(t * 1e9)), 1000000000)
+            data, _ = _contacts_message(sec, nsec, [('robot_1::link::collision', 2),
+                                                    ('robot_1::other_link::collision', 1),
+                                                    ('robot_2::link::collision', 3)], rng)
+            world._update_contacts(data)
+
+    def test_every_step(self):
+        world, robot_manager = self._world('step')
+        self._send(world, [0.001 * i for i in range(10)])
+        # one count per contact of the robot, as the contacts messages
+        self.assertListEqual([2, 1] * 10, robot_manager._contacts.array().tolist())
+        self.assertAlmostEqual(30 / 4, measures.contacts(robot_manager, robot_manager.robot))
+
+    def test_decimation(self):
+        world, robot_manager = self._world('states')
+        # at most one contacts message per 0.2 seconds at 5 states updates per second
+        self._send(world, [0.15 * i for i in range(7)])
+        self.assertListEqual([2, 1] * 4, robot_manager._contacts.array().tolist())
+        # the world reset restarts the decimation
+        self._send(world, [0.0])
+        self.assertEqual(10, len(robot_manager._contacts))
+
+    def test_off(self):
+        world, robot_manager = self._world('off')
+        self.assertIsNone(measures.contacts(robot_manager, robot_manager.robot))
+
+    def test_unknown_sampling(self):
+        with self.assertRaises(ValueError):
+            WorldManager(builder=None, generator=None, contacts_sampling='sometimes',
+                         _private=WorldManager._PRIVATE)
@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+
+import math
+import unittest
+from types import SimpleNamespace
+
+from pyrevolve.angle.manage.robotmanager import RobotManager
+from pyrevolve.SDF.math import Quaternion, Vector3
+from pyrevolve.tol.manage import measures
+from pyrevolve.util import Time
+
+
+class _World:
+    @staticmethod
+    def age():
+        return Time()
+
+
+def _state(x, y, roll=0.0):
+    orientation = Quaternion.from_rpy(roll, 0, 0)
+    return SimpleNamespace(
+        dead=False,
+        pose=SimpleNamespace(
+            position=SimpleNamespace(x=x, y=y, z=0.1),
+            orientation=SimpleNamespace(w=orientation[0], x=orientation[1], y=orientation[2], z=orientation[3]),
+        ),
+    )
+
+
+class TestRobotManager(unittest.TestCase):
+    """
+    Tests the trajectory of the robots and the measures on it
+    """
+
+    def setUp(self):
+        body = SimpleNamespace(measurements_to_dict=lambda: {'absolute_size': 4})
+        self.robot = SimpleNamespace(id='robot_1', phenotype=SimpleNamespace(_morphological_measurements=body))
+
+    def _move(self, robot_manager, steps, speed=0.1, roll=0.0):
+        # 5 pose updates per second
+        for i in range(steps + 1):
+            robot_manager.update_state(_World(), Time(dbl=i * 0.2), _state(speed * i * 0.2, 0, roll), None)
+
+    def test_measures(self):
+        robot_manager = RobotManager(self.robot, Vector3(0, 0, 0.1), Time(), speed_window=100)
+        self.assertEqual(0, measures.velocity(robot_manager))
+        self.assertEqual(0.0, measures.displacement_velocity(robot_manager))
+        self.assertIsNone(measures.head_balance(robot_manager))
+
+        self._move(robot_manager, 50, roll=math.pi / 4)
+        self.assertAlmostEqual(0.1, measures.velocity(robot_manager))
+        self.assertAlmostEqual(0.1, measures.displacement_velocity(robot_manager))
+        self.assertAlmostEqual(1.0, measures.path_length(robot_manager))
+        self.assertAlmostEqual(1 - 45 / 360, measures.head_balance(robot_manager))
+        displacement, time = measures.displacement(robot_manager)
+        self.assertAlmostEqual(1.0, displacement.x)
+        self.assertAlmostEqual(10.0, float(time))
+        self.assertAlmostEqual(1.0, robot_manager.last_position.x)
+
+        for n_points in [1, 2, 3]:
+            robot_manager.update_contacts(_World(), SimpleNamespace(position=[None] * n_points))
+        self.assertAlmostEqual(6 / 4, measures.contacts(robot_manager, self.robot))
+
+    def test_window(self):
+        robot_manager = RobotManager(self.robot, Vector3(0, 0, 0.1), Time(), speed_window=10)
+        self._move(robot_manager, 50)
+        # the measures cover the last 10 poses, the path from the one before them
+        self.assertAlmostEqual(0.1, measures.velocity(robot_manager))
+        self.assertAlmostEqual(0.2, measures.path_length(robot_manager))
+        self.assertAlmostEqual(0.18, measures.displacement(robot_manager)[0].x)
+
+    def test_max_age(self):
+        # inserted at 0.1s, the first states update is at 0.2s
+        robot_manager = RobotManager(self.robot, Vector3(0, 0, 0.1), Time(dbl=0.1))
+        robot_manager.max_age = 1.0
+        self.assertFalse(robot_manager.reached_max_age())
+        for i in range(1, 7):
+            robot_manager.update_state(_World(), Time(dbl=i * 0.2), _state(0, 0), None)
+            # the life span counts from the first states update, as in the world plugin
+            self.assertEqual(i == 6, robot_manager.reached_max_age())
@@ -0,0 +1,111 @@
+from __future__ import absolute_import
+
+import asyncio
+import random
+import unittest
+from types import SimpleNamespace
+
+from pyrevolve.angle.manage.robot_states import RobotStatesDecoder
+from pyrevolve.angle.manage.robotmanager import RobotManager
+from pyrevolve.angle.manage.world import WorldManager
+from pyrevolve.SDF.math import Vector3
+from pyrevolve.spec.msgs import RobotStates
+from pyrevolve.util import Time
+
+
+def _states_message(sec, nsec, robots, rng):
+    """
+    :param robots: names of the robots in the message
+    :return: (serialized message, message)
+    """
+    states = RobotStates()
+    states.time.sec = sec
+    states.time.nsec = nsec
+    for i, name in enumerate(robots):
+        state = states.robot_state.add()
+        state.id = i
+        state.name = name
+        position = state.pose.position
+        position.x, position.y, position.z = (rng.uniform(-10, 10) for _ in range(3))
+        orientation = state.pose.orientation
+        orientation.w, orientation.x, orientation.y, orientation.z = (rng.gauss(0, 1) for _ in range(4))
+        state.dead = rng.random() < 0.5
+    return states.SerializeToString(), states
+
+
+class _Robot:
+    def __init__(self, name):
+        self.id = name
+        body = SimpleNamespace(measurements_to_dict=lambda: {'absolute_size': 4})
+        self.phenotype = SimpleNamespace(_morphological_measurements=body)
+
+
+class TestRobotStatesDecoder(unittest.TestCase):
+    """
+    Tests the decoding of the robot states against the protobuf messages
+    """
+
+    def test_decode(self):
+        rng = random.Random(0)
+        decoder = RobotStatesDecoder()
+        names = [f'robot_{i}' for i in range(20)]
+        index = {name.encode(): name for name in names[::3]}
+        data, message = _states_message(-3, 123456789, names, rng)
+
+        sec, nsec, states = decoder.decode(data, index)
+        self.assertEqual((-3, 123456789), (sec, nsec))
+        expected = [state for state in message.robot_state if state.name.encode() in index]
+        self.assertEqual(len(expected), len(states))
+        for state, (name, x, y, z, qw, qx, qy, qz, dead) in zip(expected, states):
+            position, orientation = state.pose.position, state.pose.orientation
+            self.assertEqual(state.name, name)
+            self.assertEqual((position.x, position.y, position.z), (x, y, z))
+            self.assertEqual((orientation.w, orientation.x, orientation.y, orientation.z), (qw, qx, qy, qz))
+            self.assertEqual(state.dead, dead)
+
+    def test_defaults(self):
+        states = RobotStates()
+        state = states.robot_state.add()
+        state.name = 'robot_1'
+        state.pose.position.x = 1.0
+        state.pose.orientation.w = 1.0
+        sec, nsec, decoded = RobotStatesDecoder().decode(states.SerializePartialToString(), {b'robot_1': 1})
+        self.assertEqual((0, 0), (sec, nsec))
+        self.assertListEqual([(1, 1.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, False)], decoded)
+
+
+class TestWorldManagerStates(unittest.TestCase):
+    """
+    Tests the handling of the robot states messages by the world manager
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.world = WorldManager(builder=None, generator=None, _private=WorldManager._PRIVATE)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_update_states(self):
+        rng = random.Random(1)
+        robot_managers = [RobotManager(_Robot(f'robot_{i}'), Vector3(), Time()) for i in range(3)]
+        for robot_manager in robot_managers:
+            self.world.register_robot(robot_manager)
+        self.world.unregister_robot(robot_managers[2])
+
+        names = ['other_1', 'robot_1', 'other_2', 'robot_2']
+        data, message = _states_message(12, 500, names, rng)
+        self.world._update_states(data)
+
+        self.assertEqual(Time(12, 500), self.world.last_time)
+        self.assertEqual(1, self.world.state_ingest_messages)
+        self.assertIsNotNone(self.world.state_ingest_cost())
+        # robot_0 is not in the simulation anymore
+        self.assertTrue(robot_managers[0].dead)
+        state = message.robot_state[1]
+        self.assertEqual(state.dead, robot_managers[1].dead)
+        self.assertEqual(state.pose.position.x, robot_managers[1].last_position.x)
+        # robot_2 is not registered anymore
+        self.assertEqual(0, len(robot_managers[2]._poses))
+        self.assertFalse(robot_managers[2].dead)
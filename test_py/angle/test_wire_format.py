@@ -0,0 +1,70 @@
+from __future__ import absolute_import
+
+import unittest
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+from google.protobuf.descriptor import FieldDescriptor
+from pygazebo.msg.color_pb2 import Color
+
+from pyrevolve.angle.manage.wire_format import field_tags, read_varint
+from pyrevolve.spec.msgs import RobotStates
+
+# a value of every field type
+_VALUES = {
+    FieldDescriptor.TYPE_DOUBLE: 1.5,
+    FieldDescriptor.TYPE_FLOAT: 1.5,
+    FieldDescriptor.TYPE_INT64: -1,
+    FieldDescriptor.TYPE_UINT64: 1,
+    FieldDescriptor.TYPE_INT32: -1,
+    FieldDescriptor.TYPE_FIXED64: 1,
+    FieldDescriptor.TYPE_FIXED32: 1,
+    FieldDescriptor.TYPE_BOOL: True,
+    FieldDescriptor.TYPE_STRING: 'a',
+    FieldDescriptor.TYPE_BYTES: b'a',
+    FieldDescriptor.TYPE_UINT32: 1,
+    FieldDescriptor.TYPE_SFIXED32: -1,
+    FieldDescriptor.TYPE_SFIXED64: -1,
+    FieldDescriptor.TYPE_SINT32: -1,
+    FieldDescriptor.TYPE_SINT64: -1,
+}
+
+
+def _all_types_message():
+    """
+    :return: class of a message with an optional field of every scalar type
+    """
+    file_proto = descriptor_pb2.FileDescriptorProto(name='test_wire_format.proto', package='test')
+    message_proto = file_proto.message_type.add(name='AllTypes')
+    for number, field_type in enumerate(_VALUES, start=1):
+        message_proto.field.add(name=f'field_{field_type}', number=number, type=field_type,
+                                label=FieldDescriptor.LABEL_OPTIONAL)
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    return message_factory.MessageFactory(pool).GetPrototype(pool.FindMessageTypeByName('test.AllTypes'))
+
+
+class TestFieldTags(unittest.TestCase):
+    """
+    Tests the wire tags of the fields against the serialized messages
+    """
+
+    def _assert_tags(self, message_class, values):
+        """
+        :param values: field name -> value set in the message
+        """
+        names = list(values)
+        for name, tag in zip(names, field_tags(message_class.DESCRIPTOR, *names)):
+            message = message_class()
+            setattr(message, name, values[name])
+            self.assertEqual(read_varint(message.SerializePartialToString(), 0)[0], tag, name)
+
+    def test_all_types(self):
+        message_class = _all_types_message()
+        self._assert_tags(message_class, {f'field_{field_type}': value for field_type, value in _VALUES.items()})
+
+    def test_simulator_messages(self):
+        self._assert_tags(Color, {'r': 0.5, 'a': 1.0})
+        message = RobotStates()
+        message.time.sec = 1
+        self.assertEqual(read_varint(message.SerializePartialToString(), 0)[0],
+                         field_tags(RobotStates.DESCRIPTOR, 'time')[0])
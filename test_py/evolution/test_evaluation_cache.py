@@ -0,0 +1,113 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from pyrevolve.evolution.evaluation_cache import EvaluationCache
+from pyrevolve.tol.manage import measures
+
+
+class FakePhenotype:
+    def __init__(self, _id, structure):
+        self.id = _id
+        self.structure = structure
+
+    def canonical_hash(self):
+        return self.structure
+
+
+class FakeIndividual:
+    def __init__(self, _id, structure):
+        self.phenotype = FakePhenotype(_id, structure)
+        self.stopped_early = False
+
+
+class FakeConf:
+    evaluation_time = 30
+
+
+class TestEvaluationCache(unittest.TestCase):
+    """
+    Tests the evaluation cache policies
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.evaluations = []
+        self.stopped_early = set()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _evaluate_robot(self, robot, conf):
+        self.evaluations.append(robot.phenotype.id)
+        robot.stopped_early = robot.phenotype.id in self.stopped_early
+        future = asyncio.Future()
+        behaviour = measures.BehaviouralMeasurements()
+        behaviour.velocity = float(len(self.evaluations))
+        future.set_result((float(len(self.evaluations)), behaviour))
+        return future
+
+    def _test(self, cache, robot):
+        return self.loop.run_until_complete(cache.evaluate(robot, FakeConf(), self._evaluate_robot))
+
+    def test_bypass(self):
+        cache = EvaluationCache(EvaluationCache.BYPASS)
+        self._test(cache, FakeIndividual('robot_1', 'a'))
+        self._test(cache, FakeIndividual('robot_2', 'a'))
+        self.assertListEqual(['robot_1', 'robot_2'], self.evaluations)
+
+    def test_reuse(self):
+        cache = EvaluationCache(EvaluationCache.REUSE)
+        fitness_1, _ = self._test(cache, FakeIndividual('robot_1', 'a'))
+        fitness_2, behaviour_2 = self._test(cache, FakeIndividual('robot_2', 'a'))
+        self._test(cache, FakeIndividual('robot_3', 'b'))
+        self.assertListEqual(['robot_1', 'robot_3'], self.evaluations)
+        self.assertEqual(fitness_1, fitness_2)
+        self.assertEqual(fitness_1, behaviour_2.velocity)
+        self.assertEqual(1, cache.hits)
+
+    def test_reuse_pending(self):
+        cache = EvaluationCache(EvaluationCache.REUSE)
+        future_1 = cache.evaluate(FakeIndividual('robot_1', 'a'), FakeConf(), self._evaluate_robot)
+        future_2 = cache.evaluate(FakeIndividual('robot_2', 'a'), FakeConf(), self._evaluate_robot)
+        self.loop.run_until_complete(asyncio.gather(future_1, future_2))
+        self.assertListEqual(['robot_1'], self.evaluations)
+        self.assertEqual(future_1.result()[0], future_2.result()[0])
+
+    def test_average(self):
+        cache = EvaluationCache(EvaluationCache.AVERAGE, samples=2)
+        self.assertEqual(1.0, self._test(cache, FakeIndividual('robot_1', 'a'))[0])
+        self.assertEqual(1.5, self._test(cache, FakeIndividual('robot_2', 'a'))[0])
+        self.assertEqual(1.5, self._test(cache, FakeIndividual('robot_3', 'a'))[0])
+        self.assertEqual(2, len(self.evaluations))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'evaluation_cache.txt')
+            cache = EvaluationCache(EvaluationCache.REUSE, path=path)
+            self._test(cache, FakeIndividual('robot_1', 'a'))
+
+            recovered_cache = EvaluationCache(EvaluationCache.REUSE, path=path)
+            fitness, behaviour = self._test(recovered_cache, FakeIndividual('robot_2', 'a'))
+            self.assertEqual(1, len(recovered_cache))
+            self.assertEqual(1.0, fitness)
+            self.assertEqual(1.0, behaviour.velocity)
+            self.assertListEqual(['robot_1'], self.evaluations)
+
+    def test_stopped_early(self):
+        # the evaluations stopped early by racing are shared, but not recorded
+        self.stopped_early.add('robot_1')
+        cache = EvaluationCache(EvaluationCache.REUSE)
+        robots = [FakeIndividual(f'robot_{i}', 'a') for i in range(1, 4)]
+        futures = [cache.evaluate(robot, FakeConf(), self._evaluate_robot) for robot in robots[:2]]
+        self.loop.run_until_complete(asyncio.gather(*futures))
+        self.assertEqual(0, len(cache))
+        self.assertListEqual([True, True], [robot.stopped_early for robot in robots[:2]])
+        self.assertEqual(1.0, futures[1].result()[0])
+
+        self.assertEqual(2.0, self._test(cache, robots[2])[0])
+        self.assertFalse(robots[2].stopped_early)
+        self.assertListEqual(['robot_1', 'robot_3'], self.evaluations)
+        self.assertEqual(1, len(cache))
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from pyrevolve.experiment_management import ExperimentManagement
+
+
+class TestExperimentManagement(unittest.TestCase):
+    """
+    Tests the exports of the experiment management through the background writer
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.folder = tempfile.TemporaryDirectory()
+        settings = SimpleNamespace(manager=os.path.join(self.folder.name, 'manager.py'), experiment_name='test',
+                                   run='1', background_export=True, results_store='files', recovery_enabled=False)
+        self.experiment_management = ExperimentManagement(settings)
+
+    def tearDown(self):
+        self.folder.cleanup()
+        self.loop.close()
+
+    def test_snapshot_in_flight(self):
+        # a slow export is pending, the event loop keeps running while the snapshot waits for it
+        written = []
+        self.experiment_management._export(lambda: (time.sleep(0.2), written.append(True)))
+        ticks = []
+
+        async def tick():
+            while not written:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        self.loop.run_until_complete(asyncio.gather(
+            self.experiment_management.export_snapshots_async([], 1), tick()))
+        self.assertListEqual([True], written)
+        self.assertGreater(len(ticks), 5)
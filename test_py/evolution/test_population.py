@@ -0,0 +1,178 @@
+import asyncio
+import random
+import unittest
+
+from pyrevolve.evolution.pop_management.steady_state import steady_state_population_management
+from pyrevolve.evolution.population import Population, PopulationConfig
+from pyrevolve.evolution.selection import multiple_selection, tournament_selection
+from pyrevolve.genotype.plasticoding.crossover.crossover import CrossoverConfig
+from pyrevolve.genotype.plasticoding.crossover.standard_crossover import standard_crossover
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.mutation.mutation import MutationConfig
+from pyrevolve.genotype.plasticoding.mutation.standard_mutation import standard_mutation
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+from pyrevolve.tol.manage import measures
+
+
+def _number(robot):
+    return int(robot.phenotype.id.split('_')[-1])
+
+
+class FakeExperimentManagement:
+    """
+    Records the exported fitnesses and snapshots
+    """
+
+    def __init__(self):
+        self.fitnesses = {}
+        self.snapshots = []
+
+    def export_genotype(self, individual):
+        pass
+
+    def export_phenotype(self, individual):
+        pass
+
+    def export_phenotype_images(self, dirpath, individual):
+        pass
+
+    def export_phenotype_measurements(self, individual):
+        pass
+
+    def export_behavior_measures(self, _id, measurements, stopped_early=False):
+        pass
+
+    def export_fitness(self, individual):
+        self.fitnesses[individual.phenotype.id] = individual.fitness
+
+    def export_snapshots(self, individuals, gen_num):
+        self.snapshots.append((gen_num, [individual.phenotype.id for individual in individuals]))
+
+    async def export_snapshots_async(self, individuals, gen_num):
+        self.export_snapshots(individuals, gen_num)
+
+
+class FakeSimulatorQueue:
+    """
+    Evaluates the robots after a random delay, the fitness of a robot is the number in its id.
+    The evaluations of the `failing` robots raise an error.
+    """
+
+    def __init__(self, failing=(), delay=None):
+        """
+        :param delay: function giving the duration of the evaluation of a robot
+        """
+        self.failing = set(failing)
+        self.delay = (lambda robot: random.uniform(0, 0.01)) if delay is None else delay
+        self.evaluated = []
+        self.finished = []
+
+    def set_reference_fitnesses(self, fitnesses):
+        pass
+
+    def test_robot(self, robot, conf):
+        self.evaluated.append(robot.phenotype.id)
+        future = asyncio.Future()
+
+        def resolve():
+            if robot.phenotype.id in self.failing:
+                future.set_exception(RuntimeError(f'simulator error with {robot.phenotype.id}'))
+            else:
+                future.set_result((float(_number(robot)), measures.BehaviouralMeasurements()))
+            self.finished.append(robot.phenotype.id)
+        asyncio.get_event_loop().call_later(self.delay(robot), resolve)
+        return future
+
+
+class TestPopulation(unittest.TestCase):
+    """
+    Tests the evolution with a simulator queue that does not simulate
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        random.seed(1)
+        genotype_conf = PlasticodingConfig()
+        self.conf = PopulationConfig(
+            population_size=6,
+            genotype_constructor=random_initialization,
+            genotype_conf=genotype_conf,
+            fitness_function=None,
+            mutation_operator=standard_mutation,
+            mutation_conf=MutationConfig(mutation_prob=0.8, genotype_conf=genotype_conf),
+            crossover_operator=standard_crossover,
+            crossover_conf=CrossoverConfig(crossover_prob=0.8),
+            selection=lambda individuals: tournament_selection(individuals, 2),
+            parent_selection=lambda individuals: multiple_selection(individuals, 2, tournament_selection),
+            population_management=steady_state_population_management,
+            population_management_selector=tournament_selection,
+            evaluation_time=10,
+            offspring_size=3,
+            experiment_name='test',
+            experiment_management=FakeExperimentManagement(),
+        )
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_export_order(self):
+        # the last robots finish first
+        simulator_queue = FakeSimulatorQueue(delay=lambda robot: 0.05 / _number(robot))
+        population = Population(self.conf, simulator_queue)
+        self.loop.run_until_complete(population.init_pop())
+
+        ids = [f'robot_{i}' for i in range(1, 7)]
+        self.assertListEqual(ids[::-1], simulator_queue.finished)
+        # the results are exported in the order of the ids, for the recovery
+        self.assertListEqual(ids, list(self.conf.experiment_management.fitnesses))
+        self.assertListEqual([float(i) for i in range(1, 7)],
+                             [individual.fitness for individual in population.individuals])
+
+    def test_development_pool(self):
+        self.conf.development_workers = 2
+        population = Population(self.conf, FakeSimulatorQueue())
+        self.loop.run_until_complete(population.init_pop())
+        development_pool = population.development_pool
+        self.assertIsNotNone(development_pool)
+        self.assertEqual('forkserver', development_pool._mp_context.get_start_method())
+
+        # the next generations develop their individuals in the same workers
+        population = self.loop.run_until_complete(population.next_gen(1))
+        self.assertIs(development_pool, population.development_pool)
+        self.assertEqual(6, len(population.individuals))
+        for individual in population.individuals:
+            self.assertIsNotNone(individual.phenotype._morphological_measurements)
+
+        population.shutdown()
+        self.assertIsNone(population.development_pool)
+        with self.assertRaises(RuntimeError):
+            development_pool.submit(int)
+
+    def test_asynchronous_evolution(self):
+        # the first child fails, a new child takes its place
+        simulator_queue = FakeSimulatorQueue(failing=['robot_7'])
+        population = Population(self.conf, simulator_queue)
+        self.loop.run_until_complete(population.init_pop())
+        gen_num = self.loop.run_until_complete(population.evolve_asynchronously(3, concurrency=2))
+
+        self.assertEqual(2, gen_num)
+        self.assertListEqual([1, 2], [snapshot[0] for snapshot in self.conf.experiment_management.snapshots])
+        self.assertEqual(6, len(population.individuals))
+        # 2 generations of 3 children, and the replacement of the failed one
+        self.assertCountEqual([f'robot_{i}' for i in range(1, 14)], simulator_queue.evaluated)
+        self.assertNotIn('robot_7', self.conf.experiment_management.fitnesses)
+        self.assertEqual(12, len(self.conf.experiment_management.fitnesses))
+        self.assertNotIn('robot_7', [individual.phenotype.id for individual in population.individuals])
+        self.assertSetEqual(set(), asyncio.all_tasks(self.loop))
+
+    def test_asynchronous_evolution_failing(self):
+        # the evaluations keep failing, the evolution stops and cancels the pending ones
+        simulator_queue = FakeSimulatorQueue(failing=[f'robot_{i}' for i in range(7, 20)])
+        population = Population(self.conf, simulator_queue)
+        self.loop.run_until_complete(population.init_pop())
+        with self.assertRaises(RuntimeError):
+            self.loop.run_until_complete(population.evolve_asynchronously(3, concurrency=2))
+        self.loop.run_until_complete(asyncio.sleep(0.02))
+        self.assertSetEqual(set(), asyncio.all_tasks(self.loop))
+        self.assertListEqual([], self.conf.experiment_management.snapshots)
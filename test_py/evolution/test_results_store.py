@@ -0,0 +1,54 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from pyrevolve.evolution.results_store import ResultsStore
+
+
+class TestResultsStore(unittest.TestCase):
+    """
+    Tests the single file results store
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'results.sqlite')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_results(self):
+        store = ResultsStore(self.path)
+        store.save_genotype('robot_1', 'genotype 1')
+        store.save_genotype('robot_2', 'genotype 2')
+        store.save_phenotype_descriptors('robot_1', {'branching': 0.5})
+        store.save_fitness('robot_1', 1.5)
+        store.save_behaviour('robot_1', {'velocity': 0.1, 'contacts': None}, stopped_early=True)
+        store.save_fitness('robot_2', None)
+        store.save_behaviour('robot_2', None)
+
+        self.assertEqual('genotype 2', store.genotype('robot_2'))
+        self.assertEqual(1.5, store.fitness('robot_1'))
+        self.assertDictEqual({'velocity': 0.1, 'contacts': None}, store.behaviour('robot_1'))
+        self.assertIsNone(store.behaviour('robot_2'))
+        self.assertTrue(store.stopped_early('robot_1'))
+        self.assertFalse(store.stopped_early('robot_2'))
+        self.assertDictEqual({'branching': 0.5}, store.phenotype_descriptors('robot_1'))
+        self.assertRaises(KeyError, store.fitness, 'robot_3')
+        store.close()
+
+    def test_recovery(self):
+        store = ResultsStore(self.path)
+        self.assertIsNone(store.last_evaluated_number())
+        for number in (1, 2, 10):
+            store.save_genotype(f'robot_{number}', 'genotype')
+        store.save_fitness('robot_2', 0.5)
+        store.save_fitness('robot_1', 1.0)
+
+        # the store reopens its own connection after being sent to another process
+        recovered_store = pickle.loads(pickle.dumps(store))
+        self.assertEqual(2, recovered_store.last_evaluated_number())
+        self.assertListEqual(['robot_1', 'robot_2'], [result['id'] for result in recovered_store.evaluations()])
+        store.close()
+        recovered_store.close()
@@ -0,0 +1,130 @@
+from __future__ import absolute_import
+
+import asyncio
+import unittest
+
+from pygazebo.msg import response_pb2
+
+from pyrevolve.gazebo import RequestHandler
+
+
+class _Publisher:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, msg):
+        self.published.append(msg)
+
+    async def wait_for_listener(self):
+        pass
+
+
+class _Subscriber:
+    async def wait_for_connection(self):
+        pass
+
+    async def remove(self):
+        pass
+
+
+class _Manager:
+    """
+    Records the published requests, the responses are sent with `respond`
+    """
+
+    def __init__(self):
+        self.publisher = _Publisher()
+        self.callback = None
+
+    async def subscribe(self, topic, msg_type, callback):
+        self.callback = callback
+        return _Subscriber()
+
+    async def advertise(self, topic, msg_type):
+        return self.publisher
+
+    def respond(self, request):
+        response = response_pb2.Response()
+        response.id = request.id
+        response.request = request.request
+        response.response = 'success'
+        self.callback(response.SerializeToString())
+
+
+class TestRequestHandler(unittest.TestCase):
+    """
+    Tests the requests in flight together
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.manager = _Manager()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _handler(self, **kwargs):
+        return self.loop.run_until_complete(RequestHandler.create(self.manager, **kwargs))
+
+    async def _published(self, n):
+        while len(self.manager.publisher.published) < n:
+            await asyncio.sleep(0)
+
+    def test_pipelined(self):
+        handler = self._handler()
+
+        async def requests():
+            tasks = [asyncio.ensure_future(handler.do_gazebo_request('entity_delete', data=f'robot_{i}'))
+                     for i in range(5)]
+            # all the requests are sent before any response
+            await self._published(5)
+            self.assertEqual(5, handler.in_flight)
+            for request in reversed(self.manager.publisher.published):
+                self.manager.respond(request)
+            return await asyncio.gather(*tasks)
+
+        responses = self.loop.run_until_complete(requests())
+        self.assertListEqual([request.id for request in self.manager.publisher.published],
+                             [response.id for response in responses])
+        self.assertEqual(0, handler.in_flight)
+
+    def test_max_in_flight(self):
+        handler = self._handler(max_in_flight=2)
+
+        async def requests():
+            tasks = [asyncio.ensure_future(handler.do_gazebo_request('entity_delete', data=f'robot_{i}'))
+                     for i in range(3)]
+            await self._published(2)
+            for _ in range(10):
+                await asyncio.sleep(0)
+            self.assertEqual(2, len(self.manager.publisher.published))
+            self.manager.respond(self.manager.publisher.published[0])
+            await self._published(3)
+            for request in self.manager.publisher.published[1:]:
+                self.manager.respond(request)
+            return await asyncio.gather(*tasks)
+
+        self.assertEqual(3, len(self.loop.run_until_complete(requests())))
+
+    def test_timeout(self):
+        handler = self._handler(timeout=0.01)
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(handler.do_gazebo_request('entity_delete', data='robot_1'))
+        self.assertEqual(0, handler.in_flight)
+        # a late response is ignored
+        self.manager.respond(self.manager.publisher.published[0])
+
+    def test_cancel(self):
+        handler = self._handler()
+
+        async def cancelled():
+            task = asyncio.ensure_future(handler.do_gazebo_request('entity_delete', data='robot_1'))
+            await self._published(1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.loop.run_until_complete(cancelled())
+        self.assertEqual(0, handler.in_flight)
+        self.manager.respond(self.manager.publisher.published[0])
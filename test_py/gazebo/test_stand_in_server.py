@@ -0,0 +1,280 @@
+from __future__ import absolute_import
+
+import asyncio
+import logging
+import random
+import socket
+import unittest
+from types import SimpleNamespace
+
+from pyrevolve import parser
+from pyrevolve.evolution import fitness
+from pyrevolve.evolution.individual import Individual
+from pyrevolve.gazebo.stand_in_server import StandInServer
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+from pyrevolve.SDF.math import Vector3
+from pyrevolve.tol.manage import World
+from pyrevolve.util.supervisor.simulator_queue import SimulatorQueue
+
+REAL_TIME_FACTOR = 20
+
+
+def _free_ports(n):
+    """
+    :return: first of `n` consecutive ports that are free
+    """
+    for port in range(12500, 13500, n):
+        try:
+            for p in range(port, port + n):
+                with socket.socket() as s:
+                    s.bind(('127.0.0.1', p))
+        except OSError:
+            continue
+        return port
+    raise OSError('No free ports')
+
+
+def _robots(n):
+    random.seed(0)
+    genotype_conf = PlasticodingConfig()
+    robots = [Individual(random_initialization(genotype_conf, i)) for i in range(1, n + 1)]
+    for robot in robots:
+        robot.develop()
+        robot.phenotype.measure_phenotype()
+    return robots
+
+
+class _StandInSupervisor:
+    """
+    Runs a stand-in server in this process, in place of a simulator process
+    """
+
+    def __init__(self, servers):
+        """
+        :param servers: list where the started servers are recorded
+        """
+        self.servers = servers
+        self.server = None
+
+    async def launch_simulator(self, port):
+        self.server = StandInServer(port=port, real_time_factor=REAL_TIME_FACTOR)
+        await self.server.start()
+        self.servers.append(self.server)
+
+    async def relaunch(self, grace_period=0, address='127.0.0.1', port=11345):
+        await self.server.stop()
+        await self.launch_simulator(port)
+
+    async def stop(self):
+        await self.server.stop()
+
+
+class _SimulatorQueue(SimulatorQueue):
+    """
+    Queue of the stand-in servers run in this process
+    """
+    STALL_TIMEOUT = 0.5
+    WATCHDOG_PERIOD = 0.1
+
+    def __init__(self, n_cores, port_start, **kwargs):
+        settings = parser.parse_args([
+            '--evaluation-time', '1',
+            '--robots-per-simulator', str(kwargs.pop('robots_per_simulator', 1)),
+            '--spare-simulators', str(kwargs.pop('spare_simulators', 0)),
+            '--world-reset', kwargs.pop('world_reset', 'full'),
+        ])
+        super().__init__(n_cores, settings, port_start, **kwargs)
+        self.servers = []
+        self.stand_in_supervisors = []
+
+    def _simulator_supervisor(self, simulator_name_postfix):
+        supervisor = _StandInSupervisor(self.servers)
+        self.stand_in_supervisors.append(supervisor)
+        return supervisor
+
+    def server(self, i):
+        """
+        :return: stand-in server of the `i`-th simulator
+        """
+        return self._supervisors[i].server
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, *self._spare_restarts, return_exceptions=True)
+        connections = self._connections + [connection for _, connection, _ in self._spares]
+        await asyncio.gather(*[connection.disconnect() for connection in connections])
+        await asyncio.gather(*[supervisor.stop() for supervisor in self.stand_in_supervisors])
+
+
+class _ExperimentManagement:
+    def __init__(self):
+        self.failed = []
+
+    def export_failed_eval_robot(self, individual):
+        self.failed.append(individual.phenotype.id)
+
+
+class _StandInTestCase(unittest.TestCase):
+    def setUp(self):
+        # the world manager logs every robot and request
+        logging.disable(logging.INFO)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        # the connections served by the stopped servers
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.wait(tasks))
+        self.loop.close()
+        logging.disable(logging.NOTSET)
+
+    def _run(self, coroutine, timeout=30):
+        return self.loop.run_until_complete(asyncio.wait_for(coroutine, timeout))
+
+
+class TestWorld(_StandInTestCase):
+    """
+    Tests the world manager against the stand-in server
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.port = _free_ports(1)
+        self.server = StandInServer(port=self.port, real_time_factor=REAL_TIME_FACTOR)
+        self._run(self.server.start())
+        self.world = self._run(World.create(parser.parse_args([]), world_address=('127.0.0.1', self.port)))
+
+    def tearDown(self):
+        self._run(self.world.disconnect())
+        self._run(self.server.stop())
+        super().tearDown()
+
+    def test_life(self):
+        robot, immortal = _robots(2)
+        robot_manager = self._run(self.world.insert_robot(robot.phenotype, Vector3(0, 0, 0.03), 2.0))
+        immortal_manager = self._run(self.world.insert_robot(immortal.phenotype, Vector3(2, 0, 0.03)))
+        self.assertCountEqual([robot.phenotype.id, immortal.phenotype.id], self.server._robots)
+
+        # the robot moves until the end of its life, then the server removes it
+        self._run(robot_manager.wait_until_dead())
+        self.assertTrue(robot_manager.removed)
+        self.assertGreaterEqual(float(robot_manager.age()), 2.0)
+        self.assertGreater(float(robot_manager.last_update), robot_manager._first_state_time)
+        self.assertGreater(len(robot_manager._contacts), 0)
+        self.assertIsNotNone(fitness.displacement_velocity(robot_manager, robot))
+        self.assertNotIn(robot.phenotype.id, self.server._robots)
+        self.world.unregister_robot(robot_manager)
+
+        # the robot without a life span is deleted
+        self.assertFalse(immortal_manager.dead)
+        self._run(self.world.delete_robot(immortal_manager))
+        self.assertDictEqual({}, self.server._robots)
+        self.assertDictEqual({}, self.world.robot_managers)
+
+    def test_time_reset(self):
+        robot, = _robots(1)
+        robot_manager = self._run(self.world.insert_robot(robot.phenotype, Vector3(0, 0, 0.03), 2.0))
+        self._run(asyncio.sleep(1.0 / REAL_TIME_FACTOR))
+        self._run(self.world.reset(rall=False, time_only=True, model_only=False))
+        self.assertLess(self.server.sim_time, 0.5)
+
+        # the robot stays in the world and keeps the life it had left
+        life_left = self.server._robots[robot.phenotype.id].life_left
+        self.assertGreater(life_left, 0.0)
+        self.assertLess(life_left, 2.0)
+        self._run(robot_manager.wait_until_dead())
+        self.assertNotIn(robot.phenotype.id, self.server._robots)
+        self.assertLess(float(robot_manager.last_update), 2.0)
+
+
+class TestSimulatorQueue(_StandInTestCase):
+    """
+    Tests the evaluations of the simulator queue on stand-in servers
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.conf = SimpleNamespace(evaluation_time=1, fitness_function=fitness.displacement_velocity,
+                                    experiment_management=_ExperimentManagement())
+        self.queue = None
+
+    def tearDown(self):
+        if self.queue is not None:
+            self._run(self.queue.stop())
+        super().tearDown()
+
+    def _start(self, n_cores=1, **kwargs):
+        self.queue = _SimulatorQueue(n_cores, _free_ports(n_cores + kwargs.get('spare_simulators', 0)), **kwargs)
+        self._run(self.queue.start())
+
+    def _evaluate(self, robots):
+        results = self._run(asyncio.gather(*[self.queue.test_robot(robot, self.conf) for robot in robots]))
+        # the world is cleared after the results of a batch
+        self._run(self.queue._robot_queue.join())
+        return results
+
+    def _assert_evaluated(self, robots, results):
+        for robot, (robot_fitness, behaviour) in zip(robots, results):
+            self.assertIsNotNone(robot_fitness)
+            self.assertIsNotNone(behaviour.velocity)
+            self.assertFalse(robot.stopped_early)
+        self.assertListEqual([], self.conf.experiment_management.failed)
+        for i in range(len(self.queue._connections)):
+            self.assertDictEqual({}, self.queue._connections[i].robot_managers)
+            self.assertDictEqual({}, self.queue.server(i)._robots)
+
+    def test_evaluation(self):
+        self._start()
+        robots = _robots(2)
+        self._assert_evaluated(robots, self._evaluate(robots))
+        # the full reset brings the time back
+        self.assertLess(self.queue.server(0).sim_time, 1.0)
+
+    def test_batch(self):
+        self._start(robots_per_simulator=3)
+        robots = _robots(3)
+        self._assert_evaluated(robots, self._evaluate(robots))
+
+    def test_recycle(self):
+        self._start(robots_per_simulator=2, world_reset='recycle')
+        robots = _robots(4)
+        self._assert_evaluated(robots, self._evaluate(robots))
+        self.assertLess(self.queue.server(0).sim_time, 1.0)
+
+    def test_idle_world(self):
+        # the empty world publishes nothing for longer than the stall timeout between the evaluations
+        self._start()
+        # the watchdog looks at the clock before the robot is inserted
+        self.queue.WATCHDOG_PERIOD = 0.002
+        robots = _robots(2)
+        self._assert_evaluated(robots[:1], self._evaluate(robots[:1]))
+        self._run(asyncio.sleep(2 * self.queue.STALL_TIMEOUT))
+        self._assert_evaluated(robots[1:], self._evaluate(robots[1:]))
+        self.assertEqual(1, len(self.queue.servers))
+
+    def test_spare(self):
+        self._start(spare_simulators=1)
+        broken = self.queue.server(0)
+        robots = _robots(2)
+
+        async def stall():
+            # the simulator stops with a robot in its world
+            while not broken._robots:
+                await asyncio.sleep(0.01)
+            broken.paused = True
+
+        # the evaluation runs again on the spare simulator
+        results = self._run(asyncio.gather(stall(), *[self.queue.test_robot(robot, self.conf) for robot in robots]))
+        self._run(self.queue._robot_queue.join())
+        self._assert_evaluated(robots, results[1:])
+        self.assertIsNot(broken, self.queue.server(0))
+
+        # the broken simulator is restarted as a spare
+        self._run(asyncio.gather(*self.queue._spare_restarts))
+        self.assertEqual(1, len(self.queue._spares))
+        self.assertEqual(3, len(self.queue.servers))
@@ -0,0 +1,33 @@
+import random
+import unittest
+
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.plasticoding import Alphabet, PlasticodingConfig
+
+
+class TestClone(unittest.TestCase):
+    def setUp(self):
+        random.seed(1)
+        self.conf = PlasticodingConfig()
+        self.genotype = random_initialization(self.conf, 180)
+
+    def test_clone(self):
+        self.genotype.develop()
+        clone = self.genotype.clone()
+        self.assertEqual(self.genotype.id, clone.id)
+        self.assertIsNone(clone.phenotype)
+        self.assertIsNone(clone.intermediate_phenotype)
+        self.assertEqual(self.genotype.to_text(), clone.to_text())
+        # the clone has its own grammar
+        clone.grammar[Alphabet.CORE_COMPONENT].pop()
+        for item in clone.grammar[Alphabet.BLOCK]:
+            if item[1]:
+                item[1][0] = 1000
+        self.assertNotEqual(self.genotype.to_text(), clone.to_text())
+        self.assertNotIn(1000, [item[1][0] for item in self.genotype.grammar[Alphabet.BLOCK] if item[1]])
+
+    def test_clone_develops(self):
+        clone = self.genotype.clone()
+        robot = self.genotype.develop()
+        robot_clone = clone.develop()
+        self.assertEqual(robot.to_yaml(), robot_clone.to_yaml())
@@ -46,6 +46,35 @@ class TestPlastiCoding(unittest.TestCase):
         file1_txt.close()
         file2_txt.close()
 
+    def test_read_write_text(self):
+        genotype2 = pyrevolve.genotype.plasticoding.plasticoding.Plasticoding(self.conf, self.genotype.id)
+        genotype2.load_text(self.genotype.to_text())
+
+        self.assertEqual(self.genotype.to_text(), genotype2.to_text())
+
+    def test_early_development(self):
+        Alphabet = pyrevolve.genotype.plasticoding.plasticoding.Alphabet
+        modules = [symbol[0] for symbol in Alphabet.modules()]
+
+        def expand(symbol, iterations):
+            if iterations == 0 or symbol[0] not in modules:
+                return [symbol]
+            expansion = []
+            for rule_symbol in self.genotype.grammar[symbol[0]]:
+                expansion.extend(expand(rule_symbol, iterations - 1))
+            return expansion
+
+        self.genotype.early_development()
+        expected = expand([self.conf.axiom_w, []], self.conf.i_iterations)
+        self.assertListEqual(expected, self.genotype.intermediate_phenotype)
+
+    def test_symbol_categories(self):
+        Alphabet = pyrevolve.genotype.plasticoding.plasticoding.Alphabet
+        for symbol in Alphabet:
+            category = Alphabet.category(symbol)
+            self.assertIn([symbol, []], getattr(Alphabet, category)())
+        self.assertEqual(len(Alphabet), len(Alphabet.categories()))
+
     def test_collision(self):
         genotype_180 = pyrevolve.genotype.plasticoding.plasticoding.Plasticoding(self.conf, 180)
         genotype_180.load_genotype(os.path.join(LOCAL_FOLDER, 'genotype_180.txt'))
@@ -0,0 +1,65 @@
+import random
+import unittest
+
+from pyrevolve.genotype.plasticoding.crossover.crossover import CrossoverConfig
+from pyrevolve.genotype.plasticoding.crossover.standard_crossover import generate_child_genotype
+from pyrevolve.genotype.plasticoding.development_cache import DevelopmentCache
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.plasticoding import Alphabet, PlasticodingConfig
+
+
+class TestDevelopmentCache(unittest.TestCase):
+    def setUp(self):
+        random.seed(2)
+        self.conf = PlasticodingConfig(development_cache_size=2)
+        self.cache = DevelopmentCache.shared(self.conf.development_cache_size)
+        self.cache.clear()
+        self.genotype = random_initialization(self.conf, 'robot_1')
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def test_same_grammar(self):
+        robot = self.genotype.develop()
+        # the second development of the grammar is serialized, the third one is deserialized
+        for i, misses, hits in ((2, 2, 0), (3, 2, 1)):
+            clone = self.genotype.clone()
+            clone.id = f'robot_{i}'
+            robot_clone = clone.develop()
+
+            self.assertEqual((misses, hits), (self.cache.misses, self.cache.hits))
+            self.assertEqual(f'robot_{i}', robot_clone.id)
+            self.assertIsNot(robot, robot_clone)
+            self.assertEqual(robot.to_yaml().replace('robot_1', f'robot_{i}'), robot_clone.to_yaml())
+            self.assertListEqual(self.genotype.intermediate_phenotype, clone.intermediate_phenotype)
+
+    def test_crossover(self):
+        parents = [self.genotype, random_initialization(self.conf, 'robot_2')]
+        for parent in parents:
+            parent.develop()
+        # the children of a failed crossover have the grammar of the first parent
+        for _ in range(2):
+            child = generate_child_genotype(parents, self.conf, CrossoverConfig(crossover_prob=0.0))
+            child.develop()
+        self.assertEqual(1, self.cache.hits)
+
+    def test_changed_grammar(self):
+        self.genotype.develop()
+        clone = self.genotype.clone()
+        clone.grammar[Alphabet.CORE_COMPONENT].append([Alphabet.MOVE_BACK, []])
+        misses = self.cache.misses
+        clone.develop()
+        self.assertEqual(misses + 1, self.cache.misses)
+
+        # the development depends on the configuration
+        conf = PlasticodingConfig(development_cache_size=2, i_iterations=2)
+        clone = self.genotype.clone()
+        clone.conf = conf
+        clone.develop()
+        self.assertEqual(misses + 2, self.cache.misses)
+        self.assertEqual(2, len(self.cache))
+
+    def test_uncached(self):
+        self.genotype.conf = PlasticodingConfig()
+        self.genotype.develop()
+        self.assertEqual(0, len(self.cache))
@@ -0,0 +1,45 @@
+from __future__ import absolute_import
+
+import os
+import tempfile
+import threading
+import unittest
+
+from pyrevolve.util.background_writer import BackgroundWriter
+
+
+class TestBackgroundWriter(unittest.TestCase):
+    """
+    Tests the background writer
+    """
+
+    def _write(self, path, content):
+        self.threads.add(threading.current_thread())
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def setUp(self):
+        self.threads = set()
+
+    def test_flush(self):
+        writer = BackgroundWriter()
+        with tempfile.TemporaryDirectory() as folder:
+            paths = [os.path.join(folder, f'file_{i}.txt') for i in range(100)]
+            for i, path in enumerate(paths):
+                writer.submit(self._write, path, str(i))
+            writer.flush()
+
+            for i, path in enumerate(paths):
+                with open(path) as f:
+                    self.assertEqual(str(i), f.read())
+        self.assertNotIn(threading.current_thread(), self.threads)
+
+    def test_failed_export(self):
+        writer = BackgroundWriter()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'file.txt')
+            writer.submit(self._write, os.path.join(folder, 'missing', 'file.txt'), 'lost')
+            writer.submit(self._write, path, 'written')
+            writer.flush()
+            with open(path) as f:
+                self.assertEqual('written', f.read())
@@ -0,0 +1,127 @@
+from __future__ import absolute_import
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from pyrevolve.evolution import fitness
+from pyrevolve.evolution.individual import Individual
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+from pyrevolve.tol.manage import measures
+from pyrevolve.util.supervisor.distributed import DistributedSimulatorQueue, SimulatorWorker
+
+
+def _fitness(robot):
+    return float(robot.phenotype.id.split('_')[-1])
+
+
+class _LocalQueue:
+    """
+    Local simulators of a worker, the fitness of a robot is the number in its id.
+    A stuck queue never finishes its evaluations.
+    """
+
+    def __init__(self, stuck=False):
+        self.stuck = stuck
+        self.evaluated = []
+        self.reference = None
+
+    def set_reference_fitnesses(self, fitnesses):
+        self.reference = fitnesses
+
+    def test_robot(self, robot, conf):
+        assert conf.fitness_function is fitness.displacement_velocity
+        self.evaluated.append(robot.phenotype.id)
+        future = asyncio.Future()
+        if not self.stuck:
+            behavioural_measurements = measures.BehaviouralMeasurements()
+            behavioural_measurements.velocity = conf.evaluation_time
+            future.set_result((_fitness(robot), behavioural_measurements))
+        return future
+
+
+class TestDistributedSimulatorQueue(unittest.TestCase):
+    """
+    Tests the coordinator and the workers of the distributed evaluations
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        settings = SimpleNamespace(coordinator=('127.0.0.1', 0), evaluation_scheduling='fifo')
+        self.coordinator = DistributedSimulatorQueue(settings)
+        self.loop.run_until_complete(self.coordinator.start())
+        self.conf = SimpleNamespace(evaluation_time=12, fitness_function=fitness.displacement_velocity)
+        genotype_conf = PlasticodingConfig()
+        self.robots = [Individual(random_initialization(genotype_conf, i)) for i in range(1, 7)]
+        for robot in self.robots:
+            robot.develop()
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.coordinator.stop())
+        # the workers and their evaluations
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.wait(tasks))
+        self.loop.close()
+
+    def _start_worker(self, local_queue, capacity=2):
+        worker = SimulatorWorker(self.coordinator.address, local_queue, capacity)
+        worker.RECONNECT_PERIOD = 0.05
+        return asyncio.ensure_future(worker.run())
+
+    def _evaluate_all(self):
+        futures = [self.coordinator.test_robot(robot, self.conf) for robot in self.robots]
+        return self.loop.run_until_complete(asyncio.wait_for(asyncio.gather(*futures), 10))
+
+    def test_evaluations(self):
+        queues = [_LocalQueue(), _LocalQueue()]
+        for queue in queues:
+            self._start_worker(queue)
+        self.coordinator.set_reference_fitnesses([1.0, None, 2.0])
+
+        results = self._evaluate_all()
+        for robot, (robot_fitness, behavioural_measurements) in zip(self.robots, results):
+            self.assertEqual(_fitness(robot), robot_fitness)
+            self.assertEqual(self.conf.evaluation_time, behavioural_measurements.velocity)
+        self.assertCountEqual([robot.phenotype.id for robot in self.robots],
+                              queues[0].evaluated + queues[1].evaluated)
+        self.assertEqual(4, self.coordinator.capacity)
+        for queue in queues:
+            self.assertListEqual([1.0, None, 2.0], queue.reference)
+
+    def test_worker_lost(self):
+        stuck_queue = _LocalQueue(stuck=True)
+        stuck_worker = self._start_worker(stuck_queue, capacity=len(self.robots))
+        futures = [self.coordinator.test_robot(robot, self.conf) for robot in self.robots]
+
+        async def lose_worker():
+            while len(stuck_queue.evaluated) < len(self.robots):
+                await asyncio.sleep(0.01)
+            stuck_worker.cancel()
+        self.loop.run_until_complete(lose_worker())
+
+        # the evaluations in flight on the lost worker are queued again
+        queue = _LocalQueue()
+        self._start_worker(queue)
+        results = self.loop.run_until_complete(asyncio.wait_for(asyncio.gather(*futures), 10))
+        self.assertListEqual([_fitness(robot) for robot in self.robots], [result[0] for result in results])
+        self.assertCountEqual([robot.phenotype.id for robot in self.robots], queue.evaluated)
+
+    def test_reconnection(self):
+        address = self.coordinator.address
+        self.loop.run_until_complete(self.coordinator.stop())
+        queue = _LocalQueue()
+        worker = SimulatorWorker(address, queue, 2)
+        worker.RECONNECT_PERIOD = 0.05
+        asyncio.ensure_future(worker.run())
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+
+        # the worker connects once the coordinator is back
+        settings = SimpleNamespace(coordinator=address, evaluation_scheduling='fifo')
+        self.coordinator = DistributedSimulatorQueue(settings)
+        self.loop.run_until_complete(self.coordinator.start())
+        results = self._evaluate_all()
+        self.assertListEqual([_fitness(robot) for robot in self.robots], [result[0] for result in results])
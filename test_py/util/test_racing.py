@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+
+import asyncio
+import unittest
+
+from pyrevolve.util.supervisor.racing import Racing
+
+
+class _World:
+    def __init__(self):
+        self.update_triggers = []
+
+    def add_update_trigger(self, callback):
+        self.update_triggers.append(callback)
+
+    def remove_update_trigger(self, callback):
+        self.update_triggers.remove(callback)
+
+
+class _RobotManager:
+    """
+    Robot moving at constant speed, that dies at `max_age`
+    """
+
+    def __init__(self, speed, max_age):
+        self.speed = speed
+        self.max_age = max_age
+        self.time = 0.0
+        self.dead = False
+        self._finished = asyncio.Event()
+
+    def age(self):
+        return self.time
+
+    async def wait_until_dead(self):
+        await self._finished.wait()
+
+    async def live(self, world, step=0.5):
+        while not self.dead:
+            await asyncio.sleep(0)
+            self.time += step
+            self.dead = self.time >= self.max_age
+            if self.dead:
+                self._finished.set()
+            for callback in list(world.update_triggers):
+                callback(world)
+
+
+class _Phenotype:
+    id = 1
+
+
+class _Robot:
+    phenotype = _Phenotype()
+
+
+class _Conf:
+    evaluation_time = 10
+
+    @staticmethod
+    def fitness_function(robot_manager, robot):
+        return robot_manager.speed
+
+
+class TestRacing(unittest.TestCase):
+    """
+    Tests the early stopping of the evaluations
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _race(self, racing, speed):
+        world = _World()
+        robot_manager = _RobotManager(speed, _Conf.evaluation_time)
+        life = asyncio.ensure_future(robot_manager.live(world))
+        stopped = self.loop.run_until_complete(racing.wait_until_done(world, robot_manager, _Robot(), _Conf()))
+        life.cancel()
+        return stopped, robot_manager.time, world
+
+    def test_stop_poor_robot(self):
+        racing = Racing(0.5, checkpoints=[0.25, 0.5])
+        racing.set_reference([1, 2, 3, 4, 5, None])
+        self.assertAlmostEqual(3, racing.threshold)
+
+        stopped, age, world = self._race(racing, speed=1)
+        self.assertTrue(stopped)
+        self.assertLess(age, _Conf.evaluation_time)
+        self.assertListEqual([], world.update_triggers)
+
+    def test_complete_good_robot(self):
+        racing = Racing(0.5, checkpoints=[0.25, 0.5])
+        racing.set_reference([1, 2, 3, 4, 5])
+
+        stopped, age, _ = self._race(racing, speed=4)
+        self.assertFalse(stopped)
+        self.assertAlmostEqual(10, age)
+
+    def test_no_reference(self):
+        racing = Racing(0.5, checkpoints=[0.25, 0.5], min_reference=5)
+        racing.set_reference([1, 2, 3])
+        self.assertIsNone(racing.threshold)
+
+        stopped, age, _ = self._race(racing, speed=0)
+        self.assertFalse(stopped)
+        self.assertAlmostEqual(10, age)
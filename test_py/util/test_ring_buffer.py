@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+
+import unittest
+
+import numpy as np
+
+from pyrevolve.util.ring_buffer import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    """
+    Tests the preallocated circular buffer
+    """
+
+    def test_values(self):
+        buffer = RingBuffer(3, np.int64)
+        self.assertEqual(0, len(buffer))
+        self.assertListEqual([], buffer.array().tolist())
+
+        for value in range(5):
+            buffer.append(value)
+        self.assertTrue(buffer.full)
+        self.assertListEqual([2, 3, 4], buffer.array().tolist())
+        self.assertEqual(2, buffer[0])
+        self.assertEqual(4, buffer[-1])
+        with self.assertRaises(IndexError):
+            buffer[3]
+
+        buffer.clear()
+        buffer.append(7)
+        self.assertListEqual([7], buffer.array().tolist())
+
+    def test_records(self):
+        buffer = RingBuffer(2, np.dtype([('time', np.float64), ('x', np.float64)]))
+        buffer.append((0.5, 1.0))
+        buffer.append((1.0, 2.0))
+        buffer.append((1.5, 4.0))
+        self.assertListEqual([1.0, 1.5], buffer.array()['time'].tolist())
+
+        # the records returned are copies
+        first = buffer[0]
+        buffer.append((2.0, 8.0))
+        self.assertEqual(2.0, first['x'])
@@ -0,0 +1,69 @@
+from __future__ import absolute_import
+
+import asyncio
+import unittest
+
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+from pyrevolve.util.supervisor.scheduling import EvaluationQueue, LongestExpectedFirst, body_features
+
+
+class _Conf:
+    evaluation_time = 30
+
+
+class _Robot:
+    def __init__(self, phenotype):
+        self.phenotype = phenotype
+
+
+class _CostPolicy:
+    def expected_cost(self, robot, conf):
+        return robot
+
+
+def _drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait()[0])
+    return items
+
+
+class TestScheduling(unittest.TestCase):
+    """
+    Tests the scheduling of the evaluations
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_fifo(self):
+        queue = EvaluationQueue()
+        for robot in [3, 1, 2]:
+            queue.put_nowait((robot, None, _Conf()))
+        self.assertListEqual([3, 1, 2], _drain(queue))
+
+    def test_highest_cost_first(self):
+        queue = EvaluationQueue(_CostPolicy())
+        for robot in [1, 3, 2, 3.0]:
+            queue.put_nowait((robot, None, _Conf()))
+        self.assertListEqual([3, 3.0, 2, 1], _drain(queue))
+
+    def test_learned_model(self):
+        genotype_conf = PlasticodingConfig()
+        robots = [_Robot(random_initialization(genotype_conf, i).develop()) for i in range(1, 13)]
+        policy = LongestExpectedFirst(min_observations=10)
+
+        def duration(robot):
+            modules, hinges = body_features(robot.phenotype)
+            return 0.5 + 0.1 * hinges
+
+        for robot in robots:
+            policy.observe([(robot, _Conf())], duration(robot))
+
+        for robot in robots:
+            self.assertAlmostEqual(duration(robot), policy.expected_cost(robot, _Conf()), 6)
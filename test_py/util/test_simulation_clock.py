@@ -0,0 +1,45 @@
+from __future__ import absolute_import
+
+import unittest
+
+from pyrevolve.util.simulation_clock import SimulationClock
+
+
+class TestSimulationClock(unittest.TestCase):
+    """
+    Tests the simulation clock
+    """
+
+    def test_real_time_factor(self):
+        clock = SimulationClock(window=5.0, min_span=0.5)
+        self.assertIsNone(clock.real_time_factor)
+        self.assertIsNone(clock.wall_time(10))
+
+        for i in range(20):
+            clock.update(sim_time=i * 0.1, wall_time=100 + i * 0.2)
+        self.assertAlmostEqual(0.5, clock.real_time_factor)
+        self.assertAlmostEqual(20.0, clock.wall_time(10))
+
+    def test_reset(self):
+        clock = SimulationClock(window=5.0, min_span=0.5)
+        for i in range(20):
+            clock.update(sim_time=i * 0.1, wall_time=100 + i * 0.1)
+        self.assertAlmostEqual(1.0, clock.real_time_factor)
+
+        # the simulation time goes back, the last estimate is kept until the next one
+        clock.update(sim_time=0.0, wall_time=102)
+        self.assertAlmostEqual(1.0, clock.real_time_factor)
+        for i in range(1, 20):
+            clock.update(sim_time=i * 0.2, wall_time=102 + i * 0.1)
+        self.assertAlmostEqual(2.0, clock.real_time_factor)
+
+    def test_stalled(self):
+        clock = SimulationClock()
+        self.assertIsNone(clock.stalled_for(wall_time=100))
+        clock.update(sim_time=1.0, wall_time=100)
+        self.assertAlmostEqual(3.0, clock.stalled_for(wall_time=103))
+
+        # an idle simulator before the evaluation is not stalled
+        self.assertAlmostEqual(1.0, clock.stalled_for(wall_time=103, since=102))
+        self.assertAlmostEqual(3.0, clock.stalled_for(wall_time=103, since=99))
+        self.assertAlmostEqual(1.0, SimulationClock().stalled_for(wall_time=103, since=102))
@@ -0,0 +1,279 @@
+from __future__ import absolute_import
+
+import asyncio
+import itertools
+import math
+import time
+import unittest
+from types import SimpleNamespace
+
+from pyrevolve.angle.manage.robotmanager import RobotManager
+from pyrevolve.evolution.individual import Individual
+from pyrevolve.genotype.plasticoding.initialization import random_initialization
+from pyrevolve.genotype.plasticoding.plasticoding import PlasticodingConfig
+from pyrevolve.util import Time
+from pyrevolve.util.simulation_clock import SimulationClock
+from pyrevolve.util.supervisor.simulator_queue import SimulatorQueue
+
+
+def _settings(**kwargs):
+    settings = dict(simulator_cmd='gzserver', robots_per_simulator=1, spare_simulators=0,
+                    evaluation_scheduling='fifo', racing_quantile=0.0, racing_checkpoints=[0.25, 0.5],
+                    world_reset='full', z_start=0.03, robot_spacing=2.0)
+    settings.update(kwargs)
+    return SimpleNamespace(**settings)
+
+
+def _fitness(robot_manager, robot):
+    return float(robot.phenotype.id.split('_')[-1])
+
+
+class _ExperimentManagement:
+    def __init__(self):
+        self.failed = []
+
+    def export_failed_eval_robot(self, individual):
+        self.failed.append(individual.phenotype.id)
+
+
+class _Connection:
+    """
+    Simulator without physics: the robots die a moment after their insertion,
+    except the `immortal` ones, that only die when they are killed.
+    """
+    simulation_clock = None
+
+    def __init__(self, immortal=()):
+        self.immortal = set(immortal)
+        self.robot_managers = {}
+        self.positions = {}
+        self.deleted = []
+        self.resets = []
+        # robots in the connection at every reset
+        self.registered_at_reset = []
+
+    async def insert_robot(self, revolve_bot, pose, life_timeout=None):
+        robot_manager = RobotManager(revolve_bot, pose, Time())
+        robot_manager.max_age = life_timeout
+        self.robot_managers[revolve_bot.id] = robot_manager
+        self.positions[revolve_bot.id] = pose
+        if revolve_bot.id not in self.immortal:
+            asyncio.get_event_loop().call_later(0.01, self.kill, revolve_bot.id)
+        return robot_manager
+
+    def kill(self, robot_id, removed=True):
+        """
+        :param removed: whether the simulator removes the robot, otherwise it only reached its max_age
+        """
+        self.robot_managers[robot_id].removed = removed
+        self.robot_managers[robot_id].dead = True
+
+    def unregister_robot(self, robot_manager):
+        del self.robot_managers[robot_manager.name]
+
+    async def delete_robot(self, robot_manager):
+        self.deleted.append(robot_manager.name)
+        self.unregister_robot(robot_manager)
+
+    async def reset(self, **kwargs):
+        self.resets.append(kwargs)
+        self.registered_at_reset.append(list(self.robot_managers))
+
+    def state_ingest_cost(self):
+        return None
+
+
+class _ClockConnection(_Connection):
+    """
+    Simulator that publishes its clock only while robots are in the world, as the world plugin,
+    and takes `insertion_latency` seconds to insert a robot. A `paused` simulator publishes nothing.
+    """
+
+    def __init__(self, immortal=(), insertion_latency=0.0):
+        super().__init__(immortal)
+        self.insertion_latency = insertion_latency
+        self.simulation_clock = SimulationClock()
+        self.sim_time = 0.0
+        self.paused = False
+        self._ticks = None
+
+    async def insert_robot(self, revolve_bot, pose, life_timeout=None):
+        await asyncio.sleep(self.insertion_latency)
+        if self._ticks is None:
+            self._ticks = asyncio.ensure_future(self._tick())
+        return await super().insert_robot(revolve_bot, pose, life_timeout)
+
+    async def _tick(self):
+        while self.robot_managers:
+            if not self.paused:
+                self.sim_time += 0.01
+                self.simulation_clock.update(self.sim_time)
+            await asyncio.sleep(0.01)
+        self._ticks = None
+
+
+class _SimulatorQueue(SimulatorQueue):
+    """
+    Queue of a single simulator, reached through `connection`, that is not restarted
+    """
+    EVALUATION_TIMEOUT = 0.1
+    WATCHDOG_PERIOD = 0.01
+
+    def __init__(self, connection, **kwargs):
+        super().__init__(1, _settings(**kwargs))
+        self._connections.append(connection)
+        self.restarts = 0
+
+    async def _restart_simulator(self, i):
+        self.restarts += 1
+
+
+class TestSimulatorQueueBatches(unittest.TestCase):
+    """
+    Tests the evaluation of several robots at the same time in a simulator
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.conf = SimpleNamespace(evaluation_time=10, fitness_function=_fitness,
+                                    experiment_management=_ExperimentManagement())
+        genotype_conf = PlasticodingConfig()
+        self.robots = [Individual(random_initialization(genotype_conf, i)) for i in range(1, 5)]
+        for robot in self.robots:
+            robot.develop()
+            robot.phenotype.measure_phenotype()
+
+    def tearDown(self):
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.wait(tasks))
+        self.loop.close()
+
+    def _batch(self, robots):
+        return [(robot, asyncio.Future(), self.conf) for robot in robots]
+
+    def test_independent_resolution(self):
+        connection = _Connection(immortal=[robot.phenotype.id for robot in self.robots[:3]])
+        queue = _SimulatorQueue(connection, robots_per_simulator=3)
+        batch = self._batch(self.robots[:3])
+        evaluation = asyncio.ensure_future(queue._evaluate_batch(connection, batch))
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+
+        # every robot is resolved when it dies, while the others are still evaluated
+        for i, (robot, future, _) in enumerate(batch):
+            self.assertFalse(future.done())
+            self.assertListEqual([], connection.resets)
+            connection.kill(robot.phenotype.id)
+            self.loop.run_until_complete(asyncio.sleep(0.01))
+            self.assertTrue(future.done())
+            self.assertEqual(_fitness(None, robot), future.result()[0])
+            self.assertListEqual([False] * (len(batch) - i - 1), [f.done() for _, f, _ in batch[i + 1:]])
+
+        # the world is reset once, after the last robot
+        self.loop.run_until_complete(evaluation)
+        self.assertEqual(1, len(connection.resets))
+        self.assertDictEqual({}, connection.robot_managers)
+
+    def test_recycle(self):
+        # the robots that reached their max_age before the simulator removed them
+        # are deleted before the world is recycled
+        ids = [robot.phenotype.id for robot in self.robots[:3]]
+        connection = _Connection(immortal=ids)
+        queue = _SimulatorQueue(connection, robots_per_simulator=3, world_reset='recycle')
+        evaluation = asyncio.ensure_future(queue._evaluate_batch(connection, self._batch(self.robots[:3])))
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        connection.kill(ids[0])
+        connection.kill(ids[1], removed=False)
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.assertListEqual(ids[1:], list(connection.robot_managers))
+        connection.kill(ids[2], removed=False)
+        self.loop.run_until_complete(evaluation)
+
+        self.assertListEqual(ids[1:], connection.deleted)
+        self.assertListEqual([dict(rall=False, time_only=True, model_only=False)], connection.resets)
+        self.assertListEqual([[]], connection.registered_at_reset)
+
+    def test_failed_robot_in_batch(self):
+        connection = _Connection()
+        queue = _SimulatorQueue(connection, robots_per_simulator=3)
+        self.robots[1].failed_eval_attempt_count = 3
+        batch = self._batch(self.robots[:3])
+        self.loop.run_until_complete(queue._evaluate_batch(connection, batch))
+
+        # the robot that failed 3 times is not inserted and has no fitness
+        self.assertEqual((None, None), batch[1][1].result())
+        self.assertNotIn(self.robots[1].phenotype.id, connection.positions)
+        for robot, future, _ in (batch[0], batch[2]):
+            self.assertEqual(_fitness(None, robot), future.result()[0])
+
+    def test_requeue_after_timeout(self):
+        immortal = self.robots[2].phenotype.id
+        connection = _Connection(immortal=[immortal])
+        queue = _SimulatorQueue(connection, robots_per_simulator=3)
+        futures = [queue.test_robot(robot, self.conf) for robot in self.robots[:3]]
+        queue._workers.append(asyncio.ensure_future(queue._simulator_queue_worker(0)))
+
+        # the robots that died before the timeout keep their results, the other one
+        # is evaluated again alone, until it fails for the third time
+        results = self.loop.run_until_complete(asyncio.wait_for(asyncio.gather(*futures), 5))
+        for robot, (robot_fitness, _) in zip(self.robots[:2], results[:2]):
+            self.assertEqual(_fitness(None, robot), robot_fitness)
+            self.assertEqual(0, robot.failed_eval_attempt_count)
+        self.assertEqual((None, None), results[2])
+        self.assertEqual(3, queue.restarts)
+        self.assertListEqual([immortal], self.conf.experiment_management.failed)
+        self.assertEqual(0, self.robots[2].failed_eval_attempt_count)
+
+    def test_cutoff_in_batch(self):
+        # the robots that never die stay together in the batches until their third failure
+        connection = _Connection(immortal=[robot.phenotype.id for robot in self.robots[:2]])
+        queue = _SimulatorQueue(connection, robots_per_simulator=2)
+        futures = [queue.test_robot(robot, self.conf) for robot in self.robots[:2]]
+        queue._workers.append(asyncio.ensure_future(queue._simulator_queue_worker(0)))
+
+        results = self.loop.run_until_complete(asyncio.wait_for(asyncio.gather(*futures), 5))
+        self.assertListEqual([(None, None)] * 2, results)
+        self.assertEqual(3, queue.restarts)
+        self.assertCountEqual([robot.phenotype.id for robot in self.robots[:2]],
+                              self.conf.experiment_management.failed)
+
+    def _clock_queue(self, connection):
+        queue = _SimulatorQueue(connection)
+        queue.STALL_TIMEOUT = 0.5
+        queue.EVALUATION_TIMEOUT = 5
+        return queue
+
+    def test_idle_before_evaluation(self):
+        # the world was empty longer than the stall timeout, and the robot takes a while to be inserted
+        connection = _ClockConnection(insertion_latency=0.15)
+        connection.simulation_clock.update(0.0, wall_time=time.monotonic() - 1.0)
+        queue = self._clock_queue(connection)
+        success = self.loop.run_until_complete(
+            queue._worker_evaluate_robot(connection, self.robots[0], asyncio.Future(), self.conf))
+        self.assertTrue(success)
+
+        # a simulator that stops during the evaluation is still noticed
+        connection.immortal.add(self.robots[1].phenotype.id)
+        connection.paused = True
+        start = time.monotonic()
+        success = self.loop.run_until_complete(
+            queue._worker_evaluate_robot(connection, self.robots[1], asyncio.Future(), self.conf))
+        self.assertFalse(success)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_grid_spacing(self):
+        for batch_size, spacing in ((1, 2.0), (4, 1.5), (5, 2.0), (9, 0.5)):
+            queue = _SimulatorQueue(_Connection(), robots_per_simulator=batch_size, robot_spacing=spacing)
+            positions = [queue._batch_position(index) for index in range(batch_size)]
+            for position in positions:
+                self.assertAlmostEqual(0.03, position.z)
+            # the robots are at least `spacing` apart
+            for a, b in itertools.combinations(positions, 2):
+                self.assertGreaterEqual(math.hypot(a.x - b.x, a.y - b.y), spacing - 1e-9)
+        # the grid is centered in the origin
+        queue = _SimulatorQueue(_Connection(), robots_per_simulator=4, robot_spacing=2.0)
+        self.assertListEqual([(-1, -1), (1, -1), (-1, 1), (1, 1)],
+                             [(p.x, p.y) for p in (queue._batch_position(index) for index in range(4))])